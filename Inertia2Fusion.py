@@ -2,9 +2,11 @@
 # Description-
 
 import adsk.core, adsk.fusion, adsk.cam, traceback
+import json, os
 
-from .utils import *
-import math
+# O pacote utils (e o NumPy, importado por ele) é carregado sob demanda, na
+# primeira execução do fluxo (ver _loadUtils), para que o add-in inicie rápido.
+utils = None
 
 handlers = []  # Lista global para manter referências dos handlers
 
@@ -12,42 +14,331 @@ handlers = []  # Lista global para manter referências dos handlers
 com_data = None
 inertia_data = None
 
+# Modo residente: mantém o tensor de inércia global atualizado a cada alteração
+# do design (ver utils/incremental.py) em vez de calculá-lo uma única vez.
+RESIDENT_MODE = False
+
+# Tolerância relativa do cálculo com precisão adaptativa (ver utils/adaptive.py).
+# None mantém a precisão padrão do Fusion para todos os corpos.
+ADAPTIVE_TOLERANCE = None
+
+# Modo em lote: em vez das tabelas, lê um arquivo de alvos (CSV/JSON) e gera
+# um corpo por alvo (ver utils/batch.py).
+BATCH_MODE = False
+
+# Modo de exportação: grava massa, CoM e tensor de cada link (corpos do
+# rootComp e cada ocorrência) em URDF e JSON lines (ver utils/export.py).
+EXPORT_MODE = False
+
+# Modo de análise de tolerâncias: em vez das tabelas, propaga as tolerâncias de
+# massa, CoM e densidade dos corpos até o tensor global por Monte Carlo e mostra
+# os percentis da massa, do CoM e de cada componente do tensor (ver utils/tolerance.py).
+TOLERANCE_MODE = False
+
+# Ajuste por vários primitivos (ver utils/fitting.py): em vez de uma única
+# caixa, o alvo das tabelas é reproduzido pelos primitivos listados ('box' ou
+# 'cylinder'), por exemplo ('box', 'cylinder'); com FIT_ENVELOPE_MM
+# ((xmin, ymin, zmin), (xmax, ymax, zmax)), todos ficam dentro desse volume.
+# None mantém a caixa única.
+FIT_PRIMITIVES = None
+FIT_ENVELOPE_MM = None
+
+# Cache em disco das propriedades físicas dos corpos (ver utils/snapshot_store.py):
+# ao reabrir um design, só os corpos alterados são consultados no kernel.
+DISK_CACHE = False
+
+# Processamento em segundo plano (ver utils/worker.py): a agregação do tensor
+# global, o solver e a gravação da exportação rodam em um pool de threads, com
+# barra de progresso e cancelamento, sem travar o Fusion. Os resultados voltam
+# à thread da interface por um evento customizado.
+BACKGROUND_JOBS = True
+
+# Instrumentação: registra spans das leituras de propriedades físicas, da criação
+# de corpos e das tabelas, e ao final exporta o trace do Chrome e o resumo dos
+# spans mais caros (ver utils/profiling.py).
+PROFILE = False
+
+# Comando registrado no modo add-in e painel onde o botão é colocado.
+COMMAND_ID = 'Inertia2FusionCommand'
+PANEL_ID = 'SolidScriptsAddinsPanel'
+
+def _manifestType():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Inertia2Fusion.manifest')
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f).get('type', 'script')
+    except (OSError, ValueError):
+        return 'script'
+
+# Modo add-in (manifesto com "type": "addin"): run apenas registra o comando, e
+# o módulo permanece carregado entre execuções, mantendo em memória os caches
+# de snapshots, o tracker incremental de cada design e as soluções do solver.
+# Modo script: run executa o fluxo uma vez e o script termina.
+ADDIN_MODE = _manifestType() == 'addin'
+
+def _loadUtils():
+    global utils
+    if utils is None:
+        from . import utils as module
+        utils = module
+    return utils
+
+def _finish():
+    # Em modo add-in o módulo continua carregado para a próxima execução.
+    if not ADDIN_MODE:
+        adsk.autoTerminate(True)
+
+def on_inertia_updated(result, consistent):
+    I_total, totalMass, globalCOM_mm = result
+    # As prévias das tabelas somam o novo corpo a este resultado.
+    utils.setPreviewBase(result)
+    textPalette = ui.palettes.itemById('TextCommands')
+    if not textPalette:
+        return
+    textPalette.writeText(utils.formatInertiaReport(I_total, totalMass, globalCOM_mm))
+    if consistent is False:
+        textPalette.writeText("Agregado incremental divergiu do recálculo completo e foi reconstruído.")
+
+def on_adaptive_inertia(result, report):
+    I_total, totalMass, globalCOM_mm = result
+    utils.setPreviewBase(result)
+    textPalette = ui.palettes.itemById('TextCommands')
+    if textPalette:
+        textPalette.writeText(utils.formatInertiaReport(I_total, totalMass, globalCOM_mm))
+        textPalette.writeText(utils.formatAdaptiveReport(report))
+    if report.estimatedError > report.tolerance:
+        ui.messageBox("O erro relativo estimado do tensor global ({:.2e}) ficou acima de ADAPTIVE_TOLERANCE ({:.2e}), "
+                      "mesmo com a precisão mais alta.".format(report.estimatedError, report.tolerance))
+
 def on_com_data_received(com_values):
     global com_data
     com_data = com_values
     # Aqui você já tem os dados do centro de massa.
     # Em seguida, inicia a tabela do tensor de inércia.
-    start_inertia_table(ui, handlers, on_data_received=on_inertia_data_received)
+    utils.start_inertia_table(ui, handlers, on_data_received=on_inertia_data_received, com_values=com_values)
 
 def on_inertia_data_received(inertia_values):
     global inertia_data
     inertia_data = inertia_values
     # Agora você tem os dados do tensor de inércia.
-    # Aqui você pode prosseguir com o processamento dos dados recebidos.
-    # Exemplo: exibir os valores no console (ou usar outra lógica).
+    # Resolve a caixa que reproduz a massa, o CoM e o tensor digitados.
     app = adsk.core.Application.get()
     ui = app.userInterface
+
+    # Valores digitados: CoM em mm, massa em kg e tensor (em relação ao CoM) em g·mm².
+    try:
+        com_mm = [utils.parseNumber(v) for v in com_data[:3]]
+        mass_kg = utils.parseNumber(com_data[3])
+        tensor_gmm2 = [[utils.parseNumber(v) for v in row] for row in inertia_data]
+    except ValueError as e:
+        on_solve_failed(e)
+        return
+
+    if FIT_PRIMITIVES:
+        fit_primitives(ui, mass_kg, com_mm, tensor_gmm2)
+        return
+
+    # Com massa em g e tensor em g·mm², as dimensões saem em mm.
+    if BACKGROUND_JOBS:
+        utils.submitJob(ui, 'Resolvendo a caixa', utils.solveBoxCached, mass_kg * 1000, com_mm, tensor_gmm2,
+                        onDone=lambda solution: create_solved_box(solution, mass_kg),
+                        onError=on_solve_failed, key='solve', showProgress=False)
+        return
+    try:
+        solution = utils.solveBoxCached(mass_kg * 1000, com_mm, tensor_gmm2)
+    except ValueError as e:
+        on_solve_failed(e)
+        return
+    create_solved_box(solution, mass_kg)
+
+def fit_primitives(ui, mass_kg, com_mm, tensor_gmm2):
+    # Com massa em g e tensor em g·mm², dimensões e posições saem em mm e as
+    # massas dos primitivos em g. Dentro do Fusion o ajuste usa um só
+    # processo (sys.executable é o próprio Fusion).
+    if BACKGROUND_JOBS:
+        utils.submitJob(ui, 'Ajustando primitivos', utils.fitPrimitives, mass_kg * 1000, com_mm, tensor_gmm2,
+                        FIT_PRIMITIVES, FIT_ENVELOPE_MM, onDone=create_fitted_bodies,
+                        onError=on_solve_failed, key='solve', progress=True, showProgress=False)
+        return
+    try:
+        fit = utils.fitPrimitives(mass_kg * 1000, com_mm, tensor_gmm2, FIT_PRIMITIVES, FIT_ENVELOPE_MM)
+    except ValueError as e:
+        on_solve_failed(e)
+        return
+    create_fitted_bodies(fit)
+
+def create_fitted_bodies(fit):
+    # Chamado na thread da interface (direto ou pelo evento do worker).
+    app = adsk.core.Application.get()
+    design = app.activeProduct
+    utils.createFittedBodies(design.rootComponent, fit, massScale=0.001)
+
+    ui.messageBox("Dados recebidos:\nCoM: {}\nTensor: {}\n{}".format(
+        com_data, inertia_data, utils.formatFitReport(fit, massUnit='g')))
+    utils.reportProfile(ui)
+    _finish()
+
+def on_solve_failed(error):
+    ui.messageBox("Não foi possível resolver a caixa:\n{}".format(error))
+    _finish()
+
+def create_solved_box(solution, mass_kg):
+    # Chamado na thread da interface (direto ou pelo evento do worker).
+    app = adsk.core.Application.get()
     design = app.activeProduct
     rootComp = design.rootComponent
 
-    # Exemplo: cria uma caixa com dimensões:
-    # width = 10 mm, height = 20 mm, depth = 30 mm
-    # Se as unidades do design forem cm, converta 10 mm = 1 cm, etc.
-    width = 1.0    # 10 mm
-    height = 2.0   # 20 mm
-    depth = 3.0    # 30 mm
-    
-    
-    box = createBox(rootComp, width, height, depth)
+    # O Fusion trabalha internamente em cm. A caixa já é criada com os eixos
+    # principais do tensor alvo, no CoM alvo e com o material real cuja
+    # densidade mais se aproxima da massa digitada, sem sketch nem move feature.
+    width, height, depth = (d / 10 for d in solution.dimensions)
+    utils.createOrientedBox(rootComp, width, height, depth, solution.rotation,
+                            tuple(x / 10 for x in solution.translation), mass=mass_kg)
+
+    ui.messageBox("Dados recebidos:\nCoM: {}\nTensor: {}\nCaixa (mm): {}".format(com_data, inertia_data, solution.dimensions))
+    utils.reportProfile(ui)
+    _finish()
+
+def start_workflow(ui):
+    """
+    Fluxo principal: calcula as propriedades do design e abre as tabelas (ou,
+    em modo lote, gera os corpos do arquivo de alvos).
+    """
+    _loadUtils()
+    if BACKGROUND_JOBS:
+        utils.start_worker(ui, handlers)
+    utils.start_preview(ui, handlers)
+    if PROFILE:
+        # Em modo add-in o módulo continua carregado: cada execução começa um trace novo.
+        utils.resetProfile()
+        utils.enableProfiling()
+    if DISK_CACHE:
+        utils.enableSnapshotStore()
 
-    # Rotaciona o corpo com 30° em X, 45° em Y e 60° em Z:
-    rotateBodyAroundCG_xyz(box, math.radians(30), math.radians(45), math.radians(60))
+    app = adsk.core.Application.get()
+    design = app.activeProduct
+
+    # pega o root comn
+    rootComp = design.rootComponent
 
-    # Translada o corpo para x=10mm
-    translateBody(box, 10, 0, 0)
+    if BATCH_MODE:
+        utils.run_batch_generation(ui, rootComp)
+        utils.reportProfile(ui)
+        _finish()
+        return
 
-    ui.messageBox("Dados recebidos:\nCoM: {}\nTensor: {}".format(com_data, inertia_data))
-    adsk.autoTerminate(True)
+    # Em modo script, _finish encerra o script (e o pool) logo em seguida: um
+    # job em segundo plano seria cancelado antes de terminar, então a
+    # exportação e a análise de tolerâncias rodam direto.
+    background = BACKGROUND_JOBS and ADDIN_MODE
+
+    if EXPORT_MODE:
+        utils.run_inertial_export(ui, rootComp, background=background)
+        utils.reportProfile(ui)
+        _finish()
+        return
+
+    if TOLERANCE_MODE:
+        utils.run_tolerance_analysis(ui, rootComp, background=background)
+        utils.reportProfile(ui)
+        _finish()
+        return
+
+    if rootComp.bRepBodies.count > 0 or rootComp.meshBodies.count > 0 or rootComp.occurrences.count > 0:
+        # pega a inercia total, massa total, posicao do CoM do componente
+        # isso sera usado para calcular o
+        if ADAPTIVE_TOLERANCE:
+            I_total, totalMass, globalCOM_mm, report = utils.getGlobalInertiaAdaptive(rootComp, ADAPTIVE_TOLERANCE)
+            if report is None:
+                # O erro já foi mostrado por getGlobalInertiaAdaptive.
+                _finish()
+                return
+            on_adaptive_inertia((I_total, totalMass, globalCOM_mm), report)
+        elif ADDIN_MODE:
+            # Só o que mudou desde a execução anterior é relido e recalculado.
+            I_total, totalMass, globalCOM_mm = utils.getIncrementalTracker(rootComp).result()
+            utils.setPreviewBase((I_total, totalMass, globalCOM_mm))
+        elif BACKGROUND_JOBS:
+            # Os snapshots são lidos aqui (a API só pode ser usada nesta thread);
+            # a agregação roda em segundo plano e o resultado vai para a paleta de
+            # texto e para as prévias das tabelas (on_inertia_updated).
+            utils.submitJob(ui, 'Tensor de inércia global', utils.aggregateInChunks,
+                            *utils.gatherGlobalSnapshots(rootComp),
+                            onDone=lambda result: on_inertia_updated(result, None),
+                            key='aggregate', progress=True)
+        else:
+            I_total, totalMass, globalCOM_mm = utils.getGlobalInertia(rootComp)
+            utils.setPreviewBase((I_total, totalMass, globalCOM_mm))
+        # ui.messageBox("Tensor Global (kg·mm²):\n{}\nMassa Total: {}\nCentro de Massa Global (mm): {}".format(I_total, totalMass, globalCOM_mm))
+
+        if RESIDENT_MODE:
+            utils.start_incremental_inertia(ui, handlers, rootComp, on_update=on_inertia_updated)
+
+    else:
+        ui.messageBox("Nenhum corpo encontrado no componente ativo.")
+        _finish()
+
+    # Inicia a tabela de CoM. O callback on_com_data_received será chamado
+    # quando o usuário confirmar os dados.
+    utils.start_com_table(ui, handlers, on_data_received=on_com_data_received)
+
+    utils.reportProfile(ui)
+    if not ADDIN_MODE:
+        adsk.autoTerminate(False)
+
+class Inertia2FusionCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            cmd = args.command
+            # O comando não tem diálogo próprio: executa direto ao ser criado.
+            cmd.isAutoExecute = True
+            onExecute = Inertia2FusionCommandExecuteHandler()
+            cmd.execute.add(onExecute)
+            handlers.append(onExecute)
+        except Exception as e:
+            ui.messageBox('Erro:\n{}'.format(traceback.format_exc()))
+
+class Inertia2FusionCommandExecuteHandler(adsk.core.CommandEventHandler):
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            # Só o comando atual precisa do handler; os anteriores já terminaram.
+            handlers.remove(self)
+            start_workflow(ui)
+        except Exception as e:
+            ui.messageBox('Erro:\n{}'.format(traceback.format_exc()))
+
+def register_command(ui):
+    """Registra o comando do add-in e o coloca no painel de add-ins (uma única vez)."""
+    cmdDef = ui.commandDefinitions.itemById(COMMAND_ID)
+    if not cmdDef:
+        cmdDef = ui.commandDefinitions.addButtonDefinition(
+            COMMAND_ID,
+            'Inertia2Fusion',
+            'Gera um corpo com a massa, o centro de massa e o tensor de inércia informados',
+            ''
+        )
+        onCommandCreated = Inertia2FusionCommandCreatedHandler()
+        cmdDef.commandCreated.add(onCommandCreated)
+        handlers.append(onCommandCreated)
+
+    panel = ui.allToolbarPanels.itemById(PANEL_ID)
+    if panel and not panel.controls.itemById(COMMAND_ID):
+        panel.controls.addCommand(cmdDef)
+
+def unregister_command(ui):
+    panel = ui.allToolbarPanels.itemById(PANEL_ID)
+    control = panel.controls.itemById(COMMAND_ID) if panel else None
+    if control:
+        control.deleteMe()
+    cmdDef = ui.commandDefinitions.itemById(COMMAND_ID)
+    if cmdDef:
+        cmdDef.deleteMe()
 
 
 def run(context):
@@ -56,28 +347,11 @@ def run(context):
     try:
         app = adsk.core.Application.get()
         ui  = app.userInterface
-        design = app.activeProduct
-
-        # pega o root comn
-        rootComp = design.rootComponent
-
-        
-        if rootComp.bRepBodies.count > 0:
-            # pega a inercia total, massa total, posicao do CoM do componente
-            # isso sera usado para calcular o 
-            I_total, totalMass, globalCOM_mm = getGlobalInertia(rootComp)
-            # ui.messageBox("Tensor Global (kg·mm²):\n{}\nMassa Total: {}\nCentro de Massa Global (mm): {}".format(I_total, totalMass, globalCOM_mm))
 
+        if ADDIN_MODE:
+            register_command(ui)
         else:
-            ui.messageBox("Nenhum corpo encontrado no componente ativo.")
-            adsk.autoTerminate(True)
-
-        # Inicia a tabela de CoM. O callback on_com_data_received será chamado
-        # quando o usuário confirmar os dados.
-        start_com_table(ui, handlers, on_data_received=on_com_data_received)
-        
-        
-        adsk.autoTerminate(False)
+            start_workflow(ui)
     except Exception as e:
         if ui:
             ui.messageBox('Erro:\n{}'.format(traceback.format_exc()))
@@ -87,8 +361,17 @@ def stop(context):
     try:
         app = adsk.core.Application.get()
         ui = app.userInterface
-        stop_com_table(ui)
-        stop_inertia_table(ui)
+        if ADDIN_MODE:
+            unregister_command(ui)
+        # Se o fluxo nunca foi executado, nada foi registrado pelos módulos de utils.
+        if utils is not None:
+            utils.stop_com_table(ui)
+            utils.stop_inertia_table(ui)
+            utils.stop_incremental_inertia(ui)
+            utils.disableSnapshotStore()
+            utils.stop_worker(ui)
+            utils.stop_preview(ui)
+        handlers.clear()
     except Exception as e:
         if ui:
             ui.messageBox('Erro:\n{}'.format(traceback.format_exc()))
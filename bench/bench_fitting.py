@@ -0,0 +1,132 @@
+"""
+Benchmark do ajuste de vários primitivos (utils/fitting.py): ajustes por
+segundo, fração de alvos convergidos e iterações médias de Levenberg-Marquardt,
+com um processo e com o pool de processos.
+
+Os alvos são sintéticos e realizáveis: massa, CoM e tensor de conjuntos
+aleatórios de caixas. Casos:
+  - box2:          duas caixas, sem envelope
+  - box_cylinder:  uma caixa e um cilindro, sem envelope
+  - box3_envelope: três caixas dentro de um envelope que contém o conjunto
+  - thin:          duas caixas para tensores a 1% de violar a desigualdade
+                   triangular (I3 = 0.99 (I1 + I2)), onde uma caixa só seria
+                   uma chapa quase sem espessura
+
+O script termina com código 1 se a fração de alvos convergidos de algum caso
+ficar abaixo de --min-converged.
+
+Uso:
+  python bench/bench_fitting.py
+  python bench/bench_fitting.py --targets 200 --workers 8
+  python bench/bench_fitting.py --cases thin --restarts 64
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from utils import fitting
+from utils.mass_properties import MassProperties
+from utils.transforms import rotationFromEuler
+
+DEFAULT_TARGETS = 64
+
+# Meio lado, em mm, do envelope do caso box3_envelope.
+ENVELOPE_HALF_MM = 80.0
+
+
+def boxProperties(mass, dimensions, rotation, center):
+    a, b, c = dimensions
+    R = np.asarray(rotation)
+    I = R @ np.diag([mass / 12 * (b*b + c*c), mass / 12 * (a*a + c*c), mass / 12 * (a*a + b*b)]) @ R.T
+    return MassProperties(mass, tuple(center), I.tolist())
+
+
+def assemblyTarget(rng, count, rotated=True, spread=30.0):
+    """(massa em g, CoM em mm, tensor em g·mm²) de count caixas aleatórias."""
+    total = MassProperties()
+    for _ in range(count):
+        rotation = rotationFromEuler(rng.uniform(-np.pi, np.pi, 3)) if rotated else np.eye(3)
+        total = total + boxProperties(rng.uniform(100, 1000), rng.uniform(5, 60, 3), rotation,
+                                      rng.uniform(-spread, spread, 3))
+    return total.mass, total.com, np.array(total.tensor)
+
+
+def thinTarget(rng):
+    I1, I2 = rng.uniform(1e5, 1e6, 2)
+    R = np.asarray(rotationFromEuler(rng.uniform(-np.pi, np.pi, 3)))
+    tensor = R @ np.diag([I1, I2, 0.99 * (I1 + I2)]) @ R.T
+    return rng.uniform(100, 1000), tuple(rng.uniform(-30, 30, 3)), tensor
+
+
+def buildCase(name, count, seed=0):
+    """(alvos, primitivos, envelope) do caso."""
+    rng = np.random.default_rng(seed)
+    if name == 'box2':
+        return [assemblyTarget(rng, 2) for _ in range(count)], ('box', 'box'), None
+    if name == 'box_cylinder':
+        return [assemblyTarget(rng, 2) for _ in range(count)], ('box', 'cylinder'), None
+    if name == 'box3_envelope':
+        # Caixas alinhadas ao envelope e afastadas dos limites: o alvo cabe nele.
+        half = ENVELOPE_HALF_MM
+        envelope = ((-half, -half, -half), (half, half, half))
+        return [assemblyTarget(rng, 3, rotated=False) for _ in range(count)], ('box', 'box', 'box'), envelope
+    if name == 'thin':
+        return [thinTarget(rng) for _ in range(count)], ('box', 'box'), None
+    raise ValueError("Caso desconhecido: '{}'".format(name))
+
+
+CASES = ['box2', 'box_cylinder', 'box3_envelope', 'thin']
+
+
+def runCase(targets, primitives, envelope, restarts, workers, seed=0):
+    start = time.perf_counter()
+    results = fitting.fitPrimitivesBatch(targets, primitives, envelope, restarts=restarts, seed=seed,
+                                         workers=workers)
+    seconds = time.perf_counter() - start
+    return {
+        'fitsPerSecond': len(targets) / seconds,
+        'converged': sum(r.converged for r in results) / len(results),
+        'iterations': sum(r.iterations for r in results) / len(results),
+        'seconds': seconds,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=CASES)
+    parser.add_argument('--targets', type=int, default=DEFAULT_TARGETS)
+    parser.add_argument('--restarts', type=int, default=fitting.FIT_RESTARTS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='processos do pool (além da execução com um processo)')
+    parser.add_argument('--min-converged', type=float, default=0.9,
+                        help='fração mínima de alvos convergidos por caso')
+    args = parser.parse_args(argv)
+
+    print('{:<14} {:>8} {:>12} {:>11} {:>10} {:>9}'.format(
+        'caso', 'workers', 'ajustes/s', 'convergidos', 'iterações', 'tempo (s)'))
+    failures = []
+    workerCounts = sorted({1, max(1, args.workers)})
+    for name in args.cases:
+        targets, primitives, envelope = buildCase(name, args.targets)
+        for workers in workerCounts:
+            metrics = runCase(targets, primitives, envelope, args.restarts, workers)
+            print('{:<14} {:>8} {:>12.1f} {:>10.0%} {:>10.1f} {:>9.2f}'.format(
+                name, workers, metrics['fitsPerSecond'], metrics['converged'], metrics['iterations'],
+                metrics['seconds']))
+            if metrics['converged'] < args.min_converged:
+                failures.append('{} (workers={}): {:.0%} convergidos'.format(name, workers, metrics['converged']))
+
+    for failure in failures:
+        print('REGRESSÃO: ' + failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
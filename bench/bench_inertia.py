@@ -0,0 +1,400 @@
+"""
+Benchmark de escalabilidade do pipeline de propriedades de massa, executado fora
+do Fusion com o substituto do adsk em bench/fakeadsk.
+
+Para cada tamanho de design sintético, mede tempo de parede, chamadas à API e
+pico de memória (tracemalloc) dos casos:
+  - inertia_cold:  getGlobalInertia com o cache de snapshots vazio
+  - inertia_warm:  getGlobalInertia repetido sobre o design inalterado
+  - inertia_disk:  getGlobalInertia com a memória vazia e o cache em disco cheio
+  - inertia_mesh:  getGlobalInertia de um corpo de malha com TRIANGLES_PER_SIZE
+                   triângulos por unidade de tamanho (2M no tamanho 100000)
+  - tolerance:     monteCarloInertia com TOLERANCE_SAMPLES amostras sobre os
+                   corpos do design (tolerâncias padrão de utils/tolerance.py)
+  - create_sketch: createBox + rotateBodyAroundCG_xyz (sketch, extrusão e move)
+  - create_brep:   caixas por B-Rep temporário em um único base feature
+  - tables:        handlers de OK das tabelas + solveBox, uma entrada por corpo
+
+Antes das medições, checkCreatePaths confere que os dois caminhos de criação
+(sketch + rotateBodyAroundCG_xyz e B-Rep temporário) produzem a mesma caixa,
+com as propriedades de massa de boxMassProperties.
+
+Os resultados são comparados com bench/baselines.json; o script termina com
+código 1 se algum caso regredir ou se os caminhos de criação divergirem.
+
+Uso:
+  python bench/bench_inertia.py
+  python bench/bench_inertia.py --sizes 10 100 1000 --latency 0.0001
+  python bench/bench_inertia.py --update-baselines
+  python bench/bench_inertia.py --sizes 1000 --profile /tmp/trace.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(BENCH_DIR, 'fakeadsk'), os.path.dirname(BENCH_DIR)]
+
+import adsk, adsk.core, adsk.fusion
+import utils
+
+BASELINES_PATH = os.path.join(BENCH_DIR, 'baselines.json')
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+
+# Corpos por componente e instâncias por componente no design sintético.
+BODIES_PER_COMPONENT = 5
+INSTANCES_PER_COMPONENT = 10
+
+# Triângulos do corpo de malha do caso inertia_mesh por unidade de tamanho.
+TRIANGLES_PER_SIZE = 20
+
+# Amostras do caso tolerance.
+TOLERANCE_SAMPLES = 1000
+
+
+def randomTransform(rng, spread=50.0):
+    angles = [rng.uniform(-math.pi, math.pi) for _ in range(3)]
+    R = utils.rotationFromEuler(angles)
+    t = tuple(rng.uniform(-spread, spread) for _ in range(3))
+    return R, t
+
+
+def randomMatrix(rng):
+    matrix = adsk.core.Matrix3D.create()
+    matrix.setWithArray(utils.transformToArray(randomTransform(rng)))
+    return matrix
+
+
+def randomBox(rng):
+    return tuple(rng.uniform(0.5, 5.0) for _ in range(3))
+
+
+def buildAssembly(size, seed=0):
+    """
+    Monta um design sintético com aproximadamente size corpos: 10% no
+    rootComp e o restante em componentes de BODIES_PER_COMPONENT corpos,
+    cada um instanciado INSTANCES_PER_COMPONENT vezes.
+    Retorna (rootComp, quantidade real de corpos instanciados).
+    """
+    rng = random.Random(seed)
+    design = adsk.fusion.newDesign()
+    root = design.rootComponent
+
+    rootBodies = max(1, size // 10)
+    for _ in range(rootBodies):
+        root.bRepBodies._addBox(randomBox(rng), randomTransform(rng))
+
+    perComponent = BODIES_PER_COMPONENT * INSTANCES_PER_COMPONENT
+    components = (size - rootBodies) // perComponent
+    for _ in range(components):
+        occurrence = root.occurrences.addNewComponent(randomMatrix(rng))
+        component = occurrence.component
+        for _ in range(BODIES_PER_COMPONENT):
+            component.bRepBodies._addBox(randomBox(rng), randomTransform(rng, 5.0))
+        for _ in range(INSTANCES_PER_COMPONENT - 1):
+            root.occurrences.addExistingComponent(component, randomMatrix(rng))
+    return root, rootBodies + components * perComponent
+
+
+def boxMesh(dimensions, divisions):
+    """
+    Superfície fechada de uma caixa centrada na origem, com cada face dividida
+    em divisions x divisions quadrados (dois triângulos cada), nos buffers da
+    TriangleMesh: (coordinates, indices), com as normais para fora.
+    """
+    coordinates = []
+    indices = []
+    steps = [k / divisions - 0.5 for k in range(divisions + 1)]
+    for axis in range(3):
+        u, v = (axis + 1) % 3, (axis + 2) % 3
+        for side in (-0.5, 0.5):
+            base = len(coordinates) // 3
+            for su in steps:
+                for sv in steps:
+                    point = [0.0, 0.0, 0.0]
+                    point[axis], point[u], point[v] = side, su, sv
+                    coordinates.extend(x * d for x, d in zip(point, dimensions))
+            for i in range(divisions):
+                for j in range(divisions):
+                    p0 = base + i * (divisions + 1) + j
+                    p1, p2, p3 = p0 + divisions + 1, p0 + divisions + 2, p0 + 1
+                    # (u, v, axis) é destro: u x v aponta para +axis.
+                    if side > 0:
+                        indices.extend((p0, p1, p2, p0, p2, p3))
+                    else:
+                        indices.extend((p0, p2, p1, p0, p3, p2))
+    return coordinates, indices
+
+
+def measure(function, setup=None):
+    """
+    Executa function medindo tempo e chamadas à API e, em uma segunda execução
+    (precedida de novo por setup), o pico de memória: o tracemalloc distorce
+    o tempo, por isso as duas medidas não são feitas juntas.
+    """
+    if setup:
+        setup()
+    adsk.resetApiCalls()
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+    apiCalls = sum(adsk.apiCalls.values())
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'seconds': round(seconds, 6),
+        'apiCalls': apiCalls,
+        'peakKB': round(peak / 1024, 1),
+    }
+
+
+def caseInertia(size):
+    root, bodies = buildAssembly(size)
+    cold = measure(lambda: utils.getGlobalInertia(root), setup=utils.clearSnapshotCache)
+    warm = measure(lambda: utils.getGlobalInertia(root))
+
+    with tempfile.TemporaryDirectory() as directory:
+        utils.enableSnapshotStore(os.path.join(directory, 'snapshots.sqlite'))
+        try:
+            utils.getGlobalInertia(root)
+            disk = measure(lambda: utils.getGlobalInertia(root), setup=utils.clearSnapshotCache)
+        finally:
+            utils.disableSnapshotStore()
+    return bodies, {'inertia_cold': cold, 'inertia_warm': warm, 'inertia_disk': disk}
+
+
+def caseInertiaMesh(size):
+    divisions = max(1, round(math.sqrt(TRIANGLES_PER_SIZE * size / 12)))
+    root = adsk.fusion.newDesign().rootComponent
+    root.meshBodies._addMesh(*boxMesh(randomBox(random.Random(size)), divisions))
+    return measure(lambda: utils.getGlobalInertia(root), setup=utils.clearSnapshotCache)
+
+
+def caseTolerance(size):
+    root, bodies = buildAssembly(size)
+    model = utils.gatherToleranceModel(root)
+    return measure(lambda: utils.monteCarloInertia(*model, samples=TOLERANCE_SAMPLES, seed=0))
+
+
+def caseCreateSketch(size):
+    state = {}
+
+    def setup():
+        state['rng'] = random.Random(size)
+        state['root'] = adsk.fusion.newDesign().rootComponent
+
+    def run():
+        rng, root = state['rng'], state['root']
+        for _ in range(size):
+            w, h, d = randomBox(rng)
+            box = utils.createBox(root, w, h, d)
+            angles = [rng.uniform(-math.pi, math.pi) for _ in range(3)]
+            utils.rotateBodyAroundCG_xyz(box, *angles, pivot=(0, 0, 0),
+                                         translation=(rng.uniform(-50, 50), 0, 0))
+    return measure(run, setup)
+
+
+def caseCreateBRep(size):
+    state = {}
+
+    def setup():
+        state['rng'] = random.Random(size)
+        state['root'] = adsk.fusion.newDesign().rootComponent
+
+    def run():
+        rng, root = state['rng'], state['root']
+        inserter = utils.BodyInserter(root)
+        boxes = []
+        for _ in range(size):
+            w, h, d = randomBox(rng)
+            R, t = randomTransform(rng)
+            boxes.append((w, h, d, R, t))
+            inserter.add(utils.createTemporaryBox(w, h, d, R, t))
+        for body, box in zip(inserter.finish(), boxes):
+            utils.primeBoxSnapshot(body, *box)
+    return measure(run, setup)
+
+
+def caseTables(size):
+    rng = random.Random(size)
+    received = []
+    comHandler = utils.CoMTableOKHandler(received.append)
+    inertiaHandler = utils.InertiaTensorTableOKHandler(received.append)
+
+    def run():
+        for _ in range(size):
+            received.clear()
+            m = rng.uniform(0.1, 5.0)
+            w, h, d = (10 * x for x in randomBox(rng))
+            # Tensor de uma caixa alinhada (g·mm²), para que o solver sempre tenha solução.
+            Ixx, Iyy, Izz = (1000 * m / 12 * (h*h + d*d), 1000 * m / 12 * (w*w + d*d), 1000 * m / 12 * (w*w + h*h))
+            inputs = adsk.core.CommandInputs()
+            for col, value in enumerate(['1.0', '2.0', '3.0', str(m)]):
+                inputs.addStringValueInput('com_row1_col{}'.format(col), '', value)
+            for row, values in enumerate([[Ixx, 0, 0], [0, Iyy, 0], [0, 0, Izz]], start=1):
+                for col, value in enumerate(values, start=1):
+                    inputs.addStringValueInput('inertia_row{}_col{}'.format(row, col), '', str(value))
+            args = adsk.core.CommandEventArgs(command=adsk.core.EventArgs(commandInputs=inputs))
+            comHandler.notify(args)
+            inertiaHandler.notify(args)
+            com, tensor = received
+            utils.solveBox(utils.parseNumber(com[3]) * 1000, [utils.parseNumber(v) for v in com[:3]],
+                           [[utils.parseNumber(v) for v in row] for row in tensor])
+    return measure(run)
+
+
+def checkCreatePaths(count=20, seed=0, tolerance=1e-9):
+    """
+    Cria as mesmas caixas rotacionadas e transladadas pelos dois caminhos de
+    criação (createBox + rotateBodyAroundCG_xyz e createOrientedBox) e compara
+    a massa, o CoM e o tensor em relação à origem de cada corpo, lidos do
+    kernel (e, no caminho B-Rep, também do snapshot registrado na criação),
+    com boxMassProperties.
+    Retorna a lista de divergências.
+    """
+    rng = random.Random(seed)
+    root = adsk.fusion.newDesign().rootComponent
+    divergences = []
+
+    def compare(label, snapshot, expected):
+        mass, com, I_origin = snapshot
+        scale = max(abs(v) for row in expected[2] for v in row)
+        errors = [abs(mass - expected[0]) / expected[0],
+                  max(abs(a - b) for a, b in zip(com, expected[1])) / max(1.0, max(map(abs, expected[1]))),
+                  max(abs(a - b) for ra, rb in zip(I_origin, expected[2]) for a, b in zip(ra, rb)) / scale]
+        if max(errors) > tolerance:
+            divergences.append('{}: erro relativo de massa/CoM/tensor {:.2e}/{:.2e}/{:.2e}'.format(label, *errors))
+
+    for index in range(count):
+        w, h, d = randomBox(rng)
+        angles = [rng.uniform(-math.pi, math.pi) for _ in range(3)]
+        translation_mm = tuple(rng.uniform(-500, 500) for _ in range(3))
+        R = utils.rotationFromEuler(angles, 'xyz')
+        t = tuple(x / 10 for x in translation_mm)
+
+        sketchBox = utils.createBox(root, w, h, d)
+        utils.rotateBodyAroundCG_xyz(sketchBox, *angles, pivot=(0, 0, 0), translation=translation_mm, unit='mm')
+        brepBox = utils.createOrientedBox(root, w, h, d, R, t)
+        density = utils.getMaterialDensity(brepBox.material)
+        expected = utils.boxMassProperties(w, h, d, density, (R, t))
+
+        compare('caixa {} (snapshot B-Rep)'.format(index), utils.getBodySnapshot(brepBox), expected)
+        utils.clearSnapshotCache()
+        compare('caixa {} (sketch)'.format(index), utils.getBodySnapshot(sketchBox), expected)
+        compare('caixa {} (B-Rep)'.format(index), utils.getBodySnapshot(brepBox), expected)
+    utils.clearSnapshotCache()
+    return divergences
+
+
+def runBenchmarks(sizes, maxCreate):
+    results = {}
+    for size in sizes:
+        bodies, inertia = caseInertia(size)
+        for case, metrics in inertia.items():
+            results.setdefault(case, {})[str(size)] = dict(metrics, bodies=bodies)
+        results.setdefault('inertia_mesh', {})[str(size)] = caseInertiaMesh(size)
+        results.setdefault('tolerance', {})[str(size)] = caseTolerance(size)
+        if size <= maxCreate:
+            results.setdefault('create_sketch', {})[str(size)] = caseCreateSketch(size)
+            results.setdefault('create_brep', {})[str(size)] = caseCreateBRep(size)
+            results.setdefault('tables', {})[str(size)] = caseTables(size)
+    return results
+
+
+def compareWithBaselines(results, baselines, timeTolerance, memoryTolerance):
+    """
+    Retorna a lista de regressões: chamadas à API acima da baseline (a contagem
+    é determinística) ou tempo/memória acima da baseline além da tolerância.
+    """
+    regressions = []
+    for case, bySize in results.items():
+        for size, metrics in bySize.items():
+            baseline = baselines.get(case, {}).get(size)
+            if not baseline:
+                continue
+            if metrics['apiCalls'] > baseline['apiCalls']:
+                regressions.append('{} [{}]: chamadas à API {} > {}'.format(
+                    case, size, metrics['apiCalls'], baseline['apiCalls']))
+            if metrics['seconds'] > baseline['seconds'] * (1 + timeTolerance) and metrics['seconds'] > 0.01:
+                regressions.append('{} [{}]: tempo {:.4f} s > {:.4f} s'.format(
+                    case, size, metrics['seconds'], baseline['seconds']))
+            if metrics['peakKB'] > baseline['peakKB'] * (1 + memoryTolerance) and metrics['peakKB'] > 256:
+                regressions.append('{} [{}]: memória {:.0f} KB > {:.0f} KB'.format(
+                    case, size, metrics['peakKB'], baseline['peakKB']))
+    return regressions
+
+
+def formatResults(results):
+    lines = ['{:<14} {:>8} {:>12} {:>12} {:>12}'.format('caso', 'tamanho', 'tempo (s)', 'chamadas', 'pico (KB)')]
+    for case, bySize in results.items():
+        for size, metrics in sorted(bySize.items(), key=lambda item: int(item[0])):
+            lines.append('{:<14} {:>8} {:>12.4f} {:>12} {:>12.1f}'.format(
+                case, size, metrics['seconds'], metrics['apiCalls'], metrics['peakKB']))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--max-create', type=int, default=10000,
+                        help='maior tamanho para os casos de criação de corpos e das tabelas')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='latência artificial (s) de cada consulta às propriedades físicas')
+    parser.add_argument('--time-tolerance', type=float, default=1.0,
+                        help='aumento relativo de tempo tolerado sobre a baseline')
+    parser.add_argument('--memory-tolerance', type=float, default=0.5,
+                        help='aumento relativo de memória tolerado sobre a baseline')
+    parser.add_argument('--update-baselines', action='store_true')
+    parser.add_argument('--profile', metavar='TRACE',
+                        help='liga a instrumentação (utils/profiling.py) e grava o trace do Chrome em TRACE; '
+                             'os tempos medidos incluem o custo dos spans')
+    args = parser.parse_args(argv)
+
+    divergences = checkCreatePaths()
+    for divergence in divergences:
+        print('DIVERGÊNCIA: ' + divergence)
+    if divergences:
+        return 1
+
+    adsk.fusion.setPhysicalPropertiesLatency(args.latency)
+    if args.profile:
+        utils.enableProfiling()
+    results = runBenchmarks(args.sizes, args.max_create)
+    print(formatResults(results))
+    if args.profile:
+        utils.exportChromeTrace(args.profile)
+        print(utils.formatProfileSummary())
+        # Com spans ligados os tempos não são comparáveis com as baselines.
+        return 0
+
+    if args.update_baselines:
+        with open(BASELINES_PATH, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print('Baselines atualizadas em {}'.format(BASELINES_PATH))
+        return 0
+
+    if not os.path.exists(BASELINES_PATH):
+        print('Sem baselines; rode com --update-baselines para criá-las.')
+        return 0
+    with open(BASELINES_PATH, encoding='utf-8') as f:
+        baselines = json.load(f)
+    regressions = compareWithBaselines(results, baselines, args.time_tolerance, args.memory_tolerance)
+    for regression in regressions:
+        print('REGRESSÃO: ' + regression)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
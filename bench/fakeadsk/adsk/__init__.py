@@ -0,0 +1,28 @@
+"""
+Substituto local do pacote adsk da API do Fusion, para executar e medir o
+pipeline de propriedades de massa fora do Fusion.
+
+Modela apenas o necessário: corpos em forma de caixa (com propriedades físicas
+calculadas em forma fechada), componentes, ocorrências, sketches, extrusões,
+move features, base features, materiais, eventos e a interface do usuário.
+
+Cada chamada "cara" da API é contada em apiCalls, e a consulta às propriedades
+físicas pode ter uma latência artificial (ver fusion.setPhysicalPropertiesLatency).
+"""
+
+import collections
+
+# Contagem de chamadas da API, por nome.
+apiCalls = collections.Counter()
+
+def resetApiCalls():
+    apiCalls.clear()
+
+def autoTerminate(value):
+    pass
+
+def doEvents():
+    # Entrega os eventos customizados pendentes, disparados por qualquer thread.
+    core.Application.get()._deliverCustomEvents()
+
+from . import core, fusion, cam
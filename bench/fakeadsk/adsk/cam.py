@@ -0,0 +1 @@
+"""Módulo vazio: o Inertia2Fusion só importa adsk.cam."""
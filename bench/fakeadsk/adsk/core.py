@@ -0,0 +1,546 @@
+"""Substituto de adsk.core: geometria, coleções, eventos e interface do usuário."""
+
+import collections
+import math
+
+import adsk
+
+
+def _count(name):
+    adsk.apiCalls[name] += 1
+
+
+# --- Geometria --------------------------------------------------------------
+
+class Point3D:
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x, self.y, self.z = x, y, z
+
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        return Point3D(x, y, z)
+
+    def asArray(self):
+        return [self.x, self.y, self.z]
+
+
+class Vector3D(Point3D):
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        return Vector3D(x, y, z)
+
+    def crossProduct(self, other):
+        return Vector3D(self.y * other.z - self.z * other.y,
+                        self.z * other.x - self.x * other.z,
+                        self.x * other.y - self.y * other.x)
+
+    @property
+    def length(self):
+        return math.sqrt(self.x**2 + self.y**2 + self.z**2)
+
+    def normalize(self):
+        n = self.length
+        self.x, self.y, self.z = self.x / n, self.y / n, self.z / n
+        return True
+
+
+class Matrix3D:
+    """Matriz 4x4 homogênea, linha a linha, com a translação na última coluna."""
+
+    def __init__(self):
+        self._m = [[1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+
+    @staticmethod
+    def create():
+        return Matrix3D()
+
+    def asArray(self):
+        return [v for row in self._m for v in row]
+
+    def setWithArray(self, a):
+        self._m = [list(a[4 * i:4 * i + 4]) for i in range(4)]
+        return True
+
+    def copy(self):
+        m = Matrix3D()
+        m._m = [row[:] for row in self._m]
+        return m
+
+    def transformBy(self, matrix):
+        # Como no Fusion: this = matrix · this (aplica this e depois matrix).
+        a, b = matrix._m, self._m
+        self._m = [[sum(a[i][k] * b[k][j] for k in range(4)) for j in range(4)] for i in range(4)]
+        return True
+
+    def setToRotation(self, angle, axis, origin):
+        n = math.sqrt(axis.x**2 + axis.y**2 + axis.z**2)
+        x, y, z = axis.x / n, axis.y / n, axis.z / n
+        c, s, C = math.cos(angle), math.sin(angle), 1 - math.cos(angle)
+        R = [[c + x*x*C, x*y*C - z*s, x*z*C + y*s],
+             [y*x*C + z*s, c + y*y*C, y*z*C - x*s],
+             [z*x*C - y*s, z*y*C + x*s, c + z*z*C]]
+        o = (origin.x, origin.y, origin.z)
+        t = [o[i] - sum(R[i][k] * o[k] for k in range(3)) for i in range(3)]
+        self._m = [R[0] + [t[0]], R[1] + [t[1]], R[2] + [t[2]], [0.0, 0.0, 0.0, 1.0]]
+        return True
+
+    @property
+    def translation(self):
+        return Vector3D(self._m[0][3], self._m[1][3], self._m[2][3])
+
+    @translation.setter
+    def translation(self, v):
+        self._m[0][3], self._m[1][3], self._m[2][3] = v.x, v.y, v.z
+
+    def rotationAndTranslation(self):
+        """Par (R, t) em tuplas, usado internamente pelo substituto."""
+        m = self._m
+        return (tuple(tuple(m[i][:3]) for i in range(3)), (m[0][3], m[1][3], m[2][3]))
+
+
+class OrientedBoundingBox3D:
+    def __init__(self, centerPoint, lengthDirection, widthDirection, length, width, height):
+        self.centerPoint = centerPoint
+        self.lengthDirection = lengthDirection
+        self.widthDirection = widthDirection
+        self.heightDirection = lengthDirection.crossProduct(widthDirection)
+        self.length, self.width, self.height = length, width, height
+
+    @staticmethod
+    def create(centerPoint, lengthDirection, widthDirection, length, width, height):
+        return OrientedBoundingBox3D(centerPoint, lengthDirection, widthDirection, length, width, height)
+
+
+class ValueInput:
+    def __init__(self, value):
+        self.realValue = value
+
+    @staticmethod
+    def createByReal(value):
+        return ValueInput(value)
+
+    @staticmethod
+    def createByString(text):
+        return ValueInput(text)
+
+
+# --- Coleções ---------------------------------------------------------------
+
+class _Collection:
+    def __init__(self, items=None):
+        self._items = list(items or [])
+
+    @property
+    def count(self):
+        return len(self._items)
+
+    def item(self, index):
+        return self._items[index] if 0 <= index < len(self._items) else None
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+
+class ObjectCollection(_Collection):
+    @staticmethod
+    def create():
+        return ObjectCollection()
+
+    def add(self, item):
+        self._items.append(item)
+        return True
+
+    def clear(self):
+        self._items.clear()
+        return True
+
+
+# --- Eventos ----------------------------------------------------------------
+
+class Event:
+    def __init__(self, name=''):
+        self.name = name
+        self.handlers = []
+
+    def add(self, handler):
+        self.handlers.append(handler)
+        return True
+
+    def remove(self, handler):
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+            return True
+        return False
+
+    def fire(self, args):
+        """Dispara o evento (usado pelos benchmarks para simular o Fusion)."""
+        for handler in list(self.handlers):
+            handler.notify(args)
+
+
+class EventHandler:
+    def __init__(self):
+        pass
+
+    def notify(self, args):
+        pass
+
+class CommandCreatedEventHandler(EventHandler): pass
+class CommandEventHandler(EventHandler): pass
+class InputChangedEventHandler(EventHandler): pass
+class ApplicationCommandEventHandler(EventHandler): pass
+class CustomEventHandler(EventHandler): pass
+
+
+class EventArgs:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class CommandEventArgs(EventArgs):
+    @staticmethod
+    def cast(args):
+        return args
+
+class CommandCreatedEventArgs(CommandEventArgs): pass
+class InputChangedEventArgs(CommandEventArgs): pass
+class ApplicationCommandEventArgs(CommandEventArgs): pass
+class CustomEventArgs(CommandEventArgs): pass
+
+
+# --- Comandos e entradas ----------------------------------------------------
+
+class StringValueCommandInput:
+    def __init__(self, id, name, value):
+        self.id, self.name, self.value = id, name, value
+        self.isReadOnly = False
+        self.isVisible = True
+
+
+class TextBoxCommandInput(StringValueCommandInput):
+    @property
+    def text(self):
+        return self.value
+
+    @text.setter
+    def text(self, value):
+        self.value = value
+
+    formattedText = text
+
+
+class TableCommandInput:
+    def __init__(self, id, name, numberOfColumns, columnRatio):
+        self.id, self.name = id, name
+        self.numberOfColumns = numberOfColumns
+        self.columnRatio = columnRatio
+        self.cells = {}
+
+    def addCommandInput(self, input, row, column, rowSpan=0, columnSpan=0):
+        self.cells[(row, column)] = input
+        return True
+
+    def getInputAtPosition(self, row, column):
+        return self.cells.get((row, column))
+
+
+class CommandInputs:
+    def __init__(self, command=None):
+        self.command = command
+        self._inputs = {}
+
+    def _add(self, input):
+        self._inputs[input.id] = input
+        return input
+
+    def addTableCommandInput(self, id, name, numberOfColumns, columnRatio):
+        return self._add(TableCommandInput(id, name, numberOfColumns, columnRatio))
+
+    def addStringValueInput(self, id, name, initialValue=''):
+        return self._add(StringValueCommandInput(id, name, initialValue))
+
+    def addTextBoxCommandInput(self, id, name, formattedText, numRows, isReadOnly):
+        input = self._add(TextBoxCommandInput(id, name, formattedText))
+        input.isReadOnly = isReadOnly
+        return input
+
+    def itemById(self, id):
+        return self._inputs.get(id)
+
+    @property
+    def count(self):
+        return len(self._inputs)
+
+    def __iter__(self):
+        return iter(list(self._inputs.values()))
+
+
+class Command:
+    def __init__(self, definition):
+        self.parentCommandDefinition = definition
+        self.commandInputs = CommandInputs(self)
+        self.execute = Event('execute')
+        self.executePreview = Event('executePreview')
+        self.inputChanged = Event('inputChanged')
+        self.destroy = Event('destroy')
+        self.isOKButtonVisible = True
+        self.isValid = True
+
+    def doExecutePreview(self):
+        _count('Command.doExecutePreview')
+        args = CommandEventArgs(command=self, isValidResult=False)
+        self.executePreview.fire(args)
+        return True
+
+
+class CommandDefinition:
+    def __init__(self, definitions, id, name, tooltip, resourceFolder=''):
+        self._definitions = definitions
+        self.id, self.name, self.tooltip = id, name, tooltip
+        self.resourceFolder = resourceFolder
+        self.commandCreated = Event('commandCreated')
+        self.controlDefinition = None
+
+    def execute(self, input=None):
+        """
+        Cria o comando e dispara commandCreated. No Fusion o diálogo ficaria
+        aberto; aqui o comando é devolvido para que o chamador simule o OK.
+        """
+        _count('CommandDefinition.execute')
+        command = Command(self)
+        self.commandCreated.fire(CommandCreatedEventArgs(command=command))
+        self._definitions.lastCommand = command
+        return True
+
+    def deleteMe(self):
+        self._definitions._items.remove(self)
+        return True
+
+
+class CommandDefinitions(_Collection):
+    lastCommand = None
+
+    def itemById(self, id):
+        for definition in self._items:
+            if definition.id == id:
+                return definition
+        return None
+
+    def addButtonDefinition(self, id, name, tooltip, resourceFolder=''):
+        definition = CommandDefinition(self, id, name, tooltip, resourceFolder)
+        self._items.append(definition)
+        return definition
+
+
+class CommandControl:
+    def __init__(self, controls, definition):
+        self._controls = controls
+        self.commandDefinition = definition
+        self.id = definition.id
+        self.isPromoted = False
+
+    def deleteMe(self):
+        self._controls._items.remove(self)
+        return True
+
+
+class CommandControls(_Collection):
+    def addCommand(self, definition, positionID='', isBefore=True):
+        control = CommandControl(self, definition)
+        self._items.append(control)
+        return control
+
+    def itemById(self, id):
+        for control in self._items:
+            if control.id == id:
+                return control
+        return None
+
+
+class ToolbarPanel:
+    def __init__(self, id):
+        self.id = id
+        self.controls = CommandControls()
+
+
+class ToolbarPanels(_Collection):
+    def itemById(self, id):
+        for panel in self._items:
+            if panel.id == id:
+                return panel
+        panel = ToolbarPanel(id)
+        self._items.append(panel)
+        return panel
+
+
+# --- Interface do usuário ---------------------------------------------------
+
+class DialogResults:
+    DialogOK = 0
+    DialogCancel = 1
+    DialogError = 2
+    DialogYes = 3
+    DialogNo = 4
+
+
+class MessageBoxButtonTypes:
+    OKButtonType = 0
+    OKCancelButtonType = 1
+    YesNoButtonType = 3
+
+
+class FileDialog:
+    def __init__(self, ui):
+        self._ui = ui
+        self.title = ''
+        self.filter = ''
+        self.initialFilename = ''
+        self.filename = ''
+
+    def showOpen(self):
+        return self._dialogResult()
+
+    def showSave(self):
+        return self._dialogResult()
+
+    def _dialogResult(self):
+        # O benchmark define ui.nextFilename para simular a escolha do usuário.
+        if self._ui.nextFilename:
+            self.filename = self._ui.nextFilename
+            return DialogResults.DialogOK
+        return DialogResults.DialogCancel
+
+
+class ProgressDialog:
+    def __init__(self):
+        self.isShowing = False
+        self.isCancelButtonShown = False
+        self.wasCancelled = False
+        self.progressValue = 0
+        self.maximumValue = 0
+        self.message = ''
+
+    def show(self, title, message, minimumValue, maximumValue, delay=0):
+        self.isShowing = True
+        self.message = message
+        self.maximumValue = maximumValue
+        return True
+
+    def hide(self):
+        self.isShowing = False
+        return True
+
+
+class ProgressBar:
+    def __init__(self):
+        self.isVisible = False
+        self.progressValue = 0
+
+    def show(self, message, minimumValue, maximumValue, isInfinite=False):
+        self.isVisible = True
+        self.message = message
+        self.maximumValue = maximumValue
+        return True
+
+    def showBusy(self, message, isInfinite=True):
+        self.isVisible = True
+        self.message = message
+        return True
+
+    def hide(self):
+        self.isVisible = False
+        return True
+
+
+class TextCommandPalette:
+    id = 'TextCommands'
+
+    def __init__(self):
+        self.lines = []
+        self.isVisible = False
+
+    def writeText(self, text):
+        self.lines.append(text)
+        return True
+
+
+class Palettes(_Collection):
+    def __init__(self):
+        super().__init__([TextCommandPalette()])
+
+    def itemById(self, id):
+        for palette in self._items:
+            if palette.id == id:
+                return palette
+        return None
+
+
+class UserInterface:
+    def __init__(self):
+        self.messages = []
+        self.nextFilename = None
+        self.commandDefinitions = CommandDefinitions()
+        self.allToolbarPanels = ToolbarPanels()
+        self.commandTerminated = Event('commandTerminated')
+        self.palettes = Palettes()
+        self.progressBar = ProgressBar()
+
+    def messageBox(self, text, title='', buttons=0, icon=0):
+        self.messages.append(text)
+        return DialogResults.DialogOK
+
+    def createFileDialog(self):
+        return FileDialog(self)
+
+    def createProgressDialog(self):
+        return ProgressDialog()
+
+
+class Application:
+    _instance = None
+
+    def __init__(self):
+        self.userInterface = UserInterface()
+        self.activeProduct = None
+        self.version = 'fakeadsk'
+        self.materialLibraries = None
+        self._customEvents = {}
+        self._pendingCustomEvents = collections.deque()
+
+    @staticmethod
+    def get():
+        if Application._instance is None:
+            Application._instance = Application()
+            # Importado aqui para evitar o ciclo core <-> fusion.
+            from . import fusion
+            fusion._initializeApplication(Application._instance)
+        return Application._instance
+
+    @property
+    def activeDocument(self):
+        return self.activeProduct.parentDocument if self.activeProduct else None
+
+    def registerCustomEvent(self, eventId):
+        event = Event(eventId)
+        self._customEvents[eventId] = event
+        return event
+
+    def unregisterCustomEvent(self, eventId):
+        return self._customEvents.pop(eventId, None) is not None
+
+    def fireCustomEvent(self, eventId, additionalInfo=''):
+        # Como no Fusion, o evento só é entregue pelo laço de eventos da thread
+        # principal (aqui, em adsk.doEvents), mesmo quando disparado de outra thread.
+        if eventId not in self._customEvents:
+            return False
+        self._pendingCustomEvents.append((eventId, additionalInfo))
+        return True
+
+    def _deliverCustomEvents(self):
+        while self._pendingCustomEvents:
+            eventId, additionalInfo = self._pendingCustomEvents.popleft()
+            event = self._customEvents.get(eventId)
+            if event is not None:
+                event.fire(CustomEventArgs(firingEvent=event, additionalInfo=additionalInfo))
@@ -0,0 +1,676 @@
+"""
+Substituto de adsk.fusion: design, componentes, ocorrências, corpos em forma de
+caixa ou cilindro, corpos de malha, recursos (sketch, extrusão, move e base feature),
+materiais e o TemporaryBRepManager.
+"""
+
+import itertools
+import math
+import time
+
+import adsk
+from . import core
+from .core import _count, _Collection, Matrix3D, Point3D
+
+_tokens = itertools.count(1)
+
+def _newToken(prefix):
+    return '{}:{}'.format(prefix, next(_tokens))
+
+
+# --- Latência artificial ----------------------------------------------------
+
+_physicalPropertiesLatency = 0.0
+
+def setPhysicalPropertiesLatency(seconds):
+    """Define a latência artificial, em segundos, de cada consulta às propriedades físicas."""
+    global _physicalPropertiesLatency
+    _physicalPropertiesLatency = seconds
+
+def _wait(seconds):
+    # Espera ativa: time.sleep não tem resolução para latências de microssegundos.
+    if seconds > 0:
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            pass
+
+
+# --- Enumerações ------------------------------------------------------------
+
+class CalculationAccuracy:
+    LowCalculationAccuracy = 0
+    MediumCalculationAccuracy = 1
+    HighCalculationAccuracy = 2
+    VeryHighCalculationAccuracy = 3
+
+# Multiplicador de custo de cada nível de precisão.
+_ACCURACY_COST = {0: 1.0, 1: 2.0, 2: 4.0, 3: 8.0}
+
+class DesignTypes:
+    DirectDesignType = 0
+    ParametricDesignType = 1
+
+class FeatureOperations:
+    JoinFeatureOperation = 0
+    CutFeatureOperation = 1
+    IntersectFeatureOperation = 2
+    NewBodyFeatureOperation = 3
+    NewComponentFeatureOperation = 4
+
+
+# --- Materiais --------------------------------------------------------------
+
+class MaterialProperty:
+    def __init__(self, id, name, value):
+        self.id, self.name, self.value = id, name, value
+
+class MaterialProperties(_Collection):
+    def itemById(self, id):
+        _count('MaterialProperties.itemById')
+        for prop in self._items:
+            if prop.id == id:
+                return prop
+        return None
+
+class Material:
+    def __init__(self, id, name, density):
+        self.id, self.name = id, name
+        # Densidade em kg/cm³, como no Fusion.
+        self.materialProperties = MaterialProperties(
+            [MaterialProperty('structural_Density', 'Density', density)])
+
+class Materials(_Collection):
+    def item(self, index):
+        _count('Materials.item')
+        return super().item(index)
+
+    def itemByName(self, name):
+        _count('Materials.itemByName')
+        for material in self._items:
+            if material.name == name:
+                return material
+        return None
+
+    def itemById(self, id):
+        for material in self._items:
+            if material.id == id:
+                return material
+        return None
+
+class MaterialLibrary:
+    def __init__(self, id, name, materials):
+        self.id, self.name = id, name
+        self.materials = Materials(materials)
+        self.isNative = True
+
+class MaterialLibraries(_Collection):
+    def itemByName(self, name):
+        for library in self._items:
+            if library.name == name:
+                return library
+        return None
+
+    def itemById(self, id):
+        for library in self._items:
+            if library.id == id:
+                return library
+        return None
+
+# Densidades aproximadas em kg/cm³.
+_DEFAULT_MATERIALS = [
+    ('PrismMaterial-001', 'Aço', 0.00785),
+    ('PrismMaterial-002', 'Alumínio', 0.00270),
+    ('PrismMaterial-003', 'ABS Plástico', 0.00106),
+    ('PrismMaterial-004', 'Latão', 0.00847),
+    ('PrismMaterial-005', 'Titânio', 0.00451),
+    ('PrismMaterial-006', 'Cobre', 0.00896),
+    ('PrismMaterial-007', 'Nylon', 0.00114),
+    ('PrismMaterial-008', 'Madeira', 0.00060),
+]
+
+def _defaultMaterialLibraries():
+    materials = [Material(*entry) for entry in _DEFAULT_MATERIALS]
+    return MaterialLibraries([
+        MaterialLibrary('lib-favorites', 'Favorites', []),
+        MaterialLibrary('lib-appearance', 'Fusion Appearance Library', []),
+        MaterialLibrary('lib-custom', 'Custom Library', []),
+        MaterialLibrary('lib-material', 'Fusion Material Library', materials),
+    ])
+
+DEFAULT_MATERIAL = None
+
+
+# --- Corpos -----------------------------------------------------------------
+
+class PhysicalProperties:
+    """Propriedades físicas de uma caixa (ou cilindro), calculadas em forma fechada."""
+
+    def __init__(self, body):
+        w, h, d = body._dimensions
+        R, t = body._transform
+        density = body.material.materialProperties.itemById('structural_Density').value
+        if body._shape == 'cylinder':
+            # Diâmetro w (= h) e comprimento d, com o eixo em Z.
+            r = w / 2
+            volume = math.pi * r * r * d
+            m = density * volume
+            I_body = (m / 12 * (3*r*r + d*d), m / 12 * (3*r*r + d*d), m / 2 * r*r)
+        else:
+            volume = w * h * d
+            m = density * volume
+            I_body = (m / 12 * (h*h + d*d), m / 12 * (w*w + d*d), m / 12 * (w*w + h*h))
+        # I_cm = R·diag·R^T; I_origin = I_cm + m·(|t|²·I - t·t^T)
+        norm_t = t[0]**2 + t[1]**2 + t[2]**2
+        I = [[sum(R[i][k] * I_body[k] * R[j][k] for k in range(3))
+              + m * ((norm_t if i == j else 0.0) - t[i] * t[j]) for j in range(3)] for i in range(3)]
+        self.mass = m
+        self.volume = volume
+        self.density = density
+        self.area = math.pi * w * (d + w / 2) if body._shape == 'cylinder' else 2 * (w*h + w*d + h*d)
+        self.centerOfMass = Point3D(*t)
+        self._I = I
+
+    def getXYZMomentsOfInertia(self):
+        I = self._I
+        return True, I[0][0], I[1][1], I[2][2], I[0][1], I[1][2], I[0][2]
+
+
+class BRepBody:
+    """
+    Caixa sólida de dimensões (w, h, d) em cm, orientada e posicionada por
+    (R, t); com shape='cylinder', cilindro de diâmetro w e comprimento d.
+    """
+
+    def __init__(self, dimensions, transform=None, material=None, component=None, shape='box'):
+        self._dimensions = tuple(dimensions)
+        self._shape = shape
+        self._transform = transform or (((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0)), (0.0, 0.0, 0.0))
+        self._material = material
+        self._revision = 0
+        self.entityToken = _newToken('body')
+        self.name = 'Body'
+        self.parentComponent = component
+        self.isTemporary = component is None
+        self.isLightBulbOn = True
+        self.isVisible = True
+
+    @property
+    def revisionId(self):
+        return '{}-{}'.format(self.entityToken, self._revision)
+
+    @property
+    def material(self):
+        if self._material is not None:
+            return self._material
+        if self.parentComponent is not None and self.parentComponent.material is not None:
+            return self.parentComponent.material
+        return DEFAULT_MATERIAL
+
+    @material.setter
+    def material(self, value):
+        _count('BRepBody.material.set')
+        self._material = value
+        self._revision += 1
+
+    @property
+    def physicalProperties(self):
+        _count('BRepBody.physicalProperties')
+        _wait(_physicalPropertiesLatency)
+        return PhysicalProperties(self)
+
+    def getPhysicalProperties(self, accuracy=CalculationAccuracy.LowCalculationAccuracy):
+        _count('BRepBody.getPhysicalProperties')
+        _wait(_physicalPropertiesLatency * _ACCURACY_COST[accuracy])
+        return PhysicalProperties(self)
+
+    def _applyTransform(self, matrix):
+        Rm, tm = matrix.rotationAndTranslation()
+        R, t = self._transform
+        newR = tuple(tuple(sum(Rm[i][k] * R[k][j] for k in range(3)) for j in range(3)) for i in range(3))
+        newT = tuple(sum(Rm[i][k] * t[k] for k in range(3)) + tm[i] for i in range(3))
+        self._transform = (newR, newT)
+        self._revision += 1
+
+    def deleteMe(self):
+        self.parentComponent.bRepBodies._items.remove(self)
+        return True
+
+
+class BRepBodies(_Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def add(self, body, targetBaseFeature=None):
+        _count('BRepBodies.add')
+        if targetBaseFeature is None and self._component.parentDesign.designType == DesignTypes.ParametricDesignType:
+            raise RuntimeError('Em designs paramétricos, é preciso informar o base feature.')
+        copy = BRepBody(body._dimensions, body._transform, body._material, self._component, body._shape)
+        self._items.append(copy)
+        if targetBaseFeature is not None:
+            targetBaseFeature._bodies.append(copy)
+        return copy
+
+    def _addBox(self, dimensions, transform=None, material=None):
+        # Atalho dos benchmarks para montar designs sintéticos sem passar por recursos.
+        body = BRepBody(dimensions, transform, material, self._component)
+        self._items.append(body)
+        return body
+
+
+# --- Corpos de malha ---------------------------------------------------------
+
+class TriangleMesh:
+    """Malha triangular: coordenadas dos nós (cm) e três índices de nó por triângulo, em listas planas."""
+
+    def __init__(self, coordinates, indices):
+        self._coordinates = coordinates
+        self._indices = indices
+
+    @property
+    def nodeCoordinatesAsDouble(self):
+        _count('TriangleMesh.nodeCoordinatesAsDouble')
+        return self._coordinates
+
+    @property
+    def nodeIndices(self):
+        _count('TriangleMesh.nodeIndices')
+        return self._indices
+
+    @property
+    def nodeCount(self):
+        return len(self._coordinates) // 3
+
+    @property
+    def triangleCount(self):
+        return len(self._indices) // 3
+
+
+class MeshBody:
+    """Corpo de malha (por exemplo, um STL importado), sem material próprio."""
+
+    def __init__(self, coordinates, indices, component):
+        self._mesh = TriangleMesh(coordinates, indices)
+        self._revision = 0
+        self.entityToken = _newToken('mesh')
+        self.name = 'Mesh'
+        self.parentComponent = component
+        self.isLightBulbOn = True
+        self.isVisible = True
+
+    @property
+    def revisionId(self):
+        return '{}-{}'.format(self.entityToken, self._revision)
+
+    @property
+    def displayMesh(self):
+        _count('MeshBody.displayMesh')
+        return self._mesh
+
+    def deleteMe(self):
+        self.parentComponent.meshBodies._items.remove(self)
+        return True
+
+
+class MeshBodies(_Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def _addMesh(self, coordinates, indices):
+        body = MeshBody(coordinates, indices, self._component)
+        self._items.append(body)
+        return body
+
+
+class TemporaryBRepManager:
+    _instance = None
+
+    @staticmethod
+    def get():
+        if TemporaryBRepManager._instance is None:
+            TemporaryBRepManager._instance = TemporaryBRepManager()
+        return TemporaryBRepManager._instance
+
+    def createBox(self, box):
+        _count('TemporaryBRepManager.createBox')
+        axes = (box.lengthDirection, box.widthDirection, box.heightDirection)
+        norms = [a.length for a in axes]
+        R = tuple(tuple(getattr(axes[j], c) / norms[j] for j in range(3)) for c in 'xyz')
+        center = box.centerPoint
+        return BRepBody((box.length, box.width, box.height), (R, (center.x, center.y, center.z)))
+
+    def createCylinderOrCone(self, pointOne, pointOneRadius, pointTwo, pointTwoRadius):
+        _count('TemporaryBRepManager.createCylinderOrCone')
+        if pointOneRadius != pointTwoRadius:
+            raise NotImplementedError('O substituto só cria cilindros.')
+        axis = [pointTwo.x - pointOne.x, pointTwo.y - pointOne.y, pointTwo.z - pointOne.z]
+        length = math.sqrt(sum(a * a for a in axis))
+        z = [a / length for a in axis]
+        # Qualquer X perpendicular ao eixo: o cilindro é simétrico em torno dele.
+        helper = (1.0, 0.0, 0.0) if abs(z[0]) < 0.9 else (0.0, 1.0, 0.0)
+        x = [helper[1] * z[2] - helper[2] * z[1], helper[2] * z[0] - helper[0] * z[2], helper[0] * z[1] - helper[1] * z[0]]
+        norm = math.sqrt(sum(a * a for a in x))
+        x = [a / norm for a in x]
+        y = [z[1] * x[2] - z[2] * x[1], z[2] * x[0] - z[0] * x[2], z[0] * x[1] - z[1] * x[0]]
+        R = tuple((x[i], y[i], z[i]) for i in range(3))
+        center = tuple((a + b) / 2 for a, b in zip((pointOne.x, pointOne.y, pointOne.z), (pointTwo.x, pointTwo.y, pointTwo.z)))
+        diameter = 2 * pointOneRadius
+        return BRepBody((diameter, diameter, length), (R, center), shape='cylinder')
+
+
+# --- Gráficos customizados -------------------------------------------------
+
+class CustomGraphicsCoordinates:
+    def __init__(self, coordinates):
+        self.coordinateArray = list(coordinates)
+
+    @staticmethod
+    def create(coordinates):
+        return CustomGraphicsCoordinates(coordinates)
+
+
+class CustomGraphicsEntity:
+    def __init__(self, group, kind, data):
+        self._group = group
+        self.kind, self.data = kind, data
+        self.weight = 1
+
+    def deleteMe(self):
+        self._group._items.remove(self)
+        return True
+
+
+class CustomGraphicsGroup(_Collection):
+    def __init__(self, groups):
+        super().__init__()
+        self._groups = groups
+
+    def addBRepBody(self, body):
+        _count('CustomGraphicsGroup.addBRepBody')
+        entity = CustomGraphicsEntity(self, 'brep', body)
+        self._items.append(entity)
+        return entity
+
+    def addLines(self, coordinates, indexList, isLineStrip, lineStripLengths=None):
+        _count('CustomGraphicsGroup.addLines')
+        entity = CustomGraphicsEntity(self, 'lines', coordinates)
+        self._items.append(entity)
+        return entity
+
+    def deleteMe(self):
+        self._groups._items.remove(self)
+        return True
+
+
+class CustomGraphicsGroups(_Collection):
+    def add(self):
+        group = CustomGraphicsGroup(self)
+        self._items.append(group)
+        return group
+
+
+# --- Sketches e recursos ----------------------------------------------------
+
+class SketchLines:
+    def __init__(self, sketch):
+        self._sketch = sketch
+
+    def addTwoPointRectangle(self, pointOne, pointTwo):
+        _count('SketchLines.addTwoPointRectangle')
+        self._sketch._rectangle = (pointOne, pointTwo)
+        return True
+
+class SketchCurves:
+    def __init__(self, sketch):
+        self.sketchLines = SketchLines(sketch)
+
+class Profile:
+    def __init__(self, sketch):
+        self.parentSketch = sketch
+
+class Sketch:
+    def __init__(self, component, plane):
+        self.parentComponent = component
+        self.referencePlane = plane
+        self.isComputeDeferred = False
+        self.sketchCurves = SketchCurves(self)
+        self._rectangle = None
+
+    @property
+    def profiles(self):
+        return _Collection([Profile(self)] if self._rectangle else [])
+
+class Sketches(_Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def add(self, plane):
+        _count('Sketches.add')
+        sketch = Sketch(self._component, plane)
+        self._items.append(sketch)
+        self._component.parentDesign.timeline._advance()
+        return sketch
+
+
+class ExtrudeFeatureInput:
+    def __init__(self, profile, operation):
+        self.profile, self.operation = profile, operation
+        self._distance = None
+
+    def setSymmetricExtent(self, distance, isFullLength):
+        self._distance = distance.realValue if isFullLength else 2 * distance.realValue
+        return True
+
+class ExtrudeFeature:
+    def __init__(self, bodies):
+        self.bodies = _Collection(bodies)
+
+class ExtrudeFeatures(_Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, profile, operation):
+        return ExtrudeFeatureInput(profile, operation)
+
+    def add(self, input):
+        _count('ExtrudeFeatures.add')
+        p0, p1 = input.profile.parentSketch._rectangle
+        width, height = abs(p1.x - p0.x), abs(p1.y - p0.y)
+        center = ((p0.x + p1.x) / 2, (p0.y + p1.y) / 2, 0.0)
+        body = self._component.bRepBodies._addBox(
+            (width, height, input._distance),
+            (((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0)), center))
+        feature = ExtrudeFeature([body])
+        self._items.append(feature)
+        self._component.parentDesign.timeline._advance()
+        return feature
+
+
+class MoveFeatureInput:
+    def __init__(self, inputEntities, transform):
+        self.inputEntities, self.transform = inputEntities, transform
+
+class MoveFeatures(_Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, inputEntities, transform):
+        return MoveFeatureInput(inputEntities, transform)
+
+    def add(self, input):
+        _count('MoveFeatures.add')
+        for body in input.inputEntities:
+            body._applyTransform(input.transform)
+        self._items.append(input)
+        self._component.parentDesign.timeline._advance()
+        return input
+
+
+class BaseFeature:
+    def __init__(self, component):
+        self._component = component
+        self._bodies = []
+        self.isEditing = False
+        self.name = 'Base Feature'
+
+    def startEdit(self):
+        self.isEditing = True
+        return True
+
+    def finishEdit(self):
+        _count('BaseFeature.finishEdit')
+        self.isEditing = False
+        return True
+
+    @property
+    def bodies(self):
+        return _Collection(self._bodies)
+
+class BaseFeatures(_Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def add(self):
+        _count('BaseFeatures.add')
+        feature = BaseFeature(self._component)
+        self._items.append(feature)
+        self._component.parentDesign.timeline._advance()
+        return feature
+
+
+class Features:
+    def __init__(self, component):
+        self.extrudeFeatures = ExtrudeFeatures(component)
+        self.moveFeatures = MoveFeatures(component)
+        self.baseFeatures = BaseFeatures(component)
+
+
+# --- Componentes e ocorrências ----------------------------------------------
+
+class ConstructionPlane:
+    def __init__(self, name):
+        self.name = name
+
+class Component:
+    def __init__(self, design, name='Component'):
+        self.parentDesign = design
+        self.name = name
+        self.entityToken = _newToken('component')
+        self.id = self.entityToken
+        self.material = None
+        self.bRepBodies = BRepBodies(self)
+        self.meshBodies = MeshBodies(self)
+        self.customGraphicsGroups = CustomGraphicsGroups()
+        self.occurrences = Occurrences(design, self)
+        self.sketches = Sketches(self)
+        self.features = Features(self)
+        self.xYConstructionPlane = ConstructionPlane('XY')
+        self.xZConstructionPlane = ConstructionPlane('XZ')
+        self.yZConstructionPlane = ConstructionPlane('YZ')
+
+    @property
+    def allOccurrences(self):
+        result = []
+        for occ in self.occurrences:
+            result.append(occ)
+            result.extend(occ.component.allOccurrences)
+        return _Collection(result)
+
+class Occurrence:
+    def __init__(self, component, transform):
+        self.component = component
+        self.transform2 = transform
+        self.entityToken = _newToken('occurrence')
+        self.name = '{}:1'.format(component.name)
+        self.isLightBulbOn = True
+
+    @property
+    def childOccurrences(self):
+        return self.component.occurrences
+
+class Occurrences(_Collection):
+    def __init__(self, design, component):
+        super().__init__()
+        self._design = design
+        self._component = component
+
+    def addNewComponent(self, transform):
+        component = Component(self._design, 'Component{}'.format(len(self._design._components) + 1))
+        self._design._components.append(component)
+        return self.addExistingComponent(component, transform)
+
+    def addExistingComponent(self, component, transform):
+        occurrence = Occurrence(component, transform.copy())
+        self._items.append(occurrence)
+        return occurrence
+
+
+# --- Design -----------------------------------------------------------------
+
+class TimelineGroup:
+    def __init__(self, start, end):
+        self.start, self.end = start, end
+        self.name = 'Group'
+
+class TimelineGroups(_Collection):
+    def add(self, startIndex, endIndex):
+        group = TimelineGroup(startIndex, endIndex)
+        self._items.append(group)
+        return group
+
+class Timeline:
+    def __init__(self):
+        self.markerPosition = 0
+        self.count = 0
+        self.timelineGroups = TimelineGroups()
+
+    def _advance(self):
+        self.markerPosition += 1
+        self.count += 1
+
+class DataFile:
+    def __init__(self):
+        self.id = _newToken('datafile')
+        self.versionNumber = 1
+
+class Document:
+    def __init__(self, design):
+        self.name = 'Untitled'
+        self.design = design
+        self.dataFile = DataFile()
+
+class Design:
+    def __init__(self, designType=DesignTypes.ParametricDesignType):
+        self.designType = designType
+        self.timeline = Timeline()
+        self._components = []
+        self.rootComponent = Component(self, 'Root')
+        self._components.append(self.rootComponent)
+        self.parentDocument = Document(self)
+
+    @staticmethod
+    def cast(obj):
+        return obj if isinstance(obj, Design) else None
+
+    @property
+    def allComponents(self):
+        return _Collection(self._components)
+
+
+def newDesign(designType=DesignTypes.ParametricDesignType):
+    """Cria um design vazio e o torna o produto ativo da aplicação."""
+    app = core.Application.get()
+    app.activeProduct = Design(designType)
+    return app.activeProduct
+
+
+def _initializeApplication(app):
+    global DEFAULT_MATERIAL
+    app.materialLibraries = _defaultMaterialLibraries()
+    DEFAULT_MATERIAL = app.materialLibraries.itemByName('Fusion Material Library').materials._items[0]
+    app.activeProduct = Design()
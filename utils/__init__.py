@@ -1,5 +1,32 @@
-from .com_table import *
-from .inertia_table import *
-from .getters import *
-from .materials import *
-from .body_manipulation import *
\ No newline at end of file
+# Núcleo de cálculo, sem dependência do adsk: também é importado fora do
+# Fusion (CLI offline, ver utils/cli.py).
+from .transforms import *
+from .mass_properties import *
+from .inertia_math import *
+from .mesh_math import *
+from .stl import *
+from .montecarlo import *
+from .fitting import *
+from .solver import *
+from .profiling import *
+from .snapshot_store import *
+
+try:
+    import adsk.core
+except ImportError:
+    adsk = None
+
+if adsk is not None:
+    from .com_table import *
+    from .inertia_table import *
+    from .getters import *
+    from .materials import *
+    from .body_manipulation import *
+    from .incremental import *
+    from .batch import *
+    from .adaptive import *
+    from .urdf import *
+    from .export import *
+    from .worker import *
+    from .preview import *
+    from .tolerance import *
@@ -0,0 +1,176 @@
+import adsk.core, adsk.fusion, traceback
+import heapq, math
+from collections import namedtuple
+
+from .getters import getBodySnapshot, getMeshSnapshot, getSnapshotAccuracyLevel, iterOccurrences, ACCURACY_LEVELS
+from .inertia_math import computeGlobalInertia, transformMassProperties, centroidalFromMoments
+from .transforms import IDENTITY_TRANSFORM
+
+# Erro relativo estimado das propriedades físicas em cada nível de precisão de
+# ACCURACY_LEVELS (baixa, média, alta, muito alta). São estimativas
+# conservadoras usadas apenas para distribuir o orçamento de erro.
+ACCURACY_RELATIVE_ERROR = [1e-2, 1e-3, 1e-4, 1e-5]
+
+# Resumo do cálculo adaptativo:
+#   estimatedError: erro relativo estimado do resultado
+#   bodiesPerLevel: quantidade de corpos lidos em cada nível de ACCURACY_LEVELS
+#   tolerance:      tolerância pedida
+AdaptiveReport = namedtuple('AdaptiveReport', ['estimatedError', 'bodiesPerLevel', 'tolerance'])
+
+# Nomes dos níveis de ACCURACY_LEVELS no relatório.
+ACCURACY_LEVEL_NAMES = ['baixa', 'média', 'alta', 'muito alta']
+
+
+def collectBodyInstances(rootComp, meshes=False):
+    """
+    Agrupa as instâncias de cada corpo B-Rep do design (ou, com meshes, de
+    cada corpo de malha): retorna um dicionário entityToken -> (body,
+    [transform, ...]), com as transformações do referencial do corpo até o
+    rootComp.
+    """
+    bodies = (lambda component: component.meshBodies) if meshes else (lambda component: component.bRepBodies)
+    instances = {}
+    for body in bodies(rootComp):
+        instances.setdefault(body.entityToken, (body, []))[1].append(IDENTITY_TRANSFORM)
+    for occ, transform, path in iterOccurrences(rootComp):
+        for body in bodies(occ.component):
+            instances.setdefault(body.entityToken, (body, []))[1].append(transform)
+    return instances
+
+
+def _instanceContributions(snapshot, transforms):
+    # Propriedades de cada instância do corpo no referencial do rootComp.
+    m, com, I_origin = snapshot
+    norm_c = com[0]**2 + com[1]**2 + com[2]**2
+    I_cm = [[I_origin[i][j] - m * ((norm_c if i == j else 0.0) - com[i]*com[j])
+             for j in range(3)] for i in range(3)]
+    for transform in transforms:
+        com_root, I_root = transformMassProperties(m, com, I_cm, transform)
+        yield m, com_root, I_root
+
+
+def _gather(instances, snapshots):
+    masses, coms, tensors = [], [], []
+    for token, (body, transforms) in instances.items():
+        for m, com, tensor in _instanceContributions(snapshots[token], transforms):
+            masses.append(m)
+            coms.append(com)
+            tensors.append(tensor)
+    return masses, coms, tensors
+
+
+def _errorShares(instances, snapshots):
+    """
+    Parcela de cada corpo no resultado global: o maior entre a fração da massa
+    total e a fração da norma do tensor global (em relação ao CoM global)
+    devidas às suas instâncias.
+    """
+    masses, coms, tensors = _gather(instances, snapshots)
+    totalMass = sum(masses)
+    firstMoment = [sum(m * c[i] for m, c in zip(masses, coms)) for i in range(3)]
+    I_origin = [[sum(t[i][j] for t in tensors) for j in range(3)] for i in range(3)]
+    globalCOM, I_total = centroidalFromMoments(totalMass, firstMoment, I_origin)
+    normTotal = math.sqrt(sum(x * x for row in I_total for x in row)) or 1.0
+
+    shares = {}
+    for token, (body, transforms) in instances.items():
+        tensorShare = 0.0
+        massShare = 0.0
+        for m, com, tensor in _instanceContributions(snapshots[token], transforms):
+            # Contribuição da instância ao tensor em relação ao CoM global:
+            # I_origin - M·(termo da origem) + M·(termo do CoM global), por instância.
+            d = [com[i] - globalCOM[i] for i in range(3)]
+            norm_com = com[0]**2 + com[1]**2 + com[2]**2
+            norm_d = d[0]**2 + d[1]**2 + d[2]**2
+            contribution = [[tensor[i][j]
+                             - m * ((norm_com if i == j else 0.0) - com[i]*com[j])
+                             + m * ((norm_d if i == j else 0.0) - d[i]*d[j])
+                             for j in range(3)] for i in range(3)]
+            tensorShare += math.sqrt(sum(x * x for row in contribution for x in row)) / normTotal
+            massShare += m / totalMass if totalMass else 0.0
+        shares[token] = max(tensorShare, massShare)
+    return shares
+
+
+def planAccuracyLevels(shares, levels, tolerance):
+    """
+    Distribui o orçamento de erro: parte dos níveis atuais e sobe, um nível por
+    vez, o corpo com a maior parcela de erro (parcela × erro do nível), até que
+    o erro estimado total fique abaixo de tolerance ou não haja mais o que subir.
+    Retorna (levels, estimatedError), com levels um novo dicionário token -> nível.
+    """
+    levels = dict(levels)
+    maxLevel = len(ACCURACY_RELATIVE_ERROR) - 1
+    estimatedError = sum(shares[t] * ACCURACY_RELATIVE_ERROR[levels[t]] for t in shares)
+    heap = [(-shares[t] * ACCURACY_RELATIVE_ERROR[levels[t]], t) for t in shares if levels[t] < maxLevel]
+    heapq.heapify(heap)
+    while estimatedError > tolerance and heap:
+        _, token = heapq.heappop(heap)
+        level = levels[token]
+        estimatedError -= shares[token] * (ACCURACY_RELATIVE_ERROR[level] - ACCURACY_RELATIVE_ERROR[level + 1])
+        levels[token] = level + 1
+        if level + 1 < maxLevel:
+            heapq.heappush(heap, (-shares[token] * ACCURACY_RELATIVE_ERROR[level + 1], token))
+    return levels, max(estimatedError, 0.0)
+
+
+def getGlobalInertiaAdaptive(rootComp, tolerance=1e-3):
+    """
+    Calcula o tensor de inércia global com precisão adaptativa:
+      1. lê todos os corpos com a precisão baixa (ou reaproveita o cache);
+      2. estima a parcela de cada corpo no resultado global;
+      3. relê com precisão alta ou muito alta apenas os corpos cuja parcela de
+         erro impediria o resultado de ficar dentro de tolerance (erro relativo).
+    Os corpos de malha entram com o snapshot integrado da malha, que não tem
+    nível de precisão: contam no resultado e nas parcelas, mas não no
+    orçamento de erro.
+
+    Retorna:
+      (I_total, totalMass, globalCOM_mm, report), nas mesmas unidades de
+      getGlobalInertia, com report um AdaptiveReport.
+    """
+    try:
+        instances = collectBodyInstances(rootComp)
+        snapshots = {}
+        levels = {}
+        for token, (body, transforms) in instances.items():
+            snapshots[token] = getBodySnapshot(body)
+            levels[token] = getSnapshotAccuracyLevel(body)
+        meshInstances = collectBodyInstances(rootComp, meshes=True)
+        for token, (body, transforms) in meshInstances.items():
+            snapshots[token] = getMeshSnapshot(body)
+        allInstances = dict(instances, **meshInstances)
+
+        if levels:
+            shares = _errorShares(allInstances, snapshots)
+            shares = {token: shares[token] for token in levels}
+            plannedLevels, estimatedError = planAccuracyLevels(shares, levels, tolerance)
+            for token, level in plannedLevels.items():
+                if level > levels[token]:
+                    # Lê direto no nível planejado, sem passar pelos intermediários.
+                    snapshots[token] = getBodySnapshot(instances[token][0], level)
+            levels = plannedLevels
+        else:
+            estimatedError = 0.0
+
+        I_total, totalMass, globalCOM_mm = computeGlobalInertia(*_gather(allInstances, snapshots))
+        bodiesPerLevel = [sum(1 for level in levels.values() if level == i) for i in range(len(ACCURACY_LEVELS))]
+        return I_total, totalMass, globalCOM_mm, AdaptiveReport(estimatedError, bodiesPerLevel, tolerance)
+    except Exception as e:
+        adsk.core.Application.get().userInterface.messageBox(
+            "Erro ao computar o tensor de inércia global adaptativo:\n{}".format(traceback.format_exc()))
+        return None, None, None, None
+
+
+def formatAdaptiveReport(report):
+    """
+    Texto de um AdaptiveReport: erro estimado, tolerância pedida e corpos lidos
+    em cada nível. Avisa quando o erro estimado ficou acima da tolerância
+    (todos os corpos relevantes já estão na precisão mais alta).
+    """
+    text = 'Precisão adaptativa: erro relativo estimado {:.2e} (tolerância {:.2e})\nCorpos por precisão: {}'.format(
+        report.estimatedError, report.tolerance,
+        ', '.join('{} {}'.format(name, count) for name, count in zip(ACCURACY_LEVEL_NAMES, report.bodiesPerLevel)))
+    if report.estimatedError > report.tolerance:
+        text += '\nAtenção: a tolerância não foi atingida nem com a precisão mais alta.'
+    return text
@@ -0,0 +1,227 @@
+import adsk.core, adsk.fusion, traceback
+import csv, json, os, time
+from collections import namedtuple
+
+from .solver import solveBox, parseNumber
+from .body_manipulation import createTemporaryBox, BodyInserter, primeBoxSnapshot
+from .materials import getMaterialIndex, assignMaterialForMass
+
+# Alvo de geração, nas mesmas unidades das tabelas:
+#   name:   nome do corpo a ser criado
+#   mass:   massa em kg
+#   com:    centro de massa (x, y, z) em mm
+#   tensor: tensor 3x3 em relação ao CoM em g·mm²
+InertiaTarget = namedtuple('InertiaTarget', ['name', 'mass', 'com', 'tensor'])
+
+# Colunas esperadas no CSV (e chaves nos objetos JSON).
+TARGET_FIELDS = ['name', 'mass', 'cx', 'cy', 'cz', 'ixx', 'iyy', 'izz', 'ixy', 'iyz', 'ixz']
+
+# Resultado da geração de um alvo: body é None quando o alvo foi rejeitado.
+# seconds é o tempo de leitura, solução e criação do B-Rep temporário do alvo.
+TargetTiming = namedtuple('TargetTiming', ['name', 'body', 'seconds', 'error'])
+
+
+def targetFromRecord(record, index=0):
+    """Monta um InertiaTarget a partir de um dicionário com as chaves de TARGET_FIELDS."""
+    missing = [field for field in TARGET_FIELDS[1:] if field not in record]
+    if missing:
+        raise ValueError("Campos ausentes: {}".format(', '.join(missing)))
+    value = lambda field: parseNumber(record[field])
+    ixx, iyy, izz = value('ixx'), value('iyy'), value('izz')
+    ixy, iyz, ixz = value('ixy'), value('iyz'), value('ixz')
+    return InertiaTarget(
+        str(record.get('name') or 'Alvo_{}'.format(index + 1)),
+        value('mass'),
+        (value('cx'), value('cy'), value('cz')),
+        ((ixx, ixy, ixz),
+         (ixy, iyy, iyz),
+         (ixz, iyz, izz))
+    )
+
+
+def iterTargets(path, report=None):
+    """
+    Lê os alvos de um arquivo de forma incremental, produzindo um InertiaTarget
+    por vez (ou a exceção de leitura daquele registro, para ser reportada sem
+    interromper os demais).
+    Em arquivos URDF/SDF, se report for um dicionário, acumula nele os links
+    aceitos e rejeitados pela validação (ver iterInertiaTargets).
+    Formatos aceitos:
+      - .csv com cabeçalho contendo TARGET_FIELDS;
+      - .jsonl com um objeto JSON por linha;
+      - .json com uma lista de objetos;
+      - .urdf e .sdf, um alvo por link com <inertial> (ver utils/urdf.py).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.urdf', '.sdf'):
+        # Importado aqui: utils/urdf.py depende de InertiaTarget, definido neste módulo.
+        from .urdf import iterInertiaTargets
+        yield from iterInertiaTargets(path, report)
+    elif extension == '.csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            for index, record in enumerate(csv.DictReader(f)):
+                yield _readRecord(record, index)
+    elif extension == '.jsonl':
+        with open(path, encoding='utf-8') as f:
+            index = 0
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield ValueError("Registro {}: {}".format(index + 1, e))
+                else:
+                    yield _readRecord(record, index)
+                index += 1
+    elif extension == '.json':
+        with open(path, encoding='utf-8') as f:
+            records = json.load(f)
+        for index, record in enumerate(records):
+            yield _readRecord(record, index)
+    else:
+        raise ValueError("Formato de arquivo não suportado: '{}'".format(extension))
+
+
+def _readRecord(record, index):
+    try:
+        return targetFromRecord(record, index)
+    except ValueError as e:
+        return ValueError("Registro {}: {}".format(index + 1, e))
+
+
+def solveTargetBox(target):
+    """
+    Resolve a caixa substituta de um alvo e retorna (width, height, depth,
+    rotation, translation) em cm, prontos para createTemporaryBox.
+    """
+    # Com massa em g e tensor em g·mm², as dimensões saem em mm.
+    solution = solveBox(target.mass * 1000, target.com, target.tensor)
+
+    # O Fusion trabalha internamente em cm.
+    width, height, depth = (d / 10 for d in solution.dimensions)
+    translation = tuple(x / 10 for x in solution.translation)
+    return width, height, depth, solution.rotation, translation
+
+
+def generateBodies(rootComp, targets, progressDialog=None, total=0, assignMaterials=True):
+    """
+    Gera um corpo por alvo, consumindo targets (iterável de InertiaTarget ou de
+    exceções de leitura) de forma incremental.
+
+    Cada caixa é criada como B-Rep temporário já na posição final e todos os
+    corpos entram em um único base feature, então a timeline ganha um só item e
+    é recalculada uma única vez, ao final. As propriedades de massa de cada
+    corpo são registradas no cache em forma fechada.
+    Com assignMaterials, cada corpo recebe o material da biblioteca cuja
+    densidade mais se aproxima da massa do alvo dividida pelo volume da caixa.
+    Se progressDialog for dado, é atualizado a cada alvo e a geração para
+    quando o usuário cancela.
+    Retorna a lista de TargetTiming.
+    """
+    timings = []
+    boxes = []
+    inserter = BodyInserter(rootComp)
+    if progressDialog:
+        progressDialog.show('Gerando corpos', 'Alvo %v de %m', 0, max(total, 1))
+
+    try:
+        for index, target in enumerate(targets):
+            if progressDialog and progressDialog.wasCancelled:
+                break
+            start = time.perf_counter()
+            if isinstance(target, Exception):
+                timings.append(TargetTiming('Registro {}'.format(index + 1), None, 0.0, str(target)))
+            else:
+                try:
+                    box = solveTargetBox(target)
+                    inserter.add(createTemporaryBox(*box), target.name)
+                    boxes.append((len(timings), target.mass, box))
+                    timings.append(TargetTiming(target.name, None, time.perf_counter() - start, None))
+                except ValueError as e:
+                    timings.append(TargetTiming(target.name, None, time.perf_counter() - start, str(e)))
+            if progressDialog:
+                progressDialog.progressValue = index + 1
+                # Dá ao Fusion a chance de redesenhar o diálogo e processar o cancelamento.
+                adsk.doEvents()
+    finally:
+        # Encerra a edição mesmo em caso de erro, para não deixar o base feature aberto.
+        bodies = inserter.finish()
+        if progressDialog:
+            progressDialog.hide()
+
+    if assignMaterials:
+        try:
+            getMaterialIndex()
+        except ValueError:
+            # Sem a biblioteca de materiais os corpos ficam com o material padrão.
+            assignMaterials = False
+
+    for (timingIndex, mass, box), body in zip(boxes, bodies):
+        if assignMaterials:
+            width, height, depth = box[:3]
+            assignMaterialForMass(body, mass, width * height * depth)
+        primeBoxSnapshot(body, *box)
+        timings[timingIndex] = timings[timingIndex]._replace(body=body)
+    return timings
+
+
+def formatTimingSummary(timings, slowest=5):
+    """Resumo textual da geração: totais, tempo médio/máximo, alvos mais lentos e rejeitados."""
+    created = [t for t in timings if t.body is not None]
+    rejected = [t for t in timings if t.body is None]
+    totalSeconds = sum(t.seconds for t in timings)
+    lines = ['Corpos criados: {} | Alvos rejeitados: {}'.format(len(created), len(rejected)),
+             'Tempo total dos alvos: {:.2f} s'.format(totalSeconds)]
+    if created:
+        lines.append('Tempo médio por corpo: {:.1f} ms | máximo: {:.1f} ms'.format(
+            1000 * sum(t.seconds for t in created) / len(created),
+            1000 * max(t.seconds for t in created)))
+        lines.append('Mais lentos:')
+        for t in sorted(created, key=lambda t: t.seconds, reverse=True)[:slowest]:
+            lines.append('  {}: {:.1f} ms'.format(t.name, 1000 * t.seconds))
+    if rejected:
+        lines.append('Rejeitados:')
+        for t in rejected:
+            lines.append('  {}: {}'.format(t.name, t.error))
+    return '\n'.join(lines)
+
+
+def countTargets(path):
+    """Conta os registros do arquivo sem interpretá-los, para dimensionar o progresso."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.json', '.urdf', '.sdf'):
+        return 0
+    with open(path, encoding='utf-8') as f:
+        count = sum(1 for line in f if line.strip())
+    return count - 1 if extension == '.csv' else count
+
+
+def run_batch_generation(ui, rootComp):
+    """
+    Pede ao usuário o arquivo de alvos, gera os corpos e exibe o resumo de tempos.
+    """
+    try:
+        fileDialog = ui.createFileDialog()
+        fileDialog.title = 'Arquivo de alvos de inércia'
+        fileDialog.filter = 'Alvos (*.csv *.json *.jsonl *.urdf *.sdf);;Todos os arquivos (*.*)'
+        if fileDialog.showOpen() != adsk.core.DialogResults.DialogOK:
+            return None
+        path = fileDialog.filename
+
+        progressDialog = ui.createProgressDialog()
+        progressDialog.isCancelButtonShown = True
+        start = time.perf_counter()
+        report = {}
+        timings = generateBodies(rootComp, iterTargets(path, report), progressDialog, countTargets(path))
+        summary = formatTimingSummary(timings)
+        if report:
+            summary = 'Links importados: {} aceitos, {} rejeitados\n{}'.format(
+                report['accepted'], report['rejected'], summary)
+        ui.messageBox('{}\nTempo total (com inserção no design): {:.2f} s'.format(
+            summary, time.perf_counter() - start))
+        return timings
+    except Exception as e:
+        ui.messageBox('Erro na geração em lote:\n{}'.format(traceback.format_exc()))
+        return None
@@ -1,6 +1,15 @@
 import adsk.core, adsk.fusion, adsk.cam, traceback
+import math
 
+from .getters import primeBodySnapshot, getCenterOfMass
+from .inertia_math import boxMassProperties, cylinderMassProperties
+from .transforms import (IDENTITY_TRANSFORM, rotationFromEuler, rotationTransform, translationTransform,
+                         composeTransforms, transformToArray)
+from .materials import getMaterialDensity, getMaterialIndex, assignMaterialForMass
+from .profiling import traced, span
 
+
+@traced()
 def createBox(rootComp, width, height, depth):
     """
     Cria uma caixa com as dimensões especificadas.
@@ -10,12 +19,17 @@ def createBox(rootComp, width, height, depth):
     try:
         sketches = rootComp.sketches
         xyPlane = rootComp.xYConstructionPlane
-        sketch = sketches.add(xyPlane)
+        with span('Sketches.add'):
+            sketch = sketches.add(xyPlane)
         
+        # Adia o recálculo do sketch até que o retângulo esteja completo.
+        sketch.isComputeDeferred = True
         # Desenha um retângulo centralizado: as coordenadas vão de -width/2 a width/2 etc.
         pt0 = adsk.core.Point3D.create(-width/2, -height/2, 0)
         pt1 = adsk.core.Point3D.create(width/2, height/2, 0)
         sketch.sketchCurves.sketchLines.addTwoPointRectangle(pt0, pt1)
+        with span('Sketch.compute'):
+            sketch.isComputeDeferred = False
         
         profile = sketch.profiles.item(0)
         
@@ -24,81 +38,282 @@ def createBox(rootComp, width, height, depth):
         extInput = extrudes.createInput(profile, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
         isFullLength = True
         extInput.setSymmetricExtent(distance, isFullLength)
-        extrude = extrudes.add(extInput)
+        with span('ExtrudeFeatures.add'):
+            extrude = extrudes.add(extInput)
         return extrude.bodies.item(0)
     except Exception as e:
         adsk.core.Application.get().userInterface.messageBox(
             'Erro ao criar o corpo:\n{}'.format(traceback.format_exc()))
 
-def rotateBodyAroundCG_xyz(body, alpha, beta, gamma):
+def toMatrix3D(transform):
+    """Converte a transformação (R, t) de utils/transforms.py (t em cm) em adsk.core.Matrix3D."""
+    matrix = adsk.core.Matrix3D.create()
+    matrix.setWithArray(transformToArray(transform))
+    return matrix
+
+@traced()
+def moveBodies(bodies, transform):
+    """
+    Aplica a mesma transformação rígida (R, t), com t em cm, a um grupo de
+    corpos com um único move feature.
+    
+    Parâmetros:
+      bodies: lista de BRepBody do mesmo componente.
+      transform: par (R, t) de utils/transforms.py.
+    """
+    if not bodies:
+        return
+    try:
+        collection = adsk.core.ObjectCollection.create()
+        for body in bodies:
+            collection.add(body)
+        
+        # Aplica a transformação via moveFeatures.
+        moveFeats = bodies[0].parentComponent.features.moveFeatures
+        moveInput = moveFeats.createInput(collection, toMatrix3D(transform))
+        with span('MoveFeatures.add'):
+            moveFeats.add(moveInput)
+        
+    except Exception as e:
+        adsk.core.Application.get().userInterface.messageBox(
+            'Erro ao mover os corpos:\n{}'.format(traceback.format_exc()))
+
+def transformBody(body, transform):
+    """Aplica a transformação rígida (R, t), com t em cm, ao corpo com um único move feature."""
+    moveBodies([body], transform)
+
+@traced()
+def rotateBodyAroundCG_xyz(body, alpha, beta, gamma, pivot=None, translation=(0, 0, 0), unit='cm'):
     """
     Rotaciona o corpo em torno do seu centro de massa utilizando três ângulos:
     - alpha: rotação em torno do eixo X (radianos)
     - beta:  rotação em torno do eixo Y (radianos)
     - gamma: rotação em torno do eixo Z (radianos)
     
-    Todas as rotações são realizadas em relação ao CG do corpo.
+    Todas as rotações são realizadas em relação ao CG do corpo, primeiro em X,
+    depois em Y e finalmente em Z, e compostas com a translação opcional em um
+    único move feature.
+    
+    Parâmetros opcionais (na unidade unit):
+      pivot: centro de massa do corpo, quando já conhecido; se omitido, é lido
+             do snapshot do corpo (em cm).
+      translation: translação aplicada após a rotação.
     """
     try:
-        # Obtém o centro de massa do corpo (normalmente em cm) e converte para mm.
-        cg = body.physicalProperties.centerOfMass
-        adsk.core.Application.get().userInterface.messageBox("cg_body: x={}, y={}, z={}".format(cg.x,cg.y,cg.z))
-        cg_mm = adsk.core.Point3D.create(cg.x * 10, cg.y * 10, cg.z * 10)
-        
-        # Cria três matrizes de rotação para cada eixo usando o CG como pivô.
-        matrixX = adsk.core.Matrix3D.create()
-        matrixX.setToRotation(alpha, adsk.core.Vector3D.create(1, 0, 0), cg_mm)
+        rotation = rotationFromEuler((alpha, beta, gamma), 'xyz')
+        if pivot is None:
+            # O snapshot guarda o CoM em cm.
+            rotationAboutCG = rotationTransform(rotation, getCenterOfMass(body), 'cm')
+        else:
+            rotationAboutCG = rotationTransform(rotation, pivot, unit)
         
-        matrixY = adsk.core.Matrix3D.create()
-        matrixY.setToRotation(beta, adsk.core.Vector3D.create(0, 1, 0), cg_mm)
-        
-        matrixZ = adsk.core.Matrix3D.create()
-        matrixZ.setToRotation(gamma, adsk.core.Vector3D.create(0, 0, 1), cg_mm)
-        
-        # Combina as matrizes de rotação. A ordem de transformação é importante.
-        # Aqui, aplicamos primeiro a rotação em X, depois em Y e finalmente em Z.
-        compositeMatrix = matrixX
-        compositeMatrix.transformBy(matrixY)
-        compositeMatrix.transformBy(matrixZ)
-        
-        # Cria uma coleção com o corpo para a transformação.
-        bodies = adsk.core.ObjectCollection.create()
-        bodies.add(body)
-        
-        # Aplica a transformação via moveFeatures.
-        moveFeats = body.parentComponent.features.moveFeatures
-        moveInput = moveFeats.createInput(bodies, compositeMatrix)
-        moveFeats.add(moveInput)
+        transformBody(body, composeTransforms(translationTransform(translation, unit), rotationAboutCG))
         
     except Exception as e:
         adsk.core.Application.get().userInterface.messageBox(
             'Erro ao rotacionar o corpo:\n{}'.format(traceback.format_exc()))
         
-def translateBody(body, tx, ty, tz):
+@traced()
+def translateBody(body, tx, ty, tz, unit='cm'):
     """
-    Translada o corpo (body) pelos deslocamentos tx, ty, tz (em milímetros).
+    Translada o corpo (body) pelos deslocamentos tx, ty, tz.
     
     Parâmetros:
       body: O corpo (BRepBody) que será transladado.
-      tx, ty, tz: Deslocamentos ao longo dos eixos X, Y e Z, respectivamente, em mm.
+      tx, ty, tz: Deslocamentos ao longo dos eixos X, Y e Z, respectivamente,
+                  na unidade unit (padrão: cm, a unidade interna do Fusion).
     """
     try:
-        # Cria um vetor de translação com os valores fornecidos
-        translationVec = adsk.core.Vector3D.create(tx, ty, tz)
-        
-        # Cria uma matriz de transformação e define sua propriedade de translação
-        translationMatrix = adsk.core.Matrix3D.create()
-        translationMatrix.translation = translationVec
-        
-        # Cria uma coleção com o corpo a ser movido
-        bodies = adsk.core.ObjectCollection.create()
-        bodies.add(body)
-        
-        # Obtém o recurso de moveFeatures do componente pai e aplica a transformação
-        moveFeats = body.parentComponent.features.moveFeatures
-        moveInput = moveFeats.createInput(bodies, translationMatrix)
-        moveFeats.add(moveInput)
+        transformBody(body, translationTransform((tx, ty, tz), unit))
         
     except Exception as e:
         adsk.core.Application.get().userInterface.messageBox(
-            'Erro ao translade o corpo:\n{}'.format(traceback.format_exc()))
\ No newline at end of file
+            'Erro ao translade o corpo:\n{}'.format(traceback.format_exc()))
+
+@traced()
+def createTemporaryBox(width, height, depth, rotation=None, translation=(0, 0, 0)):
+    """
+    Cria uma caixa como B-Rep temporário, já na posição final, sem sketch nem extrusão.
+    
+    Parâmetros:
+      width, height, depth: dimensões em cm ao longo dos eixos X, Y e Z do corpo.
+      rotation: matriz 3x3 cujas colunas são os eixos X, Y e Z do corpo no
+                referencial do componente (identidade se None).
+      translation: posição do centro da caixa, em cm.
+    
+    Retorna:
+      BRepBody temporário (ainda não pertence a nenhum componente).
+    """
+    if rotation is None:
+        rotation = ((1, 0, 0), (0, 1, 0), (0, 0, 1))
+    center = adsk.core.Point3D.create(*translation)
+    # O OrientedBoundingBox3D já carrega a orientação: length ao longo do eixo X
+    # do corpo, width ao longo do eixo Y e height ao longo de X × Y.
+    lengthDirection = adsk.core.Vector3D.create(rotation[0][0], rotation[1][0], rotation[2][0])
+    widthDirection = adsk.core.Vector3D.create(rotation[0][1], rotation[1][1], rotation[2][1])
+    box = adsk.core.OrientedBoundingBox3D.create(center, lengthDirection, widthDirection,
+                                                 width, height, depth)
+    with span('TemporaryBRepManager.createBox'):
+        return adsk.fusion.TemporaryBRepManager.get().createBox(box)
+
+class BodyInserter:
+    """
+    Insere corpos B-Rep temporários em um componente. Em designs paramétricos,
+    todos os corpos entram em um único base feature (uma só edição e um só item
+    na timeline, sem histórico paramétrico); em designs diretos, são
+    adicionados diretamente ao componente.
+    
+    Uso:
+      inserter = BodyInserter(rootComp)
+      inserter.add(tempBody, 'Nome')
+      bodies = inserter.finish()
+    """
+
+    def __init__(self, component):
+        self.component = component
+        self.names = []
+        self.bodies = []
+        self.baseFeature = None
+        design = adsk.fusion.Design.cast(component.parentDesign)
+        if design.designType == adsk.fusion.DesignTypes.ParametricDesignType:
+            self.baseFeature = component.features.baseFeatures.add()
+            self.baseFeature.startEdit()
+
+    def add(self, tempBody, name=None):
+        with span('BRepBodies.add'):
+            if self.baseFeature:
+                self.component.bRepBodies.add(tempBody, self.baseFeature)
+            else:
+                self.bodies.append(self.component.bRepBodies.add(tempBody))
+        self.names.append(name)
+
+    @traced()
+    def finish(self):
+        """Encerra a edição e retorna os BRepBody criados, na ordem de inserção."""
+        if self.baseFeature:
+            with span('BaseFeature.finishEdit'):
+                self.baseFeature.finishEdit()
+            # Após finishEdit, os corpos válidos são os do próprio base feature.
+            bodies = self.baseFeature.bodies
+            self.bodies = [bodies.item(i) for i in range(bodies.count)]
+        for body, name in zip(self.bodies, self.names):
+            if name:
+                body.name = name
+        return self.bodies
+
+@traced()
+def createTemporaryCylinder(diameter, length, rotation=None, translation=(0, 0, 0)):
+    """
+    Cria um cilindro como B-Rep temporário, já na posição final.
+    
+    Parâmetros:
+      diameter, length: diâmetro e comprimento em cm; o eixo do cilindro é o
+                        eixo Z do corpo.
+      rotation: matriz 3x3 cujas colunas são os eixos X, Y e Z do corpo no
+                referencial do componente (identidade se None).
+      translation: posição do centro do cilindro, em cm.
+    
+    Retorna:
+      BRepBody temporário (ainda não pertence a nenhum componente).
+    """
+    if rotation is None:
+        rotation = ((1, 0, 0), (0, 1, 0), (0, 0, 1))
+    half = [length / 2 * rotation[k][2] for k in range(3)]
+    bottom = adsk.core.Point3D.create(*(translation[k] - half[k] for k in range(3)))
+    top = adsk.core.Point3D.create(*(translation[k] + half[k] for k in range(3)))
+    with span('TemporaryBRepManager.createCylinderOrCone'):
+        return adsk.fusion.TemporaryBRepManager.get().createCylinderOrCone(bottom, diameter / 2, top, diameter / 2)
+
+@traced()
+def createOrientedBox(rootComp, width, height, depth, rotation=None, translation=(0, 0, 0), mass=None):
+    """
+    Caminho rápido de createBox: cria a caixa já orientada e posicionada, como
+    B-Rep temporário inserido em um base feature, e registra no cache suas
+    propriedades de massa calculadas em forma fechada (sem consulta ao kernel).
+    Dimensões e translação em cm. Com mass (kg), a caixa recebe antes o
+    material cuja densidade mais se aproxima dela (ver assignMaterialForMass).
+    Retorna o BRepBody criado.
+    """
+    try:
+        inserter = BodyInserter(rootComp)
+        inserter.add(createTemporaryBox(width, height, depth, rotation, translation))
+        body = inserter.finish()[0]
+        if mass is not None:
+            try:
+                assignMaterialForMass(body, mass, width * height * depth)
+            except ValueError:
+                # Sem a biblioteca de materiais a caixa fica com o material padrão.
+                pass
+        primeBoxSnapshot(body, width, height, depth, rotation, translation)
+        return body
+    except Exception as e:
+        adsk.core.Application.get().userInterface.messageBox(
+            'Erro ao criar o corpo:\n{}'.format(traceback.format_exc()))
+
+@traced()
+def primeBoxSnapshot(body, width, height, depth, rotation=None, translation=(0, 0, 0)):
+    """
+    Registra no cache de snapshots as propriedades de massa analíticas de uma
+    caixa criada por createTemporaryBox, usando a densidade do material do corpo.
+    """
+    density = getMaterialDensity(body.material)
+    if density is None:
+        return
+    transform = (rotation if rotation is not None else IDENTITY_TRANSFORM[0], tuple(translation))
+    primeBodySnapshot(body, boxMassProperties(width, height, depth, density, transform))
+
+@traced()
+def primeCylinderSnapshot(body, diameter, length, rotation=None, translation=(0, 0, 0)):
+    """
+    Registra no cache de snapshots as propriedades de massa analíticas de um
+    cilindro criado por createTemporaryCylinder.
+    """
+    density = getMaterialDensity(body.material)
+    if density is None:
+        return
+    transform = (rotation if rotation is not None else IDENTITY_TRANSFORM[0], tuple(translation))
+    primeBodySnapshot(body, cylinderMassProperties(diameter / 2, length, density, transform))
+
+@traced()
+def createFittedBodies(rootComp, fit, name='Primitivo', massScale=1.0, lengthScale=0.1):
+    """
+    Cria os corpos de um ajuste de primitivos (FitResult de utils/fitting.py)
+    em um único base feature, cada um com o material cuja densidade mais se
+    aproxima da massa ajustada, e registra no cache as propriedades de massa
+    analíticas de cada corpo.
+    massScale e lengthScale levam as unidades do ajuste a kg e cm (padrão:
+    kg e mm). Retorna a lista de BRepBody criados.
+    """
+    try:
+        inserter = BodyInserter(rootComp)
+        shapes = []
+        for index, primitive in enumerate(fit.primitives):
+            dimensions = tuple(d * lengthScale for d in primitive.dimensions)
+            center = tuple(c * lengthScale for c in primitive.center)
+            if primitive.kind == 'box':
+                tempBody = createTemporaryBox(*dimensions, primitive.rotation, center)
+                volume = dimensions[0] * dimensions[1] * dimensions[2]
+            else:
+                tempBody = createTemporaryCylinder(dimensions[0], dimensions[2], primitive.rotation, center)
+                volume = math.pi * dimensions[0]**2 / 4 * dimensions[2]
+            inserter.add(tempBody, '{}_{}'.format(name, index + 1))
+            shapes.append((primitive, dimensions, center, volume))
+        bodies = inserter.finish()
+
+        try:
+            getMaterialIndex()
+            assignMaterials = True
+        except ValueError:
+            # Sem a biblioteca de materiais os corpos ficam com o material padrão.
+            assignMaterials = False
+        for body, (primitive, dimensions, center, volume) in zip(bodies, shapes):
+            if assignMaterials:
+                assignMaterialForMass(body, primitive.mass * massScale, volume)
+            if primitive.kind == 'box':
+                primeBoxSnapshot(body, *dimensions, primitive.rotation, center)
+            else:
+                primeCylinderSnapshot(body, dimensions[0], dimensions[2], primitive.rotation, center)
+        return bodies
+    except Exception as e:
+        adsk.core.Application.get().userInterface.messageBox(
+            'Erro ao criar os primitivos:\n{}'.format(traceback.format_exc()))
@@ -0,0 +1,259 @@
+"""
+CLI offline: propriedades de massa de uma montagem de peças em STL binário,
+sem o Fusion (CI, servidores Linux). Usa apenas os módulos sem dependência do
+adsk: stl.py e mesh_math.py para cada peça e o núcleo de inertia_math.py
+(transformMassProperties e computeGlobalInertia) para a montagem, então o
+relatório é o mesmo do Inertia2Fusion (formatInertiaReport).
+
+Uso (na pasta do add-in):
+  python -m utils.cli montagem.json
+  python -m utils.cli montagem.json --workers 8 --json
+  python -m utils.cli montagem.json --samples 1000000 --seed 1
+
+Manifesto (JSON):
+  {
+    "units": "mm",                    unidade dos STL e das translações (mm, cm ou m)
+    "parts": [
+      {
+        "name": "base",               opcional; padrão: nome do arquivo
+        "file": "base.stl",           relativo à pasta do manifesto
+        "density": 7850,              kg/m³
+        "tolerance": {                opcional; limites ±, só usados com --samples
+          "mass": 0.01,               relativa, independente por instância
+          "density": 0.02,            relativa, a mesma em todas as instâncias da peça
+          "com": 0.1                  deslocamento do CoM por eixo, na unidade do manifesto
+        },
+        "placements": [               opcional; padrão: uma instância na origem
+          {"translation": [0, 0, 0],
+           "rotation": [0, 0, 90]}    graus, Euler xyz extrínseco (como rotateBodyAroundCG_xyz)
+        ]
+      }
+    ]
+  }
+
+Peças grandes são divididas em faixas de RANGE_TRIANGLES triângulos e as
+faixas de todas as peças são integradas em um pool de processos; cada processo
+mapeia o arquivo por conta própria, então só as somas trafegam entre eles.
+
+Com --samples, as tolerâncias das peças são propagadas até o tensor da
+montagem por Monte Carlo (ver montecarlo.py), com as amostras distribuídas no
+mesmo número de processos, e o relatório traz os percentis.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from .inertia_math import computeGlobalInertia, transformMassProperties, formatInertiaReport
+from .mass_properties import MassProperties
+from .mesh_math import massPropertiesFromMoments, addMoments
+from .montecarlo import monteCarloInertia, formatToleranceReport
+from .stl import stlTriangleCount, openStlVertices, stlOrigin, stlRangeMoments
+from .transforms import LENGTH_UNITS, IDENTITY_TRANSFORM, rotationFromEuler, toCentimeters
+
+# Triângulos por tarefa do pool de processos.
+RANGE_TRIANGLES = 1 << 18
+
+# Abaixo deste total de triângulos tudo é integrado no próprio processo: o
+# custo de iniciar o pool não compensa.
+PARALLEL_MIN_TRIANGLES = 1 << 22
+
+# kg/m³ -> kg/cm³ (unidade interna do Fusion).
+DENSITY_KGM3_TO_KGCM3 = 1e-6
+
+# Peça do manifesto, já validada: density em kg/cm³, scale converte as
+# coordenadas do STL para cm, placements são transformações (R, t) com t em cm
+# e tolerance é (massa, densidade, CoM em mm).
+Part = namedtuple('Part', ['name', 'path', 'density', 'scale', 'placements', 'tolerance'])
+
+# Resultado de uma peça no próprio referencial, nas unidades das tabelas:
+# massa em kg, CoM em mm e tensor em relação ao CoM em g·mm².
+PartReport = namedtuple('PartReport', ['name', 'triangles', 'mass', 'com', 'tensor'])
+
+
+def loadManifest(path):
+    """Lê e valida o manifesto. Retorna a lista de Part."""
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    units = manifest.get('units', 'mm')
+    if units not in LENGTH_UNITS:
+        raise ValueError("Unidade desconhecida no manifesto: '{}' (use {}).".format(units, ', '.join(LENGTH_UNITS)))
+    directory = os.path.dirname(os.path.abspath(path))
+
+    parts = []
+    for index, entry in enumerate(manifest.get('parts', [])):
+        if 'file' not in entry or 'density' not in entry:
+            raise ValueError("Peça {} do manifesto sem 'file' ou 'density'.".format(index + 1))
+        placements = []
+        for placement in entry.get('placements', [{}]):
+            angles = [math.radians(a) for a in placement.get('rotation', (0, 0, 0))]
+            translation = toCentimeters(placement.get('translation', (0, 0, 0)), units)
+            if len(angles) != 3 or len(translation) != 3:
+                raise ValueError("Peça {}: 'rotation' e 'translation' devem ter 3 valores.".format(index + 1))
+            placements.append((rotationFromEuler(angles, 'xyz'), translation))
+        tolerance = entry.get('tolerance', {})
+        parts.append(Part(
+            entry.get('name') or os.path.splitext(os.path.basename(entry['file']))[0],
+            os.path.join(directory, entry['file']),
+            float(entry['density']) * DENSITY_KGM3_TO_KGCM3,
+            LENGTH_UNITS[units],
+            placements or [IDENTITY_TRANSFORM],
+            (float(tolerance.get('mass', 0.0)), float(tolerance.get('density', 0.0)),
+             float(tolerance.get('com', 0.0)) * LENGTH_UNITS[units] * 10)
+        ))
+    if not parts:
+        raise ValueError("O manifesto não tem peças ('parts').")
+    return parts
+
+
+def _integrateRange(task):
+    return stlRangeMoments(*task)
+
+
+def computePartSnapshots(parts, workers=None):
+    """
+    Integra o STL de cada peça e retorna, na ordem das peças, a lista de
+    (triangles, snapshot), com snapshot = (mass, com, tensor) no referencial
+    da peça em kg, cm e kg·cm² (tensor em relação à origem da peça).
+    """
+    origins = []
+    tasks = []
+    owners = []
+    counts = []
+    for index, part in enumerate(parts):
+        count = stlTriangleCount(part.path)
+        origin = stlOrigin(openStlVertices(part.path), part.scale)
+        counts.append(count)
+        origins.append(origin)
+        for start in range(0, count, RANGE_TRIANGLES):
+            tasks.append((part.path, start, min(start + RANGE_TRIANGLES, count), origin, part.scale))
+            owners.append(index)
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1 and sum(counts) >= PARALLEL_MIN_TRIANGLES:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            results = list(executor.map(_integrateRange, tasks))
+    else:
+        results = [_integrateRange(task) for task in tasks]
+
+    moments = [None] * len(parts)
+    for index, result in zip(owners, results):
+        moments[index] = addMoments(moments[index], result)
+    snapshots = []
+    for part, count, origin, total in zip(parts, counts, origins, moments):
+        if total is None:
+            snapshots.append((count, (0.0, (0.0, 0.0, 0.0), ((0.0,) * 3,) * 3)))
+        else:
+            snapshots.append((count, massPropertiesFromMoments(total, origin, part.density)))
+    return snapshots
+
+
+def placeInstances(parts, snapshots):
+    """
+    Contribuições de cada instância das peças no referencial da montagem:
+    (masses, coms, tensors, owners), com owners o índice da peça de cada uma.
+    """
+    masses, coms, tensors, owners = [], [], [], []
+    for index, (part, (count, snapshot)) in enumerate(zip(parts, snapshots)):
+        props = MassProperties.fromOrigin(*snapshot)
+        if props.mass == 0:
+            continue
+        for transform in part.placements:
+            com_root, I_origin = transformMassProperties(props.mass, props.com, props.tensor, transform)
+            masses.append(props.mass)
+            coms.append(com_root)
+            tensors.append(I_origin)
+            owners.append(index)
+    return masses, coms, tensors, owners
+
+
+def computeAssembly(parts, workers=None, snapshots=None):
+    """
+    Retorna (partReports, result): um PartReport por peça e o resultado da
+    montagem (I_total, totalMass, globalCOM_mm), como getGlobalInertia.
+    snapshots, se dado, é o resultado de computePartSnapshots.
+    """
+    if snapshots is None:
+        snapshots = computePartSnapshots(parts, workers)
+    partReports = []
+    for part, (count, snapshot) in zip(parts, snapshots):
+        I_total, mass, com_mm = MassProperties.fromOrigin(*snapshot).asResult()
+        partReports.append(PartReport(part.name, count, mass, com_mm, I_total))
+    masses, coms, tensors, owners = placeInstances(parts, snapshots)
+    return partReports, computeGlobalInertia(masses, coms, tensors)
+
+
+def computeTolerances(parts, snapshots, samples, workers=None, seed=None):
+    """
+    Propaga as tolerâncias das peças até o tensor da montagem (ver
+    monteCarloInertia): a densidade é sorteada uma vez por peça, a massa e o
+    CoM, por instância. Retorna um ToleranceResult.
+    """
+    masses, coms, tensors, owners = placeInstances(parts, snapshots)
+    return monteCarloInertia(masses, coms, tensors,
+                             massTolerance=[parts[index].tolerance[0] for index in owners],
+                             comTolerance=[parts[index].tolerance[2] for index in owners],
+                             densityTolerance=[part.tolerance[1] for part in parts],
+                             densityGroups=owners, samples=samples, seed=seed,
+                             workers=workers or os.cpu_count() or 1)
+
+
+def formatPartReport(report):
+    return "Peça '{}' ({} triângulos)\nTensor (g·mm²): {}\nMassa (kg): {}\nCentro de Massa (mm): {}".format(
+        report.name, report.triangles, report.tensor, report.mass, report.com)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument('manifest', help='manifesto JSON com as peças, densidades e posicionamentos')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processos para as peças grandes (padrão: número de CPUs)')
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    parser.add_argument('--samples', type=int, default=0,
+                        help='amostras da análise de tolerâncias por Monte Carlo (padrão: sem análise)')
+    parser.add_argument('--seed', type=int, default=None, help='semente da análise de tolerâncias')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        parts = loadManifest(args.manifest)
+        snapshots = computePartSnapshots(parts, args.workers)
+        partReports, (I_total, totalMass, globalCOM_mm) = computeAssembly(parts, snapshots=snapshots)
+        tolerances = None
+        if args.samples > 0:
+            tolerances = computeTolerances(parts, snapshots, args.samples, args.workers, args.seed)
+    except (OSError, ValueError) as e:
+        print('Erro: {}'.format(e), file=sys.stderr)
+        return 2
+
+    if args.json:
+        output = {
+            'parts': [report._asdict() for report in partReports],
+            'assembly': {'mass': totalMass, 'com': globalCOM_mm, 'tensor': I_total},
+        }
+        if tolerances is not None:
+            output['tolerances'] = {
+                'samples': tolerances.samples,
+                'percentiles': list(tolerances.percentiles),
+                'mass': tolerances.mass.tolist(),
+                'com': tolerances.com.tolist(),
+                'tensor': tolerances.tensor.tolist(),
+            }
+        print(json.dumps(output, indent=2, ensure_ascii=False))
+    else:
+        for report in partReports:
+            print(formatPartReport(report) + '\n')
+        print(formatInertiaReport(I_total, totalMass, globalCOM_mm))
+        if tolerances is not None:
+            print('\n' + formatToleranceReport(tolerances))
+        print('Tempo: {:.2f} s'.format(time.perf_counter() - start))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
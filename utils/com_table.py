@@ -1,8 +1,18 @@
 import adsk.core, adsk.fusion, adsk.cam, traceback
 
+from .profiling import traced
+from .preview import InertiaPreview, PreviewInputChangedHandler, PreviewExecuteHandler, readPreviewCells
+
 _handlers = []  # Lista local para armazenar os handlers
+_createdHandler = None  # Handler de commandCreated, registrado uma única vez por definição
+
+COM_INPUT_IDS = [f'com_row1_col{col}' for col in range(4)]
+
+def _readCells(inputs):
+    return readPreviewCells(inputs, COM_INPUT_IDS), None
 
 def start_com_table(ui, handlers, on_data_received=None):
+    global _createdHandler
     try:
         cmdDef = ui.commandDefinitions.itemById('CoMTableCommand')
         if not cmdDef:
@@ -12,10 +22,16 @@ def start_com_table(ui, handlers, on_data_received=None):
                 'Tabela para entrada das coordenadas do centro de massa',
                 ''
             )
+            _createdHandler = None
         
-        onCmdCreated = CoMCommandCreatedHandler(on_data_received)
-        cmdDef.commandCreated.add(onCmdCreated)
-        handlers.append(onCmdCreated)
+        # Em modo add-in a definição sobrevive entre execuções: o handler é
+        # registrado uma única vez e nas execuções seguintes só troca o callback.
+        if _createdHandler is None:
+            _createdHandler = CoMCommandCreatedHandler(on_data_received)
+            cmdDef.commandCreated.add(_createdHandler)
+            handlers.append(_createdHandler)
+        else:
+            _createdHandler.on_data_received = on_data_received
         
         cmdDef.execute()
         adsk.autoTerminate(False)
@@ -23,10 +39,12 @@ def start_com_table(ui, handlers, on_data_received=None):
         pass
 
 def stop_com_table(ui):
+    global _createdHandler
     try:
         cmdDef = ui.commandDefinitions.itemById('CoMTableCommand')
         if cmdDef:
             cmdDef.deleteMe()
+        _createdHandler = None
     except Exception as e:
         pass
 
@@ -35,51 +53,61 @@ class CoMCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
         super().__init__()
         self.on_data_received = on_data_received
 
+    @traced()
     def notify(self, args):
         try:
             cmd = args.command
             inputs = cmd.commandInputs
 
-            # Cria a tabela com 1 linha de dados e 3 colunas
-            table = inputs.addTableCommandInput('comTable', 'Centro de Massa', 3, '')
+            # Cria a tabela com 1 linha de dados e 4 colunas (X, Y, Z em mm e a massa em kg)
+            table = inputs.addTableCommandInput('comTable', 'Centro de Massa', 4, '')
             table.maximumVisibleRows = 2
             table.columnSpacing = 1
             table.rowSpacing = 1
             table.hasGrid = False
 
-            headers = ['X', 'Y', 'Z']
+            headers = ['X', 'Y', 'Z', 'Massa (kg)']
             for col, header in enumerate(headers):
                 headerInput = inputs.addStringValueInput(f'header_{col}', '', header)
                 headerInput.isReadOnly = True
                 table.addCommandInput(headerInput, 0, col, 0, 0)
 
-            for col in range(3):
-                input_id = f'com_row1_col{col}'
+            for col, input_id in enumerate(COM_INPUT_IDS):
                 dataInput = inputs.addStringValueInput(input_id, '', '0.0')
                 table.addCommandInput(dataInput, 1, col, 0, 0)
 
-            onExecute = CoMTableOKHandler(self.on_data_received)
+            # Prévia: massa, CoM e tensor globais com o novo corpo e um marcador no CoM.
+            preview = InertiaPreview()
+            preview.update(*_readCells(inputs))
+            inputs.addTextBoxCommandInput('com_preview', 'Prévia', preview.summary(), 4, True)
+
+            onInputChanged = PreviewInputChangedHandler(preview, 'com_preview', _readCells)
+            cmd.inputChanged.add(onInputChanged)
+            onPreview = PreviewExecuteHandler(preview, 'com_preview')
+            cmd.executePreview.add(onPreview)
+            onExecute = CoMTableOKHandler(self.on_data_received, preview)
             cmd.execute.add(onExecute)
-            _handlers.append(onExecute)
+            # Só o comando atual precisa dos handlers; os anteriores já terminaram.
+            _handlers[:] = [onExecute, onInputChanged, onPreview]
         except Exception as e:
             pass
 
 class CoMTableOKHandler(adsk.core.CommandEventHandler):
-    def __init__(self, on_data_received=None):
+    def __init__(self, on_data_received=None, preview=None):
         super().__init__()
         self.on_data_received = on_data_received
+        self.preview = preview
 
+    @traced()
     def notify(self, args):
         try:
             eventArgs = adsk.core.CommandEventArgs.cast(args)
             inputs = eventArgs.command.commandInputs
+            if self.preview:
+                self.preview.cancel()
 
-            # Coleta os valores da linha de dados da tabela
-            com_values = []
-            for col in range(3):
-                input_id = f'com_row1_col{col}'
-                dataInput = inputs.itemById(input_id)
-                com_values.append(dataInput.value if dataInput else '0.0')
+            # Coleta os valores da linha de dados da tabela: [X, Y, Z, massa]
+            com_values = readPreviewCells(inputs, COM_INPUT_IDS)
 
             # Chama o callback passando os dados do CoM
             if self.on_data_received:
@@ -0,0 +1,167 @@
+import adsk.core, adsk.fusion, traceback
+import os, time
+
+from .getters import getComponentFingerprint, getComponentMassProperties, iterOccurrences
+from .inertia_math import toReportUnits
+from .batch import InertiaTarget
+from .urdf import UrdfInertialWriter, JsonlInertialWriter, linkName
+from .worker import submitJob
+
+# Propriedades de cada componente já exportado, pelo entityToken do componente:
+# (fingerprints dos corpos, (mass, com, I_cm)). Um componente cujos corpos não
+# mudaram é reaproveitado sem nenhuma consulta às propriedades físicas.
+_componentCache = {}
+
+
+def getLinkMassProperties(component):
+    """
+    Propriedades de massa dos corpos do próprio componente, no referencial do
+    componente: (mass, com, I_cm) em kg, cm e kg·cm², reaproveitando o
+    resultado da exportação anterior se nenhum corpo mudou.
+    """
+    key = component.entityToken
+    fingerprints = getComponentFingerprint(component)
+    cached = _componentCache.get(key)
+    if cached is not None and cached[0] == fingerprints:
+        return cached[1]
+    props = getComponentMassProperties(component)
+    _componentCache[key] = (fingerprints, props)
+    return props
+
+
+def clearLinkCache():
+    _componentCache.clear()
+
+
+def iterComponentLinks(rootComp):
+    """
+    Gerador que produz um InertiaTarget por link: os corpos do rootComp (se
+    houver) e cada ocorrência com corpos, com massa em kg, CoM em mm e tensor
+    em relação ao CoM em g·mm², no referencial do componente (o referencial do
+    link). Os nomes são únicos e válidos em URDF.
+    """
+    names = set()
+
+    def uniqueName(name):
+        base = name = linkName(name)
+        suffix = 2
+        while name in names:
+            name = '{}_{}'.format(base, suffix)
+            suffix += 1
+        names.add(name)
+        return name
+
+    def iterLinks():
+        if rootComp.bRepBodies.count > 0 or rootComp.meshBodies.count > 0:
+            yield rootComp.name, rootComp
+        for occ, transform, path in iterOccurrences(rootComp):
+            yield occ.name, occ.component
+
+    # Cada componente é avaliado uma única vez, independentemente do número de instâncias.
+    evaluated = {}
+    for name, component in iterLinks():
+        key = component.entityToken
+        if key not in evaluated:
+            evaluated[key] = getLinkMassProperties(component)
+        mass, com, I_cm = evaluated[key]
+        if mass == 0:
+            continue
+        I_total, com_mm = toReportUnits(com, I_cm)
+        yield InertiaTarget(uniqueName(name), mass, com_mm, tuple(tuple(row) for row in I_total))
+
+
+def exportLinkInertials(rootComp, writers, progressDialog=None):
+    """
+    Calcula as propriedades de cada link (ver iterComponentLinks) e as entrega
+    a cada escritor assim que ficam prontas. Retorna a quantidade de links
+    exportados. Se progressDialog for dado, a exportação para quando o usuário
+    cancela.
+    """
+    count = 0
+    for target in iterComponentLinks(rootComp):
+        if progressDialog and progressDialog.wasCancelled:
+            break
+        for writer in writers:
+            writer.write(target)
+        count += 1
+        if progressDialog:
+            progressDialog.progressValue = count
+            adsk.doEvents()
+    return count
+
+
+def writeLinkTargets(targets, urdfPath, jsonlPath, robotName, progress=None):
+    """
+    Grava os InertiaTarget já calculados no .urdf e no .jsonl. Não usa a API
+    do Fusion, então pode rodar em segundo plano (ver worker.py);
+    progress(done, total), se dado, é chamado a cada link.
+    Retorna a quantidade de links gravados.
+    """
+    with open(urdfPath, 'w', encoding='utf-8') as urdfFile, open(jsonlPath, 'w', encoding='utf-8') as jsonlFile:
+        writers = [UrdfInertialWriter(urdfFile, robotName), JsonlInertialWriter(jsonlFile)]
+        try:
+            for count, target in enumerate(targets, 1):
+                for writer in writers:
+                    writer.write(target)
+                if progress:
+                    progress(count, len(targets))
+        finally:
+            for writer in writers:
+                writer.close()
+    return len(targets)
+
+
+def run_inertial_export(ui, rootComp, background=False):
+    """
+    Pede ao usuário o arquivo .urdf de destino e exporta as propriedades de
+    cada link para ele e para um .jsonl de mesmo nome.
+    Com background, as propriedades são lidas aqui e a gravação dos arquivos
+    roda em segundo plano (o pool de worker.py deve estar iniciado); o
+    resumo é mostrado quando ela termina.
+    """
+    try:
+        fileDialog = ui.createFileDialog()
+        fileDialog.title = 'Exportar propriedades de inércia dos links'
+        fileDialog.filter = 'URDF (*.urdf)'
+        if fileDialog.showSave() != adsk.core.DialogResults.DialogOK:
+            return None
+        urdfPath = fileDialog.filename
+        jsonlPath = os.path.splitext(urdfPath)[0] + '.jsonl'
+
+        progressDialog = ui.createProgressDialog()
+        progressDialog.isCancelButtonShown = True
+        progressDialog.show('Exportando links', 'Link %v', 0, max(rootComp.allOccurrences.count + 1, 1))
+        start = time.perf_counter()
+
+        def report(count):
+            ui.messageBox('Links exportados: {}\n{}\n{}\nTempo: {:.2f} s'.format(
+                count, urdfPath, jsonlPath, time.perf_counter() - start))
+
+        if background:
+            targets = []
+            try:
+                for target in iterComponentLinks(rootComp):
+                    if progressDialog.wasCancelled:
+                        return None
+                    targets.append(target)
+                    progressDialog.progressValue = len(targets)
+                    adsk.doEvents()
+            finally:
+                progressDialog.hide()
+            submitJob(ui, 'Gravando URDF e JSON lines', writeLinkTargets, targets, urdfPath, jsonlPath,
+                      linkName(rootComp.name), onDone=report, key='export', progress=True)
+            return len(targets)
+
+        with open(urdfPath, 'w', encoding='utf-8') as urdfFile, open(jsonlPath, 'w', encoding='utf-8') as jsonlFile:
+            writers = [UrdfInertialWriter(urdfFile, linkName(rootComp.name)), JsonlInertialWriter(jsonlFile)]
+            try:
+                count = exportLinkInertials(rootComp, writers, progressDialog)
+            finally:
+                for writer in writers:
+                    writer.close()
+                progressDialog.hide()
+        report(count)
+        return count
+    except Exception as e:
+        ui.messageBox('Erro na exportação:\n{}'.format(traceback.format_exc()))
+        return None
@@ -0,0 +1,462 @@
+"""
+Ajuste de vários primitivos (caixas e cilindros) a um alvo de massa, CoM e
+tensor de inércia, sem dependência do adsk.
+
+Uma única caixa (solver.py) não reproduz todo alvo: tensores perto de violar
+a desigualdade triangular pedem corpos muito finos, e links cujo CoM precisa
+ficar em certa posição dentro de um envelope geométrico nem sempre cabem em
+uma caixa centrada no CoM. Aqui o alvo é reproduzido por N primitivos
+alinhados a um referencial comum:
+  - sem envelope, os eixos principais do tensor alvo;
+  - com envelope (caixa (mínimo, máximo) no referencial do alvo), os próprios
+    eixos X, Y e Z, e cada primitivo deve caber inteiro no envelope.
+
+Parâmetros de cada primitivo, em unidades normalizadas (massa total 1 e
+comprimento L = sqrt(tr(I)/m), de modo que o tensor alvo tem traço 1):
+  - w: peso do primitivo; as frações de massa são softmax(w), então a massa
+    total é sempre a do alvo;
+  - x (3): posição do centro em relação ao CoM alvo;
+  - u (3): logaritmo das dimensões (caixa: a, b, c; cilindro: raio e
+    comprimento, o terceiro não é usado). O eixo do cilindro é um dos três
+    eixos do referencial, sorteado em cada recomeço.
+
+Os resíduos são as seis componentes do tensor composto (em relação ao CoM
+alvo) menos as do alvo, o CoM composto, a fração mínima de massa de cada
+primitivo, a dimensão mínima e, com envelope, o quanto cada primitivo sai
+dele. O jacobiano é analítico (derivadas do tensor composto pelo teorema dos
+eixos paralelos) e o mínimo é buscado por Levenberg-Marquardt.
+
+Os recomeços aleatórios de um alvo são avaliados juntos, como um lote de
+candidatos em arrays (candidatos x primitivos): cada iteração monta os
+resíduos e os jacobianos do lote inteiro e resolve os sistemas amortecidos de
+uma vez. Alvos independentes e grupos de FIT_TASK_RESTARTS recomeços são
+tarefas de um pool de processos em fitPrimitivesBatch.
+
+Unidades livres, como em solveBox: massa e tensor consistentes (ex.: g e
+g·mm²) dão dimensões e posições na unidade de comprimento correspondente.
+"""
+
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # O Python embarcado no Fusion nem sempre traz o NumPy.
+    np = None
+
+PRIMITIVE_KINDS = ('box', 'cylinder')
+
+# Recomeços aleatórios por alvo e por tarefa do pool. As tarefas (e as
+# sementes de cada uma) não dependem do número de processos, então o
+# resultado de uma semente é o mesmo com ou sem o pool.
+FIT_RESTARTS = 32
+FIT_TASK_RESTARTS = 16
+
+# Iterações de Levenberg-Marquardt por lote de candidatos.
+FIT_MAX_ITERATIONS = 200
+
+# Resíduo máximo, relativo ao traço do tensor (e ao comprimento L para o
+# CoM e o envelope), de um ajuste convergido.
+FIT_TOLERANCE = 1e-9
+
+# Fração mínima da massa total em cada primitivo: sem ela o ajuste pode
+# "desligar" um primitivo, que ficaria com densidade absurda.
+MIN_MASS_FRACTION = 0.05
+
+# Dimensão mínima de cada primitivo, relativa ao comprimento L: sem ela o
+# ajuste pode achatar um primitivo até uma chapa de espessura nula.
+MIN_DIMENSION_RATIO = 0.05
+
+# Um primitivo ajustado, no referencial do alvo:
+#   kind:       'box' ou 'cylinder'
+#   mass:       massa do primitivo
+#   dimensions: extensões ao longo dos eixos X, Y e Z do corpo (cilindro:
+#               diâmetro, diâmetro e comprimento, com o eixo em Z)
+#   rotation:   matriz 3x3 cujas colunas são os eixos do corpo (det = +1)
+#   center:     posição do centro (e CoM) do primitivo
+PrimitiveFit = namedtuple('PrimitiveFit', ['kind', 'mass', 'dimensions', 'rotation', 'center'])
+
+# Resultado do ajuste de um alvo:
+#   primitives:  lista de PrimitiveFit
+#   error:       maior resíduo do tensor, relativo ao traço do alvo
+#   comError:    distância entre o CoM composto e o CoM alvo
+#   converged:   True se todos os resíduos ficaram abaixo de FIT_TOLERANCE
+#   restarts:    recomeços avaliados
+#   iterations:  iterações de Levenberg-Marquardt, somadas entre as tarefas
+FitResult = namedtuple('FitResult', ['primitives', 'error', 'comError', 'converged', 'restarts', 'iterations'])
+
+# Problema normalizado de um alvo (ver o docstring do módulo):
+#   cylinders (N,) bool, tensor (6,) alvo xx, yy, zz, xy, yz, xz com traço 1,
+#   lower/upper (3,) limites do envelope em unidades de L (None sem envelope),
+#   minFraction, minLog (log da dimensão mínima em unidades de L), tolerance,
+#   maxIterations.
+_Problem = namedtuple('_Problem', ['cylinders', 'tensor', 'lower', 'upper', 'minFraction', 'minLog',
+                                   'tolerance', 'maxIterations'])
+
+# Parâmetros por primitivo: w, x (3), u (3).
+_PARAMETERS = 7
+_PAIRS = ((0, 0), (1, 1), (2, 2), (0, 1), (1, 2), (0, 2))
+
+
+def _requireNumpy():
+    if np is None:
+        raise ImportError("O ajuste de primitivos requer o NumPy.")
+
+
+def _envelope(envelope):
+    lower, upper = (np.asarray(v, dtype=float) for v in envelope)
+    if lower.shape != (3,) or upper.shape != (3,) or np.any(upper <= lower):
+        raise ValueError("O envelope deve ser ((xmin, ymin, zmin), (xmax, ymax, zmax)) "
+                         "com máximo maior que mínimo em cada eixo.")
+    return lower, upper
+
+
+def prepareFitProblem(mass, com, tensor, primitives, envelope=None, minMassFraction=MIN_MASS_FRACTION,
+                      minDimensionRatio=MIN_DIMENSION_RATIO, tolerance=FIT_TOLERANCE,
+                      maxIterations=FIT_MAX_ITERATIONS):
+    """
+    Normaliza um alvo (massa, CoM, tensor 3x3 em relação ao CoM) para o
+    ajuste com os primitivos dados ('box' ou 'cylinder').
+    Retorna (problem, frame, length): frame é a matriz 3x3 do referencial dos
+    primitivos e length o comprimento L, para levar a solução de volta.
+    Levanta ValueError para alvos sem solução evidente.
+    """
+    _requireNumpy()
+    primitives = tuple(primitives)
+    unknown = [kind for kind in primitives if kind not in PRIMITIVE_KINDS]
+    if not primitives or unknown:
+        raise ValueError("Primitivos devem ser uma lista não vazia de {} (recebido {}).".format(
+            ', '.join(PRIMITIVE_KINDS), list(primitives)))
+    if mass <= 0:
+        raise ValueError("A massa alvo deve ser positiva (recebido {}).".format(mass))
+    if minMassFraction * len(primitives) >= 1:
+        raise ValueError("Fração mínima de massa {} impossível com {} primitivos.".format(
+            minMassFraction, len(primitives)))
+    com = np.asarray(com, dtype=float)
+    tensor = np.asarray(tensor, dtype=float)
+    tensor = (tensor + tensor.T) / 2
+    moments = np.linalg.eigvalsh(tensor)
+    if moments[0] <= 0 or moments[2] > moments[0] + moments[1]:
+        raise ValueError("O tensor alvo não é fisicamente realizável (momentos principais {}).".format(
+            ', '.join('{:.6g}'.format(m) for m in moments)))
+
+    length = np.sqrt(np.trace(tensor) / mass)
+    lower = upper = None
+    if envelope is None:
+        _, frame = np.linalg.eigh(tensor)
+        if np.linalg.det(frame) < 0:
+            frame[:, 2] = -frame[:, 2]
+    else:
+        frame = np.eye(3)
+        envelopeLower, envelopeUpper = _envelope(envelope)
+        if np.any(com <= envelopeLower) or np.any(com >= envelopeUpper):
+            raise ValueError("O CoM alvo {} está fora do envelope.".format(tuple(com)))
+        lower, upper = (envelopeLower - com) / length, (envelopeUpper - com) / length
+    local = frame.T @ tensor @ frame / (mass * length**2)
+    problem = _Problem(
+        np.array([kind == 'cylinder' for kind in primitives]),
+        np.array([local[a, b] for a, b in _PAIRS]),
+        lower, upper, float(minMassFraction), float(np.log(minDimensionRatio)), float(tolerance),
+        int(maxIterations))
+    return problem, frame, length
+
+
+def _evaluate(problem, theta, axes):
+    """
+    Resíduos (B, R) e jacobianos (B, R, 7N) de um lote de candidatos theta
+    (B, N, 7), com axes (B, N) o eixo de cada cilindro.
+    """
+    B, N, _ = theta.shape
+    w, x, u = theta[..., 0], theta[..., 1:4], theta[..., 4:7]
+    s = np.exp(w - w.max(axis=1, keepdims=True))
+    s /= s.sum(axis=1, keepdims=True)
+    size = np.exp(u)
+    sq = size * size
+    offDiagonal = 1.0 - np.eye(3)
+
+    # Tensor de cada primitivo em relação ao próprio CoM, por unidade de
+    # massa (q), e as derivadas em relação a u (B, N, componente, parâmetro).
+    qBox = (sq.sum(axis=-1, keepdims=True) - sq) / 12
+    dqBox = sq[..., None, :] / 6 * offDiagonal
+    onAxis = np.eye(3, dtype=bool)[axes]
+    radius2, length2 = sq[..., 0:1], sq[..., 1:2]
+    qCylinder = np.where(onAxis, radius2 / 2, (3 * radius2 + length2) / 12)
+    dqCylinder = np.stack([np.where(onAxis, radius2, radius2 / 2),
+                           np.where(onAxis, 0.0, length2 / 6),
+                           np.zeros_like(qCylinder)], axis=-1)
+    cylinders = problem.cylinders[None, :, None]
+    q = np.where(cylinders, qCylinder, qBox)
+    dq = np.where(cylinders[..., None], dqCylinder, dqBox)
+
+    # A = q + termo de eixos paralelos em relação ao CoM alvo, por unidade de massa.
+    x0, x1, x2 = x[..., 0], x[..., 1], x[..., 2]
+    A = np.stack([q[..., 0] + x1 * x1 + x2 * x2,
+                  q[..., 1] + x0 * x0 + x2 * x2,
+                  q[..., 2] + x0 * x0 + x1 * x1,
+                  -x0 * x1, -x1 * x2, -x0 * x2], axis=-1)
+    tensor = np.einsum('bn,bnk->bk', s, A)
+    firstMoment = np.einsum('bn,bnk->bk', s, x)
+    fraction = np.maximum(problem.minFraction - s, 0.0)
+    # O terceiro u dos cilindros não é uma dimensão.
+    used = ~(cylinders & (np.arange(3) == 2))
+    thinness = np.where(used, np.maximum(problem.minLog - u, 0.0), 0.0)
+    residuals = [tensor - problem.tensor, firstMoment, fraction, thinness.reshape(B, 3 * N)]
+
+    # Jacobianos por bloco, (B, R_bloco, N, 7).
+    J_tensor = np.zeros((B, 6, N, _PARAMETERS))
+    J_tensor[..., 0] = np.moveaxis(s[..., None] * (A - tensor[:, None, :]), 1, 2)
+    zero = np.zeros_like(x0)
+    dAdx = np.stack([
+        np.stack([zero, 2 * x1, 2 * x2], axis=-1),
+        np.stack([2 * x0, zero, 2 * x2], axis=-1),
+        np.stack([2 * x0, 2 * x1, zero], axis=-1),
+        np.stack([-x1, -x0, zero], axis=-1),
+        np.stack([zero, -x2, -x1], axis=-1),
+        np.stack([-x2, zero, -x0], axis=-1)], axis=2)
+    J_tensor[..., 1:4] = np.moveaxis(s[..., None, None] * dAdx, 1, 2)
+    J_tensor[:, :3, :, 4:7] = np.moveaxis(s[..., None, None] * dq, 1, 2)
+
+    eyeN = np.eye(N)
+    J_com = np.zeros((B, 3, N, _PARAMETERS))
+    J_com[..., 0] = np.moveaxis(s[..., None] * (x - firstMoment[:, None, :]), 1, 2)
+    J_com[..., 1:4] = s[:, None, :, None] * np.eye(3)[None, :, None, :]
+
+    J_fraction = np.zeros((B, N, N, _PARAMETERS))
+    dsdw = s[:, :, None] * (eyeN - s[:, None, :])
+    J_fraction[..., 0] = np.where((fraction > 0)[..., None], -dsdw, 0.0)
+
+    J_thinness = np.zeros((B, N, 3, N, _PARAMETERS))
+    J_thinness[..., 4:7] = -(eyeN[:, None, :, None] * np.eye(3)[None, :, None, :])[None]
+    J_thinness *= (thinness > 0)[..., None, None]
+    blocks = [J_tensor, J_com, J_fraction, J_thinness.reshape(B, 3 * N, N, _PARAMETERS)]
+
+    if problem.lower is not None:
+        # Meia extensão ao longo de cada eixo e a derivada em relação a u
+        # (B, N, eixo, parâmetro); as dimensões são exp(u).
+        extentBox = size / 2
+        dExtentBox = extentBox[..., None] * np.eye(3)
+        extentCylinder = np.where(onAxis, size[..., 1:2] / 2, size[..., 0:1])
+        dExtentCylinder = np.stack([np.where(onAxis, 0.0, extentCylinder),
+                                    np.where(onAxis, extentCylinder, 0.0),
+                                    np.zeros_like(extentCylinder)], axis=-1)
+        extent = np.where(cylinders, extentCylinder, extentBox)
+        dExtent = np.where(cylinders[..., None], dExtentCylinder, dExtentBox)
+        for sign, excess in ((1.0, x + extent - problem.upper), (-1.0, problem.lower - x + extent)):
+            active = excess > 0
+            residuals.append(np.where(active, excess, 0.0).reshape(B, 3 * N))
+            J_envelope = np.zeros((B, N, 3, N, _PARAMETERS))
+            J_envelope[..., 1:4] = (sign * eyeN[:, None, :, None] * np.eye(3)[None, :, None, :])[None]
+            J_envelope[..., 4:7] = eyeN[None, :, None, :, None] * dExtent[:, :, :, None, :]
+            J_envelope *= active[..., None, None]
+            blocks.append(J_envelope.reshape(B, 3 * N, N, _PARAMETERS))
+
+    r = np.concatenate(residuals, axis=1)
+    J = np.concatenate(blocks, axis=1).reshape(B, r.shape[1], N * _PARAMETERS)
+    return r, J
+
+
+def _initialCandidates(problem, rng, count):
+    """Candidatos iniciais aleatórios (count, N, 7) e os eixos dos cilindros (count, N)."""
+    N = len(problem.cylinders)
+    theta = np.empty((count, N, _PARAMETERS))
+    theta[..., 0] = rng.normal(0.0, 0.3, (count, N))
+    if problem.lower is None:
+        theta[..., 1:4] = rng.normal(0.0, 0.5, (count, N, 3))
+        theta[..., 4:7] = rng.normal(0.3, 0.3, (count, N, 3))
+    else:
+        # Centros na metade central do envelope e dimensões de um quarto dele.
+        span = problem.upper - problem.lower
+        middle = (problem.upper + problem.lower) / 2
+        theta[..., 1:4] = middle + span * rng.uniform(-0.25, 0.25, (count, N, 3))
+        theta[..., 4:7] = np.log(span / 4) + rng.normal(0.0, 0.2, (count, N, 3))
+    axes = rng.integers(0, 3, (count, N))
+    return theta, axes
+
+
+def _levenbergMarquardt(problem, theta, axes):
+    """
+    Minimiza os resíduos de todos os candidatos do lote ao mesmo tempo.
+    Para quando algum candidato converge (todos os resíduos abaixo da
+    tolerância) ou depois de maxIterations.
+    Retorna (theta, cost, residuals, iterations).
+    """
+    B, N, _ = theta.shape
+    P = N * _PARAMETERS
+    r, J = _evaluate(problem, theta, axes)
+    cost = np.einsum('br,br->b', r, r)
+    damping = np.full(B, 1e-3)
+    threshold = problem.tolerance**2
+    identity = np.eye(P)
+
+    iteration = 0
+    for iteration in range(1, problem.maxIterations + 1):
+        if np.any(np.abs(r).max(axis=1) < problem.tolerance):
+            break
+        JtJ = np.einsum('brp,brq->bpq', J, J)
+        gradient = np.einsum('brp,br->bp', J, r)
+        # Amortecimento de Marquardt (na escala da diagonal), com um piso para
+        # os parâmetros sem efeito (o terceiro u dos cilindros, o deslocamento
+        # comum dos pesos w).
+        diagonal = np.diagonal(JtJ, axis1=1, axis2=2)
+        system = JtJ + damping[:, None, None] * (diagonal[:, :, None] * identity + 1e-9 * identity)
+        step = np.linalg.solve(system, -gradient[..., None])[..., 0]
+        trial = theta + step.reshape(B, N, _PARAMETERS)
+        # Passos longos demais estouram exp(u); o custo não finito os rejeita.
+        with np.errstate(over='ignore', invalid='ignore'):
+            trialR, trialJ = _evaluate(problem, trial, axes)
+        trialCost = np.einsum('br,br->b', trialR, trialR)
+
+        accepted = np.isfinite(trialCost) & (trialCost < cost)
+        theta = np.where(accepted[:, None, None], trial, theta)
+        r = np.where(accepted[:, None], trialR, r)
+        J = np.where(accepted[:, None, None], trialJ, J)
+        cost = np.where(accepted, trialCost, cost)
+        damping = np.clip(np.where(accepted, damping / 3, damping * 4), 1e-12, 1e12)
+        if np.all(cost < threshold):
+            break
+    return theta, cost, r, iteration
+
+
+def _runTask(problem, seed, count):
+    """
+    Ajusta um grupo de count recomeços. Retorna (theta, axes, residual,
+    iterations) do melhor candidato: o primeiro convergido, ou o de menor custo.
+    """
+    rng = np.random.default_rng(seed)
+    theta, axes = _initialCandidates(problem, rng, count)
+    theta, cost, r, iterations = _levenbergMarquardt(problem, theta, axes)
+    worst = np.abs(r).max(axis=1)
+    converged = np.flatnonzero(worst < problem.tolerance)
+    best = converged[0] if len(converged) else int(np.argmin(cost))
+    return theta[best], axes[best], worst[best], iterations
+
+
+def _runWorkerTask(task):
+    return _runTask(*task)
+
+
+def _fitResult(problem, frame, length, mass, com, kinds, theta, axes, restarts, iterations):
+    """Leva a solução normalizada de volta às unidades e ao referencial do alvo."""
+    w, x, u = theta[:, 0], theta[:, 1:4], theta[:, 4:7]
+    s = np.exp(w - w.max())
+    s /= s.sum()
+    size = np.exp(u) * length
+    com = np.asarray(com, dtype=float)
+
+    primitives = []
+    for i, kind in enumerate(kinds):
+        center = com + frame @ (x[i] * length)
+        if kind == 'box':
+            rotation = frame
+            dimensions = tuple(size[i])
+        else:
+            # Permutação cíclica das colunas (det = +1) que leva o eixo do cilindro a Z.
+            axis = int(axes[i])
+            rotation = frame[:, [(axis + 1) % 3, (axis + 2) % 3, axis]]
+            dimensions = (2 * size[i, 0], 2 * size[i, 0], size[i, 1])
+        primitives.append(PrimitiveFit(kind, mass * s[i], dimensions,
+                                       tuple(tuple(row) for row in rotation), tuple(center)))
+
+    r, _ = _evaluate(problem, theta[None], axes[None])
+    r = r[0]
+    return FitResult(
+        primitives,
+        float(np.abs(r[:6]).max()),
+        float(np.linalg.norm(r[6:9]) * length),
+        bool(np.abs(r).max() < problem.tolerance),
+        restarts,
+        iterations
+    )
+
+
+def _taskCounts(restarts):
+    return [min(FIT_TASK_RESTARTS, restarts - start) for start in range(0, restarts, FIT_TASK_RESTARTS)]
+
+
+def fitPrimitivesBatch(targets, primitives=('box', 'box'), envelope=None, restarts=FIT_RESTARTS, seed=None,
+                       workers=None, minMassFraction=MIN_MASS_FRACTION, minDimensionRatio=MIN_DIMENSION_RATIO,
+                       tolerance=FIT_TOLERANCE, maxIterations=FIT_MAX_ITERATIONS, progress=None):
+    """
+    Ajusta os primitivos dados a cada alvo (massa, CoM, tensor 3x3 em relação
+    ao CoM[, envelope]); envelope ((xmin, ymin, zmin), (xmax, ymax, zmax)),
+    no referencial do alvo, vale para os alvos sem envelope próprio.
+    Retorna uma lista de FitResult, na ordem dos alvos; alvos inválidos
+    levantam ValueError antes de qualquer ajuste.
+
+    Os recomeços de cada alvo são divididos em tarefas de FIT_TASK_RESTARTS
+    candidatos; workers > 1 distribui as tarefas em um pool de processos
+    (None: número de CPUs). De cada alvo vale o primeiro candidato
+    convergido, na ordem das tarefas, ou o de menor custo. progress(done,
+    total), se dado, é chamado depois de cada tarefa.
+    """
+    _requireNumpy()
+    prepared = []
+    for target in targets:
+        mass, com, tensor = target[:3]
+        targetEnvelope = target[3] if len(target) > 3 else envelope
+        problem, frame, length = prepareFitProblem(mass, com, tensor, primitives, targetEnvelope, minMassFraction,
+                                                   minDimensionRatio, tolerance, maxIterations)
+        prepared.append((problem, frame, length, mass, com))
+
+    counts = _taskCounts(restarts)
+    tasks = []
+    for (problem, *_), targetSeed in zip(prepared, np.random.SeedSequence(seed).spawn(len(prepared))):
+        tasks.extend((problem, taskSeed, count) for taskSeed, count in zip(targetSeed.spawn(len(counts)), counts))
+
+    workers = workers or os.cpu_count() or 1
+    outcomes = []
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            for outcome in executor.map(_runWorkerTask, tasks, chunksize=max(1, len(tasks) // (4 * workers))):
+                outcomes.append(outcome)
+                if progress:
+                    progress(len(outcomes), len(tasks))
+    else:
+        for index, task in enumerate(tasks):
+            problem = task[0]
+            # Sem o pool, as tarefas restantes de um alvo já convergido são
+            # puladas; o resultado é o mesmo (vale o primeiro convergido).
+            first = index - index % len(counts)
+            if any(outcome is not None and outcome[2] < problem.tolerance for outcome in outcomes[first:index]):
+                outcomes.append(None)
+            else:
+                outcomes.append(_runTask(*task))
+            if progress:
+                progress(len(outcomes), len(tasks))
+
+    results = []
+    for index, (problem, frame, length, mass, com) in enumerate(prepared):
+        group = outcomes[index * len(counts):(index + 1) * len(counts)]
+        evaluated = [outcome for outcome in group if outcome is not None]
+        converged = [outcome for outcome in evaluated if outcome[2] < problem.tolerance]
+        theta, axes, _, _ = converged[0] if converged else min(evaluated, key=lambda outcome: outcome[2])
+        results.append(_fitResult(problem, frame, length, mass, com, primitives, theta, axes,
+                                  sum(count for count, outcome in zip(counts, group) if outcome is not None),
+                                  sum(outcome[3] for outcome in evaluated)))
+    return results
+
+
+def fitPrimitives(mass, com, tensor, primitives=('box', 'box'), envelope=None, restarts=FIT_RESTARTS, seed=None,
+                  workers=1, **options):
+    """
+    Ajusta os primitivos dados ('box' ou 'cylinder') a um alvo: massa, CoM e
+    tensor 3x3 em relação ao CoM, opcionalmente dentro de envelope
+    ((xmin, ymin, zmin), (xmax, ymax, zmax)). Retorna um FitResult.
+    Ver fitPrimitivesBatch para as demais opções.
+    """
+    return fitPrimitivesBatch([(mass, com, tensor)], primitives, envelope, restarts, seed,
+                              workers, **options)[0]
+
+
+def formatFitReport(result, lengthUnit='mm', massUnit='kg'):
+    """Texto do resultado de um ajuste: um primitivo por linha e os erros."""
+    lines = ['Ajuste {} (erro relativo do tensor {:.2e}, erro do CoM {:.3g} {}, {} recomeços)'.format(
+        'convergido' if result.converged else 'NÃO convergido', result.error, result.comError,
+        lengthUnit, result.restarts)]
+    for index, primitive in enumerate(result.primitives):
+        lines.append('  {} {}: massa {:.6g} {}, dimensões ({}) {}, centro ({}) {}'.format(
+            'Caixa' if primitive.kind == 'box' else 'Cilindro', index + 1, primitive.mass, massUnit,
+            ' × '.join('{:.4g}'.format(d) for d in primitive.dimensions), lengthUnit,
+            ', '.join('{:.4g}'.format(c) for c in primitive.center), lengthUnit))
+    return '\n'.join(lines)
@@ -1,147 +1,431 @@
 import adsk.fusion, adsk.core, traceback
+import contextlib
+from collections import namedtuple
 
+from .inertia_math import aggregateMassProperties, computeGlobalInertia, transformMassProperties
+from .transforms import composeTransforms, transformFromArray, IDENTITY_TRANSFORM
+from .profiling import traced, span
+from .mesh_math import meshMassProperties
+from .materials import getMaterialDensity
+
+# Snapshot das propriedades físicas de um corpo, lido do kernel uma única vez.
+#   mass:   massa em kg
+#   com:    centro de massa (x, y, z) em cm
+#   tensor: tensor de inércia 3x3 em relação à origem (0,0,0) em kg·cm²
+BodySnapshot = namedtuple('BodySnapshot', ['mass', 'com', 'tensor'])
+
+# Níveis de precisão do cálculo das propriedades físicas, do mais rápido ao mais
+# preciso. Os snapshots guardam o índice do nível em que foram lidos.
+ACCURACY_LEVELS = [
+    adsk.fusion.CalculationAccuracy.LowCalculationAccuracy,
+    adsk.fusion.CalculationAccuracy.MediumCalculationAccuracy,
+    adsk.fusion.CalculationAccuracy.HighCalculationAccuracy,
+    adsk.fusion.CalculationAccuracy.VeryHighCalculationAccuracy,
+]
+# body.physicalProperties calcula com a precisão baixa (padrão do Fusion).
+DEFAULT_ACCURACY_LEVEL = 0
+# Snapshots calculados em forma fechada são exatos.
+EXACT_ACCURACY_LEVEL = len(ACCURACY_LEVELS) - 1
+
+# Cache dos snapshots indexado pelo entityToken do corpo.
+# Cada entrada é (fingerprint, accuracyLevel, snapshot); o fingerprint muda quando
+# o corpo é alterado.
+_snapshotCache = {}
+
+# Tokens com snapshot lido do kernel (ou registrado) ainda não gravado no
+# cache em disco, e o cache em disco em uso (ver enableSnapshotStore).
+_unsavedTokens = set()
+_snapshotStore = None
+
+# Quando ligado (ver freshSnapshots), os snapshots em cache são ignorados e
+# todos os corpos são relidos do kernel.
+_bypassCache = False
+
+# Corpos de malha (scans, STL importados) não têm material no Fusion: a
+# densidade, em kg/cm³, é a atribuída por setMeshDensity, ou a do material do
+# componente, ou DEFAULT_MESH_DENSITY (aço, o material padrão do Fusion).
+DEFAULT_MESH_DENSITY = 7.85e-3
+_meshDensities = {}
+
+def getBodyFingerprint(body):
+    # O revisionId muda sempre que a geometria do corpo é modificada; o material
+    # altera a densidade sem alterar a geometria, por isso entra separadamente.
+    material = body.material
+    return (body.revisionId, material.id if material else None)
+
+@traced()
+def getBodySnapshot(body, accuracyLevel=DEFAULT_ACCURACY_LEVEL):
+    """
+    Retorna o BodySnapshot do corpo, consultando as propriedades físicas apenas
+    quando o corpo ainda não está no cache, foi alterado desde a última leitura
+    ou foi lido com precisão menor que accuracyLevel (índice de ACCURACY_LEVELS).
+    """
+    token = body.entityToken
+    fingerprint = getBodyFingerprint(body)
+    cached = _snapshotCache.get(token)
+    if cached is not None and _bypassCache:
+        # Relê na precisão do snapshot em cache, para comparar com ele.
+        accuracyLevel = max(accuracyLevel, cached[1])
+    elif cached is not None and cached[0] == fingerprint and cached[1] >= accuracyLevel:
+        return cached[2]
+
+    with span('BRepBody.physicalProperties'):
+        if accuracyLevel == DEFAULT_ACCURACY_LEVEL:
+            physProps = body.physicalProperties
+        else:
+            physProps = body.getPhysicalProperties(ACCURACY_LEVELS[accuracyLevel])
+        returnValue, Ixx, Iyy, Izz, Ixy, Iyz, Ixz = physProps.getXYZMomentsOfInertia()
+        comPoint = physProps.centerOfMass
+        mass = physProps.mass
+    snapshot = BodySnapshot(
+        mass,
+        (comPoint.x, comPoint.y, comPoint.z),
+        ((Ixx, Ixy, Ixz),
+         (Ixy, Iyy, Iyz),
+         (Ixz, Iyz, Izz))
+    )
+    _snapshotCache[token] = (fingerprint, accuracyLevel, snapshot)
+    _unsavedTokens.add(token)
+    return snapshot
+
+def setMeshDensity(body, density):
+    """Atribui ao corpo de malha a densidade (kg/cm³) usada no cálculo das propriedades de massa."""
+    _meshDensities[body.entityToken] = density
+
+def getMeshDensity(body):
+    density = _meshDensities.get(body.entityToken)
+    if density is None:
+        component = body.parentComponent
+        density = (getMaterialDensity(component.material) if component else None) or DEFAULT_MESH_DENSITY
+    return density
+
+def getMeshFingerprint(body):
+    return (body.revisionId, getMeshDensity(body))
+
+@traced()
+def getMeshSnapshot(body):
+    """
+    Retorna o BodySnapshot do corpo de malha, integrando a malha triangular
+    (ver mesh_math.py) apenas quando o corpo ainda não está no cache ou mudou
+    (geometria ou densidade) desde a última leitura. O resultado é exato para
+    a malha e fica no cache com o nível EXACT_ACCURACY_LEVEL.
+    """
+    token = body.entityToken
+    fingerprint = getMeshFingerprint(body)
+    cached = _snapshotCache.get(token)
+    if cached is not None and cached[0] == fingerprint and not _bypassCache:
+        return cached[2]
+
+    with span('MeshBody.displayMesh'):
+        mesh = body.displayMesh
+        coordinates = mesh.nodeCoordinatesAsDouble
+        indices = mesh.nodeIndices
+    with span('meshMassProperties'):
+        snapshot = BodySnapshot(*meshMassProperties(coordinates, indices, fingerprint[1]))
+    _snapshotCache[token] = (fingerprint, EXACT_ACCURACY_LEVEL, snapshot)
+    _unsavedTokens.add(token)
+    return snapshot
+
+def bodyCollections(component):
+    """
+    Corpos do próprio componente agrupados por tipo, com as funções de
+    fingerprint e de snapshot de cada tipo:
+      [(bRepBodies, getBodyFingerprint, getBodySnapshot),
+       (meshBodies, getMeshFingerprint, getMeshSnapshot)]
+    """
+    return [(component.bRepBodies, getBodyFingerprint, getBodySnapshot),
+            (component.meshBodies, getMeshFingerprint, getMeshSnapshot)]
+
+def getComponentFingerprint(component):
+    """Fingerprints de todos os corpos (B-Rep e malha) do próprio componente, em uma tupla."""
+    return tuple(fingerprintOf(body)
+                 for bodies, fingerprintOf, snapshotOf in bodyCollections(component)
+                 for body in bodies)
+
+def getSnapshotAccuracyLevel(body):
+    """Nível de precisão do snapshot em cache do corpo, ou None se não houver um válido."""
+    cached = _snapshotCache.get(body.entityToken)
+    if cached is not None and cached[0] == getBodyFingerprint(body):
+        return cached[1]
+    return None
+
+def primeBodySnapshot(body, snapshot, accuracyLevel=EXACT_ACCURACY_LEVEL):
+    """
+    Registra no cache um snapshot já conhecido (por exemplo, calculado de forma
+    analítica na criação do corpo), evitando a consulta ao kernel.
+    """
+    token = body.entityToken
+    _snapshotCache[token] = (getBodyFingerprint(body), accuracyLevel, BodySnapshot(*snapshot))
+    _unsavedTokens.add(token)
+
+@contextlib.contextmanager
+def freshSnapshots():
+    """
+    Dentro do bloco, getBodySnapshot e getMeshSnapshot ignoram o cache e releem
+    cada corpo do kernel; os snapshots relidos substituem os do cache. Pega
+    alterações que o fingerprint não percebeu.
+    """
+    global _bypassCache
+    _bypassCache = True
+    try:
+        yield
+    finally:
+        _bypassCache = False
+
+def clearSnapshotCache():
+    """Descarta todos os snapshots armazenados em memória (o cache em disco é mantido)."""
+    _snapshotCache.clear()
+    _unsavedTokens.clear()
+
+def enableSnapshotStore(path=None, maxEntries=None):
+    """
+    Liga o cache em disco dos snapshots (ver utils/snapshot_store.py):
+    getGlobalInertia passa a carregar dele, em lote, os corpos que não estão em
+    memória e a gravar nele os que precisaram ser lidos do kernel.
+    """
+    global _snapshotStore
+    from .snapshot_store import SnapshotStore, DEFAULT_STORE_PATH, DEFAULT_MAX_ENTRIES
+    if _snapshotStore is not None and _snapshotStore.path == (path or DEFAULT_STORE_PATH):
+        # Já aberto (por exemplo, em uma execução anterior do add-in).
+        return _snapshotStore
+    disableSnapshotStore()
+    _snapshotStore = SnapshotStore(path or DEFAULT_STORE_PATH, maxEntries or DEFAULT_MAX_ENTRIES)
+    return _snapshotStore
+
+def disableSnapshotStore():
+    global _snapshotStore
+    if _snapshotStore is not None:
+        _snapshotStore.close()
+        _snapshotStore = None
+
+def _storeScope(rootComp):
+    # Documentos ainda não salvos não têm dataFile e ficam fora do cache em disco.
+    dataFile = rootComp.parentDesign.parentDocument.dataFile
+    return dataFile.id if dataFile else None
+
+def loadSnapshotsFromStore(rootComp):
+    """
+    Carrega do cache em disco, em uma consulta por lote, os snapshots dos corpos
+    do design que não estão em memória e cujo fingerprint não mudou.
+    Retorna a quantidade de snapshots carregados.
+    """
+    scope = _storeScope(rootComp) if _snapshotStore is not None else None
+    if scope is None:
+        return 0
+    missing = {}
+    for body, fingerprintOf in iterDesignBodies(rootComp, withFingerprint=True):
+        token = body.entityToken
+        if token not in _snapshotCache:
+            missing[token] = (body, fingerprintOf)
+    if not missing:
+        return 0
+    loaded = 0
+    for token, (fingerprint, level, snapshot) in _snapshotStore.load(scope, missing).items():
+        body, fingerprintOf = missing[token]
+        if fingerprint == fingerprintOf(body):
+            _snapshotCache[token] = (fingerprint, level, BodySnapshot(*snapshot))
+            loaded += 1
+    return loaded
+
+def saveSnapshotsToStore(rootComp):
+    """Grava no cache em disco os snapshots lidos do kernel desde a última gravação."""
+    scope = _storeScope(rootComp) if _snapshotStore is not None else None
+    if scope is None or not _unsavedTokens:
+        return 0
+    entries = [(token,) + _snapshotCache[token] for token in _unsavedTokens if token in _snapshotCache]
+    _unsavedTokens.clear()
+    return _snapshotStore.save(scope, entries)
+
+@traced()
 def getInertiaTensor(body):
     try:
-        # Obtém as propriedades físicas com alta precisão.
-        physProps = body.physicalProperties
-        # Usa o método getCentroidMomentsOfInertia para obter os momentos principais e extrai principais valores.
-        returnValue, Ixx, Iyy, Izz, Ixy, Iyz, Ixz = physProps.getXYZMomentsOfInertia()  # Retorna um Vector3D
-        
-
-        # Monta o tensor de inércia 3x3 assumindo que os termos fora da diagonal são zero.
-        inertiaTensor = [
-            [Ixx, Ixy, Ixz],
-            [Ixy, Iyy, Iyz],
-            [Ixz, Iyz, Izz]
-        ]
-        return inertiaTensor
+        # Tensor de inércia em relação à origem, lido do snapshot do corpo.
+        return [list(row) for row in getBodySnapshot(body).tensor]
     except Exception as e:
         adsk.core.Application.get().userInterface.messageBox('Erro ao obter os momentos de inércia do centro:\n{}'.format(traceback.format_exc()))
         return None
     
+@traced()
 def getCenterOfMass(body):
     try:
-        physProps = body.physicalProperties
-        comPoint = physProps.centerOfMass
         # Retorna as coordenadas do centro de massa como uma tupla.
-        return (comPoint.x, comPoint.y, comPoint.z)
+        return getBodySnapshot(body).com
     except Exception as e:
         adsk.core.Application.get().userInterface.messageBox(
             'Erro ao obter o centro de massa do corpo:\n{}'.format(traceback.format_exc()))
         return None
     
+@traced()
 def getMass(body):
     try:
-        physProps = body.physicalProperties
-        mass = physProps.mass
-        return mass
+        return getBodySnapshot(body).mass
     except Exception as e:
         adsk.core.Application.get().userInterface.messageBox(
             'Erro ao obter a massa do corpo:\n{}'.format(traceback.format_exc()))
         return None
 
+@traced()
+def gatherSnapshots(bodies):
+    """
+    Percorre os corpos uma única vez e devolve os dados de cada snapshot em três
+    listas paralelas, prontas para o núcleo de cálculo (inertia_math):
+      (masses, coms, tensors) em kg, cm e kg·cm² (tensor em relação à origem).
+    """
+    masses = []
+    coms = []
+    tensors = []
+    for body in bodies:
+        m, com, tensor = getBodySnapshot(body)
+        masses.append(m)
+        coms.append(com)
+        tensors.append(tensor)
+    return masses, coms, tensors
+
+def gatherComponentSnapshots(component):
+    """Como gatherSnapshots, para os corpos B-Rep e de malha do próprio componente."""
+    masses, coms, tensors = gatherSnapshots(component.bRepBodies)
+    for body in component.meshBodies:
+        m, com, tensor = getMeshSnapshot(body)
+        masses.append(m)
+        coms.append(com)
+        tensors.append(tensor)
+    return masses, coms, tensors
+
+def transformFromMatrix3D(matrix):
+    """Converte um adsk.core.Matrix3D no par (R, t) usado pelo núcleo de cálculo."""
+    return transformFromArray(matrix.asArray())
+
+def iterOccurrences(component, transform=IDENTITY_TRANSFORM, path=()):
+    """
+    Gerador que percorre a árvore de ocorrências a partir de component, em
+    profundidade, produzindo (occurrence, transform, path) para cada ocorrência:
+      - transform é a transformação acumulada do componente da ocorrência até o
+        referencial de component;
+      - path é a tupla de entityTokens das ocorrências desde component, que
+        identifica a instância (uma mesma ocorrência nativa aparece em cada
+        instância do componente pai).
+    """
+    # As ocorrências do componente nativo (não proxy) têm transform2 relativa
+    # ao componente pai, então a composição é feita aqui explicitamente.
+    for occ in component.occurrences:
+        occTransform = composeTransforms(transform, transformFromMatrix3D(occ.transform2))
+        occPath = path + (occ.entityToken,)
+        yield occ, occTransform, occPath
+        yield from iterOccurrences(occ.component, occTransform, occPath)
+
+def iterDesignBodies(rootComp, withFingerprint=False):
+    """
+    Percorre uma única vez cada corpo do design (B-Rep e malha): os do rootComp
+    e os de cada componente instanciado. Com withFingerprint, produz pares
+    (body, função de fingerprint do tipo do corpo).
+    """
+    def iterComponents():
+        yield rootComp
+        components = set()
+        for occ, transform, path in iterOccurrences(rootComp):
+            component = occ.component
+            if component.entityToken not in components:
+                components.add(component.entityToken)
+                yield component
+
+    for component in iterComponents():
+        for bodies, fingerprintOf, snapshotOf in bodyCollections(component):
+            for body in bodies:
+                yield (body, fingerprintOf) if withFingerprint else body
+
+@traced()
+def getComponentMassProperties(component, memo=None):
+    """
+    Propriedades de massa dos corpos (B-Rep e malha) do próprio componente (sem as ocorrências
+    filhas), no referencial do componente: (mass, com, I_cm) em kg, cm e kg·cm².
+    Com memo, cada componente é avaliado uma única vez, independentemente do
+    número de instâncias.
+    """
+    key = component.entityToken
+    if memo is not None and key in memo:
+        return memo[key]
+    props = aggregateMassProperties(*gatherComponentSnapshots(component))
+    if memo is not None:
+        memo[key] = props
+    return props
+
+@traced()
+def gatherAssembly(rootComp):
+    """
+    Reúne as contribuições de todos os corpos do design (B-Rep e malha),
+    incluindo os das ocorrências aninhadas, no referencial do rootComp.
+    Cada componente é avaliado uma única vez no próprio referencial e depois
+    rotacionado e transladado para cada instância.
+    Retorna (masses, coms, tensors) como gatherSnapshots.
+    """
+    masses, coms, tensors = gatherComponentSnapshots(rootComp)
+    memo = {}
+    for occ, transform, path in iterOccurrences(rootComp):
+        mass, com, I_cm = getComponentMassProperties(occ.component, memo)
+        if mass == 0:
+            continue
+        com_root, I_origin = transformMassProperties(mass, com, I_cm, transform)
+        masses.append(mass)
+        coms.append(com_root)
+        tensors.append(I_origin)
+    return masses, coms, tensors
+
+@traced()
 def getGlobalCenterOfMass(rootComp):
     """
     Itera sobre todos os corpos (incluindo os aninhados) e calcula o centro de massa global.
     Retorna uma tupla ((globalX, globalY, globalZ), totalMass).
     """
-    totalMass = 0.0
-    sumWeightedX = 0.0
-    sumWeightedY = 0.0
-    sumWeightedZ = 0.0
-    
-    # Usamos allBRepBodies para incluir corpos de todas as ocorrências
-    bodies = rootComp.bRepBodies
-    for body in bodies:
-        mass = getMass(body)
-        com = getCenterOfMass(body)
-        sumWeightedX += com[0] * mass
-        sumWeightedY += com[1] * mass
-        sumWeightedZ += com[2] * mass
-        totalMass += mass
-    
+    totalMass, globalCOM, _ = aggregateMassProperties(*gatherAssembly(rootComp))
     if totalMass != 0:
-        globalX = sumWeightedX / totalMass
-        globalY = sumWeightedY / totalMass
-        globalZ = sumWeightedZ / totalMass
-        return ((globalX, globalY, globalZ), totalMass)
+        return (globalCOM, totalMass)
     return ((0,0,0), 0)
 
+def gatherGlobalSnapshots(rootComp):
+    """
+    gatherAssembly passando pelo cache em disco, se ligado (ver
+    enableSnapshotStore): os corpos ausentes da memória são antes carregados
+    dele em lote, e os lidos do kernel são gravados nele ao final.
+    Retorna (masses, coms, tensors), só com dados Python: o cálculo sobre eles
+    pode rodar fora da thread da interface (ver worker.py).
+    """
+    if _snapshotStore is not None:
+        loadSnapshotsFromStore(rootComp)
+    snapshots = gatherAssembly(rootComp)
+    if _snapshotStore is not None:
+        saveSnapshotsToStore(rootComp)
+    return snapshots
+
+@traced()
 def getGlobalInertia(rootComp):
     """
-    Calcula o tensor de inércia global do componente, seguindo dois passos:
-      1. Para cada corpo, transfere o tensor de inércia (obtido em kg·cm²)
-         da origem (0,0,0) para o centro de massa do corpo (I_cm).
-      2. Transfere I_cm para o centro de massa global do componente (I_global)
-         usando o teorema dos eixos paralelos.
+    Calcula o tensor de inércia global do componente:
+      1. Lê o snapshot de cada corpo (massa, CoM e tensor em relação à origem,
+         em kg·cm²) em uma única passada, incluindo os corpos das ocorrências
+         aninhadas (ver gatherAssembly).
+      2. Entrega os arrays ao núcleo de cálculo (inertia_math), que acumula
+         m, m·p e I_origin e transfere o tensor para o centro de massa global
+         uma única vez, usando o teorema dos eixos paralelos:
+           I_global = ΣI_origin - M * (||c||² * I3 - c * c^T)
+    
+    Com o cache em disco ligado (enableSnapshotStore), os corpos ausentes da
+    memória são antes carregados dele em lote, e os lidos do kernel são
+    gravados nele ao final.
     
-    Conversões aplicadas:
-      - Massa: de kg para g (m_g = m * 1000).
+    Conversões aplicadas (uma única vez, sobre o resultado):
       - Centro de massa: de cm para mm (multiplicar por 10).
       - Tensor: de kg·cm² para g·mm² (multiplicar por 100000).
     
     Retorna:
       (I_total, totalMass, globalCOM_mm)
       onde:
-        - I_total é o tensor de inércia global (soma de todos os I_global) em g·mm²,
+        - I_total é o tensor de inércia global em relação ao CoM global em g·mm²,
         - totalMass é a massa total em kg,
         - globalCOM_mm é o centro de massa global em mm (tupla).
     """
     try:
-        # Primeiro, obtenha o centro de massa global e a massa total usando uma função auxiliar.
-        # globalCOM_cm é em cm.
-        globalCOM_cm, totalMass = getGlobalCenterOfMass(rootComp)
-        # Converte o centro de massa global para mm:
-        globalCOM_mm = (globalCOM_cm[0]*10, globalCOM_cm[1]*10, globalCOM_cm[2]*10)
-        
-        # Inicializa o tensor global (3x3) com zeros (em g·mm²)
-        I_total = [[0.0, 0.0, 0.0],
-                   [0.0, 0.0, 0.0],
-                   [0.0, 0.0, 0.0]]
-        
-        # Matriz identidade 3x3
-        I3 = [[1, 0, 0],
-              [0, 1, 0],
-              [0, 0, 1]]
-        
-        # Itera em todos os corpos (incluindo os aninhados) do componente
-        bodies = rootComp.bRepBodies
-        for body in bodies:
-            # Massa em kg e convertida para g.
-            m = getMass(body)  # kg
-            m_g = m * 1000     # g
-            
-            # Centro de massa do corpo (em cm), convertido para mm.
-            com_body_cm = getCenterOfMass(body)  # (cm)
-            com_body_mm = (com_body_cm[0]*10, com_body_cm[1]*10, com_body_cm[2]*10)
-            
-            # Obtenha o tensor de inércia do corpo relativo à origem (em kg·cm²) e converta para g·mm².
-            I_origin = getInertiaTensor(body)  # 3x3, kg·cm²
-            I_origin_gmm2 = [[elem * 100000 for elem in row] for row in I_origin]
-            
-            # --- Passo 1: Transferir do ponto (0,0,0) para o centro de massa do corpo ---
-            # Para isso, usamos:
-            # I_cm = I_origin - m_g * (||p||² * I3 - p * p^T)
-            # onde p = com_body_mm (vetor do corpo em mm)
-            norm_com = com_body_mm[0]**2 + com_body_mm[1]**2 + com_body_mm[2]**2
-            I_parallel_sub = [[ m_g * (norm_com * I3[i][j] - com_body_mm[i]*com_body_mm[j]) for j in range(3)] for i in range(3)]
-            I_cm = [[ I_origin_gmm2[i][j] - I_parallel_sub[i][j] for j in range(3)] for i in range(3)]
-            
-            # --- Passo 2: Transferir I_cm para o centro de massa global ---
-            # d = globalCOM_mm - com_body_mm (em mm)
-            d = [globalCOM_mm[i] - com_body_mm[i] for i in range(3)]
-            norm_d = d[0]**2 + d[1]**2 + d[2]**2
-            I_parallel_add = [[ m_g * (norm_d * I3[i][j] - d[i]*d[j]) for j in range(3)] for i in range(3)]
-            I_global = [[ I_cm[i][j] + I_parallel_add[i][j] for j in range(3)] for i in range(3)]
-            
-            # Soma o tensor transferido de cada corpo no tensor global
-            for i in range(3):
-                for j in range(3):
-                    I_total[i][j] += I_global[i][j]
-        
-        return I_total, totalMass, globalCOM_mm
+        return computeGlobalInertia(*gatherGlobalSnapshots(rootComp))
     except Exception as e:
         adsk.core.Application.get().userInterface.messageBox(
             "Erro ao computar o tensor de inércia global:\n{}".format(traceback.format_exc()))
         return None, None, None
-    
\ No newline at end of file
@@ -0,0 +1,176 @@
+import adsk.core, adsk.fusion, traceback
+
+from .getters import (getComponentMassProperties, iterOccurrences, gatherAssembly,
+                      bodyCollections, getComponentFingerprint, freshSnapshots)
+from .inertia_math import (InertiaAggregate, transformMassProperties, computeGlobalInertia,
+                           inertiaResultsMatch)
+
+_incremental_handlers = []  # Lista local para armazenar os handlers
+
+# A cada quantas atualizações o agregado incremental é comparado com um recálculo completo.
+CONSISTENCY_CHECK_INTERVAL = 50
+
+# Trackers mantidos entre execuções do add-in, indexados pelo entityToken do rootComp.
+_trackers = {}
+
+class IncrementalInertia:
+    """
+    Mantém o tensor de inércia global do design atualizado de forma incremental.
+
+    Cada corpo do rootComp e cada instância de ocorrência é uma contribuição do
+    InertiaAggregate, identificada pelo entityToken do corpo ou pelo caminho da
+    ocorrência. Em refresh(), apenas as contribuições cujo fingerprint mudou
+    (geometria, material ou posição) são subtraídas e somadas de novo; as
+    demais não geram nenhuma consulta ao kernel.
+    """
+
+    def __init__(self, rootComp, checkInterval=CONSISTENCY_CHECK_INTERVAL):
+        self.rootComp = rootComp
+        self.checkInterval = checkInterval
+        self.aggregate = InertiaAggregate()
+        self._fingerprints = {}
+        self._updatesSinceCheck = 0
+
+    def refresh(self):
+        """
+        Atualiza o agregado com as alterações do design desde a última chamada.
+        Retorna o número de contribuições adicionadas, removidas ou alteradas.
+        """
+        seen = set()
+        changed = 0
+
+        for bodies, fingerprintOf, snapshotOf in bodyCollections(self.rootComp):
+            for body in bodies:
+                key = body.entityToken
+                fingerprint = fingerprintOf(body)
+                seen.add(key)
+                if self._fingerprints.get(key) != fingerprint:
+                    m, com, tensor = snapshotOf(body)
+                    self.aggregate.add(key, m, com, tensor)
+                    self._fingerprints[key] = fingerprint
+                    changed += 1
+
+        componentFingerprints = {}
+        memo = {}
+        for occ, transform, path in iterOccurrences(self.rootComp):
+            component = occ.component
+            componentKey = component.entityToken
+            if componentKey not in componentFingerprints:
+                componentFingerprints[componentKey] = getComponentFingerprint(component)
+            fingerprint = (componentFingerprints[componentKey], transform)
+            seen.add(path)
+            if self._fingerprints.get(path) != fingerprint:
+                mass, com, I_cm = getComponentMassProperties(component, memo)
+                com_root, I_origin = transformMassProperties(mass, com, I_cm, transform)
+                self.aggregate.add(path, mass, com_root, I_origin)
+                self._fingerprints[path] = fingerprint
+                changed += 1
+
+        for key in [key for key in self._fingerprints if key not in seen]:
+            self.aggregate.remove(key)
+            del self._fingerprints[key]
+            changed += 1
+
+        self._updatesSinceCheck += changed
+        return changed
+
+    def result(self):
+        """Retorna (I_total, totalMass, globalCOM_mm), como getGlobalInertia."""
+        return self.aggregate.result()
+
+    def isDueForCheck(self):
+        return self._updatesSinceCheck >= self.checkInterval
+
+    def checkConsistency(self, rtol=1e-6):
+        """
+        Compara o agregado incremental com um recálculo completo a partir de
+        leituras novas do kernel (sem o cache de snapshots). Se divergirem, por
+        acúmulo de arredondamento ou por uma alteração que os fingerprints não
+        perceberam, o agregado é reconstruído com os valores relidos.
+        Retorna True se os resultados coincidiam.
+        """
+        with freshSnapshots():
+            full = computeGlobalInertia(*gatherAssembly(self.rootComp))
+        consistent = inertiaResultsMatch(self.result(), full, rtol)
+        if not consistent:
+            self.rebuild()
+        self._updatesSinceCheck = 0
+        return consistent
+
+    def rebuild(self):
+        """Descarta o agregado e o reconstrói a partir do design atual."""
+        self.aggregate.clear()
+        self._fingerprints.clear()
+        self.refresh()
+
+
+def getIncrementalTracker(rootComp):
+    """
+    Retorna o IncrementalInertia do design, criando-o na primeira chamada e,
+    nas seguintes, apenas atualizando-o com o que mudou desde a última
+    execução. Usado no modo add-in, em que o módulo permanece carregado.
+    """
+    key = rootComp.entityToken
+    tracker = _trackers.get(key)
+    if tracker is None:
+        tracker = _trackers[key] = IncrementalInertia(rootComp)
+    else:
+        # O objeto da API pode ter sido recriado desde a última execução.
+        tracker.rootComp = rootComp
+    tracker.refresh()
+    return tracker
+
+def start_incremental_inertia(ui, handlers, rootComp, on_update=None):
+    """
+    Inicia o modo residente: o tensor global é atualizado a cada comando
+    concluído no Fusion, e on_update(result, consistent) é chamado quando algo
+    muda. consistent é None quando não houve verificação nesta atualização.
+    Retorna o IncrementalInertia criado.
+    """
+    try:
+        tracker = getIncrementalTracker(rootComp)
+
+        # Em modo add-in o design pode já estar sendo acompanhado por uma execução anterior.
+        registered = [h for h in _incremental_handlers if h.tracker is tracker]
+        if registered:
+            registered[0].on_update = on_update
+        else:
+            onCommandTerminated = DesignChangedHandler(tracker, on_update)
+            ui.commandTerminated.add(onCommandTerminated)
+            handlers.append(onCommandTerminated)
+            _incremental_handlers.append(onCommandTerminated)
+
+        if on_update:
+            on_update(tracker.result(), None)
+        return tracker
+    except Exception as e:
+        ui.messageBox('Erro ao iniciar o modo residente:\n{}'.format(traceback.format_exc()))
+        return None
+
+def stop_incremental_inertia(ui):
+    try:
+        for handler in _incremental_handlers:
+            ui.commandTerminated.remove(handler)
+        _incremental_handlers.clear()
+        _trackers.clear()
+    except Exception as e:
+        pass
+
+class DesignChangedHandler(adsk.core.ApplicationCommandEventHandler):
+    def __init__(self, tracker, on_update=None):
+        super().__init__()
+        self.tracker = tracker
+        self.on_update = on_update
+
+    def notify(self, args):
+        try:
+            if self.tracker.refresh() == 0:
+                return
+            consistent = None
+            if self.tracker.isDueForCheck():
+                consistent = self.tracker.checkConsistency()
+            if self.on_update:
+                self.on_update(self.tracker.result(), consistent)
+        except Exception as e:
+            adsk.core.Application.get().userInterface.messageBox(
+                'Erro ao atualizar o tensor de inércia:\n{}'.format(traceback.format_exc()))
@@ -0,0 +1,276 @@
+"""
+Núcleo de cálculo das propriedades de massa, sem dependência do adsk.
+
+Todas as funções trabalham sobre arrays empilhados:
+  masses:  (N,)     massas em kg
+  coms:    (N,3)    centros de massa em cm
+  tensors: (N,3,3)  tensores de inércia em relação à origem em kg·cm²
+
+As unidades internas são as do Fusion (kg, cm, kg·cm²); a conversão para as
+unidades do relatório (kg, mm, g·mm²) é aplicada uma única vez sobre o resultado.
+"""
+
+import math
+
+from .transforms import IDENTITY_TRANSFORM
+from .mass_properties import MassProperties, rotateSymmetric, parallelAxisSymmetric
+
+try:
+    import numpy as np
+except ImportError:  # O Python embarcado no Fusion nem sempre traz o NumPy.
+    np = None
+
+# Fatores de conversão das unidades internas do Fusion para as do relatório.
+LENGTH_CM_TO_MM = 10.0
+INERTIA_KGCM2_TO_GMM2 = 100000.0
+
+# Contribuições agregadas por bloco em aggregateInChunks: cada bloco é um
+# ponto de progresso e de cancelamento dos jobs em segundo plano.
+AGGREGATION_CHUNK_SIZE = 1 << 12
+
+
+def parallelAxisTerms(masses, offsets):
+    """
+    Termo do teorema dos eixos paralelos para cada contribuição:
+      m * (||d||² * I3 - d * d^T)
+    masses (N,), offsets (N,3) -> (N,3,3).
+    """
+    m = np.asarray(masses, dtype=float)
+    d = np.asarray(offsets, dtype=float).reshape(-1, 3)
+    norm_d = np.einsum('ni,ni->n', d, d)
+    terms = -np.einsum('n,ni,nj->nij', m, d, d)
+    idx = np.arange(3)
+    terms[:, idx, idx] += (m * norm_d)[:, None]
+    return terms
+
+
+def originToCentroid(masses, coms, tensors):
+    """
+    Transfere cada tensor da origem para o centro de massa do próprio corpo:
+      I_cm = I_origin - m * (||p||² * I3 - p * p^T)
+    Retorna um array (N,3,3) em kg·cm².
+    """
+    tensors = np.asarray(tensors, dtype=float).reshape(-1, 3, 3)
+    return tensors - parallelAxisTerms(masses, coms)
+
+
+def aggregateMassProperties(masses, coms, tensors):
+    """
+    Combina N contribuições em uma só.
+    Retorna (totalMass, globalCOM, I_cm), com a massa em kg, o CoM global em cm
+    e o tensor em relação ao CoM global em kg·cm² (lista 3x3).
+    """
+    if np is None:
+        return _aggregateMassPropertiesPython(masses, coms, tensors)
+
+    m = np.asarray(masses, dtype=float).reshape(-1)
+    if m.size == 0:
+        return 0.0, (0.0, 0.0, 0.0), [[0.0] * 3 for _ in range(3)]
+    p = np.asarray(coms, dtype=float).reshape(-1, 3)
+    I = np.asarray(tensors, dtype=float).reshape(-1, 3, 3)
+
+    totalMass = float(m.sum())
+    if totalMass == 0:
+        return 0.0, (0.0, 0.0, 0.0), [[0.0] * 3 for _ in range(3)]
+
+    # Σ m·p e Σ I_origin; o deslocamento para o CoM global é aplicado uma única vez.
+    c = (m @ p) / totalMass
+    I_cm = originToCentroid([totalMass], [c], I.sum(axis=0))[0]
+    return totalMass, tuple(c.tolist()), I_cm.tolist()
+
+
+def _aggregateMassPropertiesPython(masses, coms, tensors):
+    # Mesma conta de aggregateMassProperties, em Python puro.
+    totalMass = 0.0
+    firstMoment = [0.0, 0.0, 0.0]
+    I_origin = [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]]
+    for m, com, tensor in zip(masses, coms, tensors):
+        totalMass += m
+        for i in range(3):
+            firstMoment[i] += m * com[i]
+            for j in range(3):
+                I_origin[i][j] += tensor[i][j]
+    return (totalMass,) + centroidalFromMoments(totalMass, firstMoment, I_origin)
+
+
+def centroidalFromMoments(totalMass, firstMoment, I_origin):
+    """
+    A partir da massa total, do primeiro momento Σ m·p e do tensor em relação à
+    origem ΣI_origin, retorna (globalCOM, I_cm) com o tensor em relação ao CoM global.
+    """
+    if totalMass == 0:
+        return (0.0, 0.0, 0.0), [[0.0] * 3 for _ in range(3)]
+    c = [s / totalMass for s in firstMoment]
+    norm_c = c[0]**2 + c[1]**2 + c[2]**2
+    I_cm = [[I_origin[i][j] - totalMass * ((norm_c if i == j else 0.0) - c[i]*c[j])
+             for j in range(3)] for i in range(3)]
+    return tuple(c), I_cm
+
+
+def toReportUnits(globalCOM, I_cm):
+    """
+    Converte o CoM (cm -> mm) e o tensor (kg·cm² -> g·mm²) para as unidades do relatório.
+    Retorna (I_total, globalCOM_mm).
+    """
+    I_total = [[elem * INERTIA_KGCM2_TO_GMM2 for elem in row] for row in I_cm]
+    globalCOM_mm = tuple(x * LENGTH_CM_TO_MM for x in globalCOM)
+    return I_total, globalCOM_mm
+
+
+def computeGlobalInertia(masses, coms, tensors):
+    """
+    Calcula o tensor de inércia global a partir dos arrays de massas, CoMs e
+    tensores em relação à origem.
+    Retorna (I_total, totalMass, globalCOM_mm), nas mesmas unidades de getGlobalInertia.
+    """
+    totalMass, globalCOM, I_cm = aggregateMassProperties(masses, coms, tensors)
+    I_total, globalCOM_mm = toReportUnits(globalCOM, I_cm)
+    return I_total, totalMass, globalCOM_mm
+
+
+def aggregateInChunks(masses, coms, tensors, progress=None, chunkSize=AGGREGATION_CHUNK_SIZE):
+    """
+    Mesmo resultado de computeGlobalInertia, calculado em blocos de chunkSize
+    contribuições, para uso em segundo plano (ver worker.py): progress(done,
+    total), se dado, é chamado depois de cada bloco e pode interromper o
+    cálculo lançando uma exceção.
+    """
+    total = len(masses)
+    partials = []
+    for start in range(0, total, chunkSize):
+        stop = min(start + chunkSize, total)
+        mass, com, I_cm = aggregateMassProperties(masses[start:stop], coms[start:stop], tensors[start:stop])
+        partials.append(MassProperties(mass, com, I_cm))
+        if progress:
+            progress(stop, total)
+    return MassProperties.combine(partials).asResult()
+
+
+def formatInertiaReport(I_total, totalMass, globalCOM_mm):
+    """
+    Texto do relatório de um resultado de getGlobalInertia/computeGlobalInertia,
+    o mesmo no Fusion (paleta de texto) e na CLI offline.
+    """
+    return "Tensor Global (g·mm²): {}\nMassa Total (kg): {}\nCentro de Massa Global (mm): {}".format(
+        I_total, totalMass, globalCOM_mm)
+
+
+# --- Transformações rígidas -------------------------------------------------
+# As transformações são pares (R, t) de utils/transforms.py, com t em cm.
+
+def transformMassProperties(mass, com, I_cm, transform):
+    """
+    Leva as propriedades de massa de um referencial local para o referencial pai.
+      com' = R·com + t
+      I_origin' = R·I_cm·R^T + m * (||com'||² * I3 - com' * com'^T)
+    I_cm deve ser simétrico. Retorna (com', I_origin') em cm e kg·cm².
+    """
+    R, t = transform
+    (r00, r01, r02), (r10, r11, r12), (r20, r21, r22) = R
+    x, y, z = com
+    cx = r00 * x + r01 * y + r02 * z + t[0]
+    cy = r10 * x + r11 * y + r12 * z + t[1]
+    cz = r20 * x + r21 * y + r22 * z + t[2]
+    xx, yy, zz, xy, yz, xz = rotateSymmetric(R, I_cm[0][0], I_cm[1][1], I_cm[2][2],
+                                             I_cm[0][1], I_cm[1][2], I_cm[0][2])
+    sxx, syy, szz, sxy, syz, sxz = parallelAxisSymmetric(mass, cx, cy, cz)
+    I_origin = [[xx + sxx, xy + sxy, xz + sxz],
+                [xy + sxy, yy + syy, yz + syz],
+                [xz + sxz, yz + syz, zz + szz]]
+    return (cx, cy, cz), I_origin
+
+
+def boxMassProperties(width, height, depth, density, transform=IDENTITY_TRANSFORM):
+    """
+    Propriedades de massa, em forma fechada, de uma caixa sólida com dimensões
+    width, height e depth (cm) ao longo dos eixos X, Y e Z do próprio corpo,
+    centrada na origem do corpo e levada ao referencial pai por transform.
+    density em kg/cm³.
+    Retorna (mass, com, I_origin) em kg, cm e kg·cm², como um BodySnapshot.
+    """
+    mass = density * width * height * depth
+    I_cm = [[mass / 12 * (height**2 + depth**2), 0.0, 0.0],
+            [0.0, mass / 12 * (width**2 + depth**2), 0.0],
+            [0.0, 0.0, mass / 12 * (width**2 + height**2)]]
+    com, I_origin = transformMassProperties(mass, (0.0, 0.0, 0.0), I_cm, transform)
+    return mass, com, tuple(tuple(row) for row in I_origin)
+
+
+def cylinderMassProperties(radius, length, density, transform=IDENTITY_TRANSFORM):
+    """
+    Propriedades de massa, em forma fechada, de um cilindro sólido de raio
+    radius e comprimento length (cm), com o eixo ao longo do Z do próprio
+    corpo, centrado na origem do corpo e levado ao referencial pai por
+    transform. density em kg/cm³.
+    Retorna (mass, com, I_origin) em kg, cm e kg·cm², como um BodySnapshot.
+    """
+    mass = density * math.pi * radius**2 * length
+    transverse = mass / 12 * (3 * radius**2 + length**2)
+    I_cm = [[transverse, 0.0, 0.0],
+            [0.0, transverse, 0.0],
+            [0.0, 0.0, mass / 2 * radius**2]]
+    com, I_origin = transformMassProperties(mass, (0.0, 0.0, 0.0), I_cm, transform)
+    return mass, com, tuple(tuple(row) for row in I_origin)
+
+
+# --- Agregado incremental ---------------------------------------------------
+
+class InertiaAggregate:
+    """
+    Mantém a soma corrente das contribuições, como um MassProperties, com as
+    contribuições indexadas por uma chave. Adicionar, remover ou substituir
+    uma contribuição custa O(1).
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.total = MassProperties()
+        self.contributions = {}
+
+    def __len__(self):
+        return len(self.contributions)
+
+    def __contains__(self, key):
+        return key in self.contributions
+
+    @property
+    def totalMass(self):
+        return self.total.mass
+
+    def add(self, key, mass, com, I_origin):
+        """Adiciona (ou substitui) a contribuição key: massa em kg, CoM em cm, I_origin em kg·cm²."""
+        self.remove(key)
+        props = MassProperties.fromOrigin(mass, com, I_origin)
+        self.contributions[key] = props
+        self.total = self.total + props
+
+    def remove(self, key):
+        """Subtrai a contribuição key, se existir."""
+        old = self.contributions.pop(key, None)
+        if old is not None:
+            self.total = self.total - old
+        if not self.contributions:
+            # Zera o acumulado para não carregar resíduo de arredondamento.
+            self.clear()
+
+    def result(self):
+        """Retorna (I_total, totalMass, globalCOM_mm), nas mesmas unidades de getGlobalInertia."""
+        return self.total.asResult()
+
+
+def inertiaResultsMatch(a, b, rtol=1e-6):
+    """
+    Compara dois resultados (I_total, totalMass, globalCOM_mm) com tolerância
+    relativa à escala de cada grandeza.
+    """
+    I_a, m_a, c_a = a
+    I_b, m_b, c_b = b
+    if abs(m_a - m_b) > rtol * max(abs(m_a), abs(m_b), 1e-12):
+        return False
+    scaleC = max(max(abs(x) for x in c_a), max(abs(x) for x in c_b), 1.0)
+    if any(abs(x - y) > rtol * scaleC for x, y in zip(c_a, c_b)):
+        return False
+    scaleI = max(max(abs(x) for row in I_a for x in row), max(abs(x) for row in I_b for x in row), 1e-12)
+    return all(abs(I_a[i][j] - I_b[i][j]) <= rtol * scaleI for i in range(3) for j in range(3))
@@ -1,8 +1,18 @@
 import adsk.core, adsk.fusion, adsk.cam, traceback
 
+from .profiling import traced
+from .preview import InertiaPreview, PreviewInputChangedHandler, PreviewExecuteHandler, readPreviewCells
+
 _inertia_handlers = []  # Lista local para armazenar os handlers
+_createdHandler = None  # Handler de commandCreated, registrado uma única vez por definição
+
+INERTIA_INPUT_IDS = [[f'inertia_row{row}_col{col}' for col in range(1, 4)] for row in range(1, 4)]
+
+def _readTensor(inputs):
+    return [readPreviewCells(inputs, ids) for ids in INERTIA_INPUT_IDS]
 
-def start_inertia_table(ui, handlers, on_data_received=None):
+def start_inertia_table(ui, handlers, on_data_received=None, com_values=None):
+    global _createdHandler
     try:
         cmdDef = ui.commandDefinitions.itemById('InertiaTensorTableCommand')
         if not cmdDef:
@@ -12,10 +22,17 @@ def start_inertia_table(ui, handlers, on_data_received=None):
                 'Insira os valores do tensor de inércia (3x3)',
                 ''
             )
+            _createdHandler = None
         
-        onCmdCreated = InertiaTensorTableCommandCreatedHandler(on_data_received)
-        cmdDef.commandCreated.add(onCmdCreated)
-        handlers.append(onCmdCreated)
+        # Em modo add-in a definição sobrevive entre execuções: o handler é
+        # registrado uma única vez e nas execuções seguintes só troca o callback.
+        if _createdHandler is None:
+            _createdHandler = InertiaTensorTableCommandCreatedHandler(on_data_received, com_values)
+            cmdDef.commandCreated.add(_createdHandler)
+            handlers.append(_createdHandler)
+        else:
+            _createdHandler.on_data_received = on_data_received
+            _createdHandler.com_values = com_values
         
         cmdDef.execute()
         adsk.autoTerminate(False)
@@ -23,18 +40,23 @@ def start_inertia_table(ui, handlers, on_data_received=None):
         pass
 
 def stop_inertia_table(ui):
+    global _createdHandler
     try:
         cmdDef = ui.commandDefinitions.itemById('InertiaTensorTableCommand')
         if cmdDef:
             cmdDef.deleteMe()
+        _createdHandler = None
     except Exception as e:
         pass
 
 class InertiaTensorTableCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
-    def __init__(self, on_data_received=None):
+    def __init__(self, on_data_received=None, com_values=None):
         super().__init__()
         self.on_data_received = on_data_received
+        # CoM e massa da tabela anterior, usados na prévia (sem eles, não há prévia).
+        self.com_values = com_values
 
+    @traced()
     def notify(self, args):
         try:
             cmd = args.command
@@ -59,34 +81,46 @@ class InertiaTensorTableCommandCreatedHandler(adsk.core.CommandCreatedEventHandl
                 labelInput = inputs.addStringValueInput(f'inertia_label_row{row}', '', rowLabels[row-1])
                 labelInput.isReadOnly = True
                 table.addCommandInput(labelInput, row, 0, 0, 0)
-                for col in range(1, 4):
-                    input_id = f'inertia_row{row}_col{col}'
+                for col, input_id in enumerate(INERTIA_INPUT_IDS[row - 1], start=1):
                     dataInput = inputs.addStringValueInput(input_id, '', '0.0')
                     table.addCommandInput(dataInput, row, col, 0, 0)
 
             onExecute = InertiaTensorTableOKHandler(self.on_data_received)
             cmd.execute.add(onExecute)
-            _inertia_handlers.append(onExecute)
+            # Só o comando atual precisa dos handlers; os anteriores já terminaram.
+            _inertia_handlers[:] = [onExecute]
+
+            if self.com_values is not None:
+                # Prévia: caixa resolvida, eixos principais e o efeito no tensor global.
+                com_values = self.com_values
+                readCells = lambda inputs: (com_values, _readTensor(inputs))
+                preview = InertiaPreview()
+                preview.update(*readCells(inputs))
+                inputs.addTextBoxCommandInput('inertia_preview', 'Prévia', preview.summary(), 5, True)
+
+                onInputChanged = PreviewInputChangedHandler(preview, 'inertia_preview', readCells)
+                cmd.inputChanged.add(onInputChanged)
+                onPreview = PreviewExecuteHandler(preview, 'inertia_preview')
+                cmd.executePreview.add(onPreview)
+                onExecute.preview = preview
+                _inertia_handlers.extend([onInputChanged, onPreview])
         except Exception as e:
             pass
 
 class InertiaTensorTableOKHandler(adsk.core.CommandEventHandler):
-    def __init__(self, on_data_received=None):
+    def __init__(self, on_data_received=None, preview=None):
         super().__init__()
         self.on_data_received = on_data_received
+        self.preview = preview
 
+    @traced()
     def notify(self, args):
         try:
             eventArgs = adsk.core.CommandEventArgs.cast(args)
             inputs = eventArgs.command.commandInputs
-            tensor_values = []
-            for row in range(1, 4):
-                row_values = []
-                for col in range(1, 4):
-                    input_id = f'inertia_row{row}_col{col}'
-                    dataInput = inputs.itemById(input_id)
-                    row_values.append(dataInput.value if dataInput else '0.0')
-                tensor_values.append(row_values)
+            if self.preview:
+                self.preview.cancel()
+            tensor_values = _readTensor(inputs)
             if self.on_data_received:
                 self.on_data_received(tensor_values)
         except Exception as e:
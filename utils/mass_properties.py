@@ -0,0 +1,307 @@
+"""
+Tipo de valor compacto para propriedades de massa, sem dependência do adsk.
+
+MassProperties guarda a massa, o CoM e as seis componentes independentes do
+tensor de inércia em relação ao CoM, em atributos de __slots__ (sem listas
+aninhadas), junto com o sistema de unidades em que estão expressos.
+
+  a + b   combina duas contribuições (teorema dos eixos paralelos)
+  a - b   remove de a uma contribuição b que faz parte dela
+  a.rotated(R), a.translated(t), a.transformed((R, t))
+  a.view(REPORT)   leitura em outras unidades, sem copiar os dados
+  MassProperties.combine(items)   soma de muitas contribuições em uma passada
+
+As contas são escritas componente a componente, sem alocar matrizes
+intermediárias.
+"""
+
+from collections import namedtuple
+
+# Sistema de unidades: fatores de conversão a partir do SI (kg, m, kg·m²) para
+# cada grandeza. O tensor não precisa estar na unidade massa·comprimento² do
+# sistema (o relatório usa massa em kg e tensor em g·mm²).
+UnitSystem = namedtuple('UnitSystem', ['name', 'mass', 'length', 'inertia'])
+
+SI = UnitSystem('SI', 1.0, 1.0, 1.0)                  # kg, m, kg·m²
+FUSION = UnitSystem('Fusion', 1.0, 100.0, 1e4)        # kg, cm, kg·cm² (unidades internas do Fusion)
+REPORT = UnitSystem('relatório', 1.0, 1000.0, 1e9)    # kg, mm, g·mm² (tabelas e relatório)
+
+
+def _parallelAxisFactor(units):
+    # Fator que leva massa·comprimento² à unidade de tensor do sistema.
+    return units.inertia / (units.mass * units.length * units.length)
+
+
+def rotateSymmetric(R, xx, yy, zz, xy, yz, xz):
+    """R·I·R^T para o tensor simétrico I dado pelas seis componentes; retorna as seis componentes."""
+    (r00, r01, r02), (r10, r11, r12), (r20, r21, r22) = R
+    a00 = r00 * xx + r01 * xy + r02 * xz
+    a01 = r00 * xy + r01 * yy + r02 * yz
+    a02 = r00 * xz + r01 * yz + r02 * zz
+    a10 = r10 * xx + r11 * xy + r12 * xz
+    a11 = r10 * xy + r11 * yy + r12 * yz
+    a12 = r10 * xz + r11 * yz + r12 * zz
+    a20 = r20 * xx + r21 * xy + r22 * xz
+    a21 = r20 * xy + r21 * yy + r22 * yz
+    a22 = r20 * xz + r21 * yz + r22 * zz
+    return (a00 * r00 + a01 * r01 + a02 * r02,
+            a10 * r10 + a11 * r11 + a12 * r12,
+            a20 * r20 + a21 * r21 + a22 * r22,
+            a00 * r10 + a01 * r11 + a02 * r12,
+            a10 * r20 + a11 * r21 + a12 * r22,
+            a00 * r20 + a01 * r21 + a02 * r22)
+
+
+def parallelAxisSymmetric(mass, dx, dy, dz):
+    """Seis componentes de m·(||d||²·I3 - d·d^T)."""
+    return (mass * (dy * dy + dz * dz),
+            mass * (dx * dx + dz * dz),
+            mass * (dx * dx + dy * dy),
+            -mass * dx * dy,
+            -mass * dy * dz,
+            -mass * dx * dz)
+
+
+class MassProperties:
+    """
+    Propriedades de massa de um corpo ou conjunto: massa, CoM (cx, cy, cz) e
+    tensor em relação ao CoM (ixx, iyy, izz, ixy, iyz, ixz), nas unidades units.
+    """
+
+    __slots__ = ('mass', 'cx', 'cy', 'cz', 'ixx', 'iyy', 'izz', 'ixy', 'iyz', 'ixz', 'units')
+
+    def __init__(self, mass=0.0, com=(0.0, 0.0, 0.0), tensor=None, units=FUSION):
+        self.mass = mass
+        self.cx, self.cy, self.cz = com
+        if tensor is None:
+            self.ixx = self.iyy = self.izz = self.ixy = self.iyz = self.ixz = 0.0
+        else:
+            self.ixx, self.iyy, self.izz = tensor[0][0], tensor[1][1], tensor[2][2]
+            self.ixy, self.iyz, self.ixz = tensor[0][1], tensor[1][2], tensor[0][2]
+        self.units = units
+
+    @classmethod
+    def _make(cls, mass, cx, cy, cz, ixx, iyy, izz, ixy, iyz, ixz, units):
+        # Construção direta a partir dos escalares, sem passar por tuplas.
+        self = cls.__new__(cls)
+        self.mass, self.cx, self.cy, self.cz = mass, cx, cy, cz
+        self.ixx, self.iyy, self.izz, self.ixy, self.iyz, self.ixz = ixx, iyy, izz, ixy, iyz, ixz
+        self.units = units
+        return self
+
+    @classmethod
+    def fromOrigin(cls, mass, com, I_origin, units=FUSION):
+        """A partir do tensor em relação à origem (o formato dos BodySnapshot)."""
+        cx, cy, cz = com
+        k = _parallelAxisFactor(units)
+        sxx, syy, szz, sxy, syz, sxz = parallelAxisSymmetric(k * mass, cx, cy, cz)
+        return cls._make(mass, cx, cy, cz,
+                         I_origin[0][0] - sxx, I_origin[1][1] - syy, I_origin[2][2] - szz,
+                         I_origin[0][1] - sxy, I_origin[1][2] - syz, I_origin[0][2] - sxz, units)
+
+    @classmethod
+    def combine(cls, items, units=FUSION):
+        """
+        Soma muitas contribuições em uma única passada: acumula Σm, Σm·c e o
+        tensor em relação à origem e transfere para o CoM total uma única vez.
+        Todas as contribuições devem estar em units.
+        """
+        k = _parallelAxisFactor(units)
+        m = fx = fy = fz = 0.0
+        xx = yy = zz = xy = yz = xz = 0.0
+        for item in items:
+            if item.units is not units:
+                item = item.inUnits(units)
+            mi, cx, cy, cz = item.mass, item.cx, item.cy, item.cz
+            m += mi
+            fx += mi * cx
+            fy += mi * cy
+            fz += mi * cz
+            km = k * mi
+            xx += item.ixx + km * (cy * cy + cz * cz)
+            yy += item.iyy + km * (cx * cx + cz * cz)
+            zz += item.izz + km * (cx * cx + cy * cy)
+            xy += item.ixy - km * cx * cy
+            yz += item.iyz - km * cy * cz
+            xz += item.ixz - km * cx * cz
+        if m == 0:
+            return cls(units=units)
+        cx, cy, cz = fx / m, fy / m, fz / m
+        sxx, syy, szz, sxy, syz, sxz = parallelAxisSymmetric(k * m, cx, cy, cz)
+        return cls._make(m, cx, cy, cz, xx - sxx, yy - syy, zz - szz, xy - sxy, yz - syz, xz - sxz, units)
+
+    # --- Leitura ---------------------------------------------------------
+
+    @property
+    def com(self):
+        return (self.cx, self.cy, self.cz)
+
+    @property
+    def tensor(self):
+        """Tensor 3x3 em relação ao CoM."""
+        return ((self.ixx, self.ixy, self.ixz),
+                (self.ixy, self.iyy, self.iyz),
+                (self.ixz, self.iyz, self.izz))
+
+    def originTensor(self):
+        """Tensor 3x3 em relação à origem."""
+        k = _parallelAxisFactor(self.units)
+        sxx, syy, szz, sxy, syz, sxz = parallelAxisSymmetric(k * self.mass, self.cx, self.cy, self.cz)
+        return ((self.ixx + sxx, self.ixy + sxy, self.ixz + sxz),
+                (self.ixy + sxy, self.iyy + syy, self.iyz + syz),
+                (self.ixz + sxz, self.iyz + syz, self.izz + szz))
+
+    def asResult(self):
+        """Retorna (I_total, totalMass, globalCOM_mm), no formato de getGlobalInertia."""
+        view = self.view(REPORT)
+        return [list(row) for row in view.tensor], view.mass, view.com
+
+    def __repr__(self):
+        return 'MassProperties(mass={!r}, com={!r}, tensor={!r}, units={})'.format(
+            self.mass, self.com, self.tensor, self.units.name)
+
+    # --- Unidades --------------------------------------------------------
+
+    def view(self, units):
+        """Leitura das propriedades em outro sistema de unidades, sem copiá-las."""
+        return MassPropertiesView(self, units)
+
+    def inUnits(self, units):
+        """Cópia convertida para outro sistema de unidades."""
+        if units is self.units:
+            return self
+        fm = units.mass / self.units.mass
+        fl = units.length / self.units.length
+        fi = units.inertia / self.units.inertia
+        return MassProperties._make(self.mass * fm, self.cx * fl, self.cy * fl, self.cz * fl,
+                                    self.ixx * fi, self.iyy * fi, self.izz * fi,
+                                    self.ixy * fi, self.iyz * fi, self.ixz * fi, units)
+
+    # --- Álgebra ---------------------------------------------------------
+
+    def __add__(self, other):
+        if not isinstance(other, MassProperties):
+            return NotImplemented
+        if other.units is not self.units:
+            other = other.inUnits(self.units)
+        m = self.mass + other.mass
+        if m == 0:
+            return MassProperties(units=self.units)
+        cx = (self.mass * self.cx + other.mass * other.cx) / m
+        cy = (self.mass * self.cy + other.mass * other.cy) / m
+        cz = (self.mass * self.cz + other.mass * other.cz) / m
+        k = _parallelAxisFactor(self.units)
+        axx, ayy, azz, axy, ayz, axz = parallelAxisSymmetric(k * self.mass, self.cx - cx, self.cy - cy, self.cz - cz)
+        bxx, byy, bzz, bxy, byz, bxz = parallelAxisSymmetric(k * other.mass, other.cx - cx, other.cy - cy, other.cz - cz)
+        return MassProperties._make(m, cx, cy, cz,
+                                    self.ixx + other.ixx + axx + bxx,
+                                    self.iyy + other.iyy + ayy + byy,
+                                    self.izz + other.izz + azz + bzz,
+                                    self.ixy + other.ixy + axy + bxy,
+                                    self.iyz + other.iyz + ayz + byz,
+                                    self.ixz + other.ixz + axz + bxz,
+                                    self.units)
+
+    def __radd__(self, other):
+        # Permite sum(items), que começa de 0.
+        if other == 0:
+            return self
+        return NotImplemented
+
+    def __sub__(self, other):
+        """Remove a contribuição other (que deve fazer parte de self)."""
+        if not isinstance(other, MassProperties):
+            return NotImplemented
+        if other.units is not self.units:
+            other = other.inUnits(self.units)
+        m = self.mass - other.mass
+        if m == 0:
+            return MassProperties(units=self.units)
+        cx = (self.mass * self.cx - other.mass * other.cx) / m
+        cy = (self.mass * self.cy - other.mass * other.cy) / m
+        cz = (self.mass * self.cz - other.mass * other.cz) / m
+        # I_rest(c) = I_self(c) - I_other(c), com os dois levados ao novo CoM c.
+        k = _parallelAxisFactor(self.units)
+        axx, ayy, azz, axy, ayz, axz = parallelAxisSymmetric(k * self.mass, self.cx - cx, self.cy - cy, self.cz - cz)
+        bxx, byy, bzz, bxy, byz, bxz = parallelAxisSymmetric(k * other.mass, other.cx - cx, other.cy - cy, other.cz - cz)
+        return MassProperties._make(m, cx, cy, cz,
+                                    self.ixx + axx - other.ixx - bxx,
+                                    self.iyy + ayy - other.iyy - byy,
+                                    self.izz + azz - other.izz - bzz,
+                                    self.ixy + axy - other.ixy - bxy,
+                                    self.iyz + ayz - other.iyz - byz,
+                                    self.ixz + axz - other.ixz - bxz,
+                                    self.units)
+
+    def rotated(self, R):
+        """Rotação R (3x3) em torno da origem: CoM' = R·CoM e I' = R·I·R^T."""
+        (r00, r01, r02), (r10, r11, r12), (r20, r21, r22) = R
+        cx, cy, cz = self.cx, self.cy, self.cz
+        return MassProperties._make(
+            self.mass,
+            r00 * cx + r01 * cy + r02 * cz,
+            r10 * cx + r11 * cy + r12 * cz,
+            r20 * cx + r21 * cy + r22 * cz,
+            *rotateSymmetric(R, self.ixx, self.iyy, self.izz, self.ixy, self.iyz, self.ixz),
+            self.units)
+
+    def translated(self, t):
+        """Translação por t, no comprimento de self.units (o tensor em relação ao CoM não muda)."""
+        return MassProperties._make(self.mass, self.cx + t[0], self.cy + t[1], self.cz + t[2],
+                                    self.ixx, self.iyy, self.izz, self.ixy, self.iyz, self.ixz, self.units)
+
+    def transformed(self, transform):
+        """Aplica a transformação rígida (R, t) de utils/transforms.py (t em cm)."""
+        R, t = transform
+        scale = self.units.length / FUSION.length
+        return self.rotated(R).translated((t[0] * scale, t[1] * scale, t[2] * scale))
+
+    def isclose(self, other, rtol=1e-9):
+        """Compara com tolerância relativa à escala da massa, do CoM e do tensor."""
+        other = other.inUnits(self.units)
+        scaleC = max(abs(self.cx), abs(self.cy), abs(self.cz), abs(other.cx), abs(other.cy), abs(other.cz), 1.0)
+        a, b = self.tensor, other.tensor
+        scaleI = max(max(abs(x) for row in a for x in row), max(abs(x) for row in b for x in row), 1e-300)
+        return (abs(self.mass - other.mass) <= rtol * max(abs(self.mass), abs(other.mass), 1e-300)
+                and all(abs(x - y) <= rtol * scaleC for x, y in zip(self.com, other.com))
+                and all(abs(a[i][j] - b[i][j]) <= rtol * scaleI for i in range(3) for j in range(3)))
+
+
+class MassPropertiesView:
+    """
+    Leitura de um MassProperties em outro sistema de unidades: guarda apenas a
+    referência e os fatores, e converte cada valor no acesso.
+    """
+
+    __slots__ = ('source', 'units', '_fm', '_fl', '_fi')
+
+    def __init__(self, source, units):
+        self.source = source
+        self.units = units
+        self._fm = units.mass / source.units.mass
+        self._fl = units.length / source.units.length
+        self._fi = units.inertia / source.units.inertia
+
+    @property
+    def mass(self):
+        return self.source.mass * self._fm
+
+    @property
+    def com(self):
+        s, f = self.source, self._fl
+        return (s.cx * f, s.cy * f, s.cz * f)
+
+    @property
+    def tensor(self):
+        s, f = self.source, self._fi
+        return ((s.ixx * f, s.ixy * f, s.ixz * f),
+                (s.ixy * f, s.iyy * f, s.iyz * f),
+                (s.ixz * f, s.iyz * f, s.izz * f))
+
+    def __getattr__(self, name):
+        # cx, ixx etc.: o fator depende da grandeza.
+        if name in ('cx', 'cy', 'cz'):
+            return getattr(self.source, name) * self._fl
+        if name in ('ixx', 'iyy', 'izz', 'ixy', 'iyz', 'ixz'):
+            return getattr(self.source, name) * self._fi
+        raise AttributeError(name)
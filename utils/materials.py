@@ -1,25 +1,160 @@
 import adsk.core, adsk.fusion, adsk.cam, traceback
+import bisect, json, os
+
+# Biblioteca de materiais usada pelo script, localizada pelo nome (o índice
+# varia entre instalações).
+MATERIAL_LIBRARY_NAME = 'Fusion Material Library'
+
+# Índice persistido entre sessões.
+MATERIAL_INDEX_PATH = os.path.join(os.path.expanduser('~'), '.inertia2fusion', 'material_index.json')
+
+class MaterialIndex:
+    """
+    Catálogo dos materiais de uma biblioteca, montado uma única vez:
+      - byName: nome -> id do material
+      - density: id -> densidade em kg/cm³
+    e as densidades ordenadas, para localizar o material de densidade mais
+    próxima de um alvo por busca binária.
+    version identifica a biblioteca lida (ver getLibraryVersion); um índice
+    com version diferente da biblioteca atual está desatualizado.
+    """
+
+    def __init__(self, version, entries):
+        self.version = version
+        # entries: [(id, name, density)], sem materiais sem densidade.
+        self.entries = sorted(entries, key=lambda entry: entry[2])
+        self.byName = {name: id for id, name, density in self.entries}
+        self.density = {id: density for id, name, density in self.entries}
+        self._densities = [density for id, name, density in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def names(self):
+        return [name for id, name, density in self.entries]
+
+    def nearestByDensity(self, density):
+        """Retorna (id, name, density) do material de densidade mais próxima, ou None se o índice estiver vazio."""
+        if not self.entries:
+            return None
+        i = bisect.bisect_left(self._densities, density)
+        if i == len(self._densities) or (i > 0 and density - self._densities[i - 1] <= self._densities[i] - density):
+            i -= 1
+        return self.entries[i]
+
+    def toDict(self):
+        return {'version': list(self.version), 'materials': [list(entry) for entry in self.entries]}
+
+    @classmethod
+    def fromDict(cls, data):
+        return cls(tuple(data['version']), [tuple(entry) for entry in data['materials']])
+
+# Índice em memória, válido enquanto o script (ou o add-in) estiver carregado.
+_materialIndex = None
+
+def getMaterialLibrary(name=MATERIAL_LIBRARY_NAME):
+    """Retorna a biblioteca de materiais com o nome dado, ou None se não existir."""
+    return adsk.core.Application.get().materialLibraries.itemByName(name)
+
+def getLibraryVersion(library):
+    """
+    Identificação da biblioteca: versão do Fusion, id da biblioteca e
+    quantidade de materiais. Barata de consultar, sem percorrer os materiais.
+    """
+    return (adsk.core.Application.get().version, library.id, library.materials.count)
+
+def buildMaterialIndex(library):
+    """Percorre os materiais da biblioteca (uma vez) e monta o MaterialIndex."""
+    materials = library.materials
+    entries = []
+    for i in range(materials.count):
+        material = materials.item(i)
+        density = getMaterialDensity(material)
+        if density:
+            entries.append((material.id, material.name, density))
+    return MaterialIndex(getLibraryVersion(library), entries)
+
+def loadMaterialIndex(path=MATERIAL_INDEX_PATH):
+    """Lê o índice persistido, ou retorna None se o arquivo não existir ou for inválido."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return MaterialIndex.fromDict(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def saveMaterialIndex(index, path=MATERIAL_INDEX_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Grava em um arquivo temporário e substitui, para nunca deixar um índice pela metade.
+    temporaryPath = path + '.tmp'
+    with open(temporaryPath, 'w', encoding='utf-8') as f:
+        json.dump(index.toDict(), f, ensure_ascii=False)
+    os.replace(temporaryPath, path)
+
+def getMaterialIndex(path=MATERIAL_INDEX_PATH):
+    """
+    Retorna o MaterialIndex da biblioteca MATERIAL_LIBRARY_NAME: da memória, do
+    arquivo em path (se a versão coincidir com a da biblioteca atual) ou, em
+    último caso, percorrendo a biblioteca pela API e persistindo o resultado.
+    """
+    global _materialIndex
+    library = getMaterialLibrary()
+    if library is None:
+        raise ValueError("Biblioteca de materiais '{}' não encontrada.".format(MATERIAL_LIBRARY_NAME))
+    version = getLibraryVersion(library)
+    if _materialIndex is not None and _materialIndex.version == version:
+        return _materialIndex
+
+    index = loadMaterialIndex(path)
+    if index is None or index.version != version:
+        index = buildMaterialIndex(library)
+        try:
+            saveMaterialIndex(index, path)
+        except OSError:
+            # Sem permissão de escrita o índice continua válido nesta sessão.
+            pass
+    _materialIndex = index
+    return index
+
+def clearMaterialIndex():
+    """Descarta o índice em memória (o arquivo persistido é revalidado na próxima leitura)."""
+    global _materialIndex
+    _materialIndex = None
+
+def findMaterial(nameOrId):
+    """Retorna o Material da biblioteca pelo nome ou pelo id, ou None."""
+    index = getMaterialIndex()
+    materialId = index.byName.get(nameOrId, nameOrId)
+    return getMaterialLibrary().materials.itemById(materialId)
+
+def findMaterialByDensity(density):
+    """Retorna o Material da biblioteca com a densidade (kg/cm³) mais próxima de density."""
+    entry = getMaterialIndex().nearestByDensity(density)
+    if entry is None:
+        return None
+    return getMaterialLibrary().materials.itemById(entry[0])
+
 
 def setMaterialForBody(body, materialId):
     """
-    Define o material do corpo usando o índice do material na biblioteca do Fusion.
+    Define o material do corpo.
     
     Parâmetros:
       body (BRepBody): Corpo a que o material será atribuído.
-      materialId (int): Índice do material desejado na biblioteca de materiais do Fusion.
+      materialId (int | str): Índice do material na biblioteca do Fusion, ou
+                              o nome ou o id do material (via MaterialIndex).
     
     Retorna:
       bool: True se o material foi atribuído com sucesso, False caso contrário.
     """
     try:
-        # Acessa as bibliotecas de materiais
-        mLibs = adsk.core.Application.get().materialLibraries                
-        # Seleciona a biblioteca de materiais do Fusion (normalmente no índice 3)
-        mLib = mLibs.item(3)
-        targetMaterial = mLib.materials.item(materialId)
+        if isinstance(materialId, str):
+            targetMaterial = findMaterial(materialId)
+        else:
+            # Seleciona a biblioteca de materiais do Fusion pelo nome
+            targetMaterial = getMaterialLibrary().materials.item(materialId)
                 
         if targetMaterial is None:
-            raise ValueError("Material com índice '{}' não encontrado na biblioteca.".format(materialId))
+            raise ValueError("Material '{}' não encontrado na biblioteca.".format(materialId))
         
         # Atribui o material ao corpo.
         body.material = targetMaterial
@@ -29,6 +164,19 @@ def setMaterialForBody(body, materialId):
             'Erro ao alterar o material:\n{}'.format(traceback.format_exc()))
         return False
 
+def assignMaterialForMass(body, mass, volume):
+    """
+    Atribui ao corpo o material cuja densidade mais se aproxima de mass/volume
+    (kg e cm³), para que um corpo substituto tenha massa próxima da do alvo
+    com um material real. Retorna o material atribuído, ou None.
+    """
+    if volume <= 0:
+        return None
+    material = findMaterialByDensity(mass / volume)
+    if material is not None:
+        body.material = material
+    return material
+
 def getMaterialOfBody(body):
     """
     Retorna o material atualmente atribuído ao corpo.
@@ -46,24 +194,26 @@ def getMaterialOfBody(body):
             'Erro ao obter o material do corpo:\n{}'.format(traceback.format_exc()))
         return None
 
+def getMaterialDensity(material):
+    """
+    Retorna a densidade do material em kg/cm³ (unidade interna do Fusion),
+    ou None se o material não tiver a propriedade de densidade.
+    """
+    if material is None:
+        return None
+    densityProperty = material.materialProperties.itemById('structural_Density')
+    return densityProperty.value if densityProperty else None
+
 def listFusionMaterials():
     """
-    Retorna uma lista com os nomes de todos os materiais disponíveis na biblioteca do Fusion.
-    
-    Observação: Neste exemplo, utiliza-se a biblioteca do Fusion que normalmente está no índice 3.
+    Retorna uma lista com os nomes de todos os materiais (com densidade) da
+    biblioteca do Fusion, lidos do MaterialIndex, em ordem crescente de densidade.
     
     Retorna:
       list[str]: Lista com os nomes dos materiais.
     """
     try:
-        app = adsk.core.Application.get()
-        mLibs = app.materialLibraries
-        mLib = mLibs.item(3)
-        materials = mLib.materials
-        matList = []
-        for i in range(materials.count):
-            matList.append(materials.item(i).name)
-        return matList
+        return getMaterialIndex().names()
     except Exception as e:
         adsk.core.Application.get().userInterface.messageBox(
             'Erro ao listar os materiais:\n{}'.format(traceback.format_exc()))
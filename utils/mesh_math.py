@@ -0,0 +1,183 @@
+"""
+Propriedades de massa de malhas triangulares fechadas, sem dependência do adsk.
+
+Cada triângulo (a, b, c) forma com a origem um tetraedro de volume com sinal
+  V = a · (b × c) / 6
+e, pelo teorema da divergência, a soma sobre os triângulos de uma malha fechada
+(com a orientação das faces consistente) dá o volume e os momentos do sólido:
+  ∫ x dV     = Σ V · (a + b + c) / 4
+  ∫ x xᵀ dV  = Σ V / 20 · (a aᵀ + b bᵀ + c cᵀ + s sᵀ),  s = a + b + c
+Com a orientação invertida (normais para dentro) todos os termos trocam de
+sinal juntos, então o resultado é corrigido pelo sinal do volume.
+
+Entradas no formato dos buffers do Fusion (TriangleMesh):
+  coordinates: (x0, y0, z0, x1, y1, z1, ...) em cm
+  indices:     (i0, j0, k0, i1, j1, k1, ...), três nós por triângulo
+ou, para triângulos sem nós compartilhados (STL), um array (N, 3, 3).
+O resultado segue o formato dos snapshots (ver getters.BodySnapshot): massa em
+kg, CoM em cm e tensor em relação à origem em kg·cm², com a densidade em kg/cm³.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # O Python embarcado no Fusion nem sempre traz o NumPy.
+    np = None
+
+# Triângulos integrados por bloco: os arrays temporários (nós dos triângulos e
+# produtos) cabem no cache do processador, independentemente do tamanho da malha.
+MESH_CHUNK_SIZE = 1 << 14
+
+
+# Resultado de uma malha sem volume.
+_NO_MASS = (0.0, (0.0, 0.0, 0.0), ((0.0, 0.0, 0.0),) * 3)
+
+
+def _tensorFromMoments(C):
+    # I = tr(C)·I3 - C, com C = ρ ∫ x xᵀ dV em relação à origem.
+    trace = C[0][0] + C[1][1] + C[2][2]
+    return tuple(tuple((trace if i == j else 0.0) - C[i][j] for j in range(3)) for i in range(3))
+
+
+def _asArray(values, dtype):
+    # Listas (o que a API do Fusion devolve) são convertidas sem passar por
+    # objetos intermediários; arrays e buffers (array.array, memoryview) são
+    # usados sem cópia.
+    if isinstance(values, list):
+        return np.fromiter(values, dtype=dtype, count=len(values))
+    return np.asarray(values, dtype=dtype)
+
+
+def triangleMoments(a, b, c):
+    """
+    Somas dos tetraedros (origem, a, b, c) de um bloco de triângulos, com a, b
+    e c arrays (3, N) das coordenadas dos três nós em relação a um mesmo ponto:
+      (Σ det, Σ det·s, Σ det·(a aᵀ + b bᵀ + c cᵀ + s sᵀ)),  det = 6V
+    As somas de blocos diferentes (em relação ao mesmo ponto) podem ser somadas
+    entre si; ver massPropertiesFromMoments.
+    """
+    # det = a · (b × c) = 6V, com o produto vetorial escrito por componente.
+    det = (a[0] * (b[1] * c[2] - b[2] * c[1])
+           + a[1] * (b[2] * c[0] - b[0] * c[2])
+           + a[2] * (b[0] * c[1] - b[1] * c[0]))
+    s = a + b + c
+    second = np.zeros((3, 3))
+    # Σ det · (a aᵀ + b bᵀ + c cᵀ + s sᵀ) como quatro produtos (3xN)·(Nx3).
+    for p in (a, b, c, s):
+        second += (p * det) @ p.T
+    return float(det.sum()), s @ det, second
+
+
+def massPropertiesFromMoments(moments, origin, density):
+    """
+    Converte as somas de triangleMoments (em relação a origin) em
+    (mass, com, tensor), com o tensor em relação à origem do sistema de coordenadas.
+    """
+    volume6, first, second = moments
+    if volume6 < 0:
+        volume6, first, second = -volume6, -first, -second
+    if volume6 == 0:
+        return _NO_MASS
+
+    mass = density * volume6 / 6
+    com = first / (4 * volume6)
+    # Momentos em relação a origin -> em relação ao CoM -> em relação à origem.
+    C = density * second / 120
+    C_cm = C - mass * np.outer(com, com)
+    com = com + origin
+    C_origin = C_cm + mass * np.outer(com, com)
+    return float(mass), tuple(float(x) for x in com), _tensorFromMoments(C_origin.tolist())
+
+
+def addMoments(total, moments):
+    """Soma dois resultados de triangleMoments (total pode ser None)."""
+    if total is None:
+        return moments
+    return total[0] + moments[0], total[1] + moments[1], total[2] + moments[2]
+
+
+def meshMassProperties(coordinates, indices, density, chunkSize=MESH_CHUNK_SIZE):
+    """
+    Integra a malha fechada e retorna (mass, com, tensor), com o tensor em
+    relação à origem. Uma malha sem volume (aberta ou degenerada) resulta em
+    massa nula.
+    """
+    if np is None:
+        return _meshMassPropertiesPython(coordinates, indices, density)
+
+    nodes = _asArray(coordinates, np.float64).reshape(-1, 3)
+    if len(indices) == 0 or len(nodes) == 0:
+        return _NO_MASS
+    # Índices como três linhas contíguas (primeiro, segundo e terceiro nó de
+    # cada triângulo) e coordenadas como três linhas contíguas (x, y, z): cada
+    # bloco é lido com gathers de uma dimensão.
+    triangles = np.ascontiguousarray(_asArray(indices, np.intc).reshape(-1, 3).T)
+
+    # Integra em relação ao centroide dos nós, que limita o cancelamento
+    # numérico em malhas longe da origem; o resultado é transportado de volta no fim.
+    origin = nodes.mean(axis=0)
+    X = np.subtract(nodes.T, origin[:, None], order='C')
+
+    moments = None
+    for start in range(0, triangles.shape[1], chunkSize):
+        chunk = triangles[:, start:start + chunkSize]
+        moments = addMoments(moments, triangleMoments(X[:, chunk[0]], X[:, chunk[1]], X[:, chunk[2]]))
+    return massPropertiesFromMoments(moments, origin, density)
+
+
+def triangleSoupMoments(vertices, origin, scale=1.0, chunkSize=MESH_CHUNK_SIZE):
+    """
+    Somas de triangleMoments de triângulos sem nós compartilhados (como os de
+    um STL): vertices é um array (N, 3, 3), de qualquer tipo de ponto
+    flutuante (por exemplo, um memmap float32), com os três nós de cada
+    triângulo. As coordenadas são multiplicadas por scale e tomadas em relação
+    a origin (já na escala final). Só um bloco é convertido para float64 por vez.
+    """
+    origin = np.asarray(origin, dtype=np.float64)[None, :, None]
+    moments = (0.0, np.zeros(3), np.zeros((3, 3)))
+    for start in range(0, len(vertices), chunkSize):
+        # (N, nó, eixo) -> (nó, eixo, N), contíguo, com escala e origem aplicadas.
+        block = vertices[start:start + chunkSize].transpose(1, 2, 0)
+        P = np.multiply(block, scale, dtype=np.float64, order='C')
+        P -= origin
+        moments = addMoments(moments, triangleMoments(P[0], P[1], P[2]))
+    return moments
+
+
+def _meshMassPropertiesPython(coordinates, indices, density):
+    coordinates = list(coordinates)
+    nodes = [tuple(coordinates[i:i + 3]) for i in range(0, len(coordinates), 3)]
+    indices = list(indices)
+    count = len(nodes) or 1
+    origin = [sum(node[k] for node in nodes) / count for k in range(3)]
+    nodes = [(x - origin[0], y - origin[1], z - origin[2]) for x, y, z in nodes]
+
+    volume6 = 0.0
+    first = [0.0, 0.0, 0.0]
+    second = [[0.0] * 3 for _ in range(3)]
+    for t in range(0, len(indices) - 2, 3):
+        a, b, c = nodes[indices[t]], nodes[indices[t + 1]], nodes[indices[t + 2]]
+        det = (a[0] * (b[1] * c[2] - b[2] * c[1])
+               + a[1] * (b[2] * c[0] - b[0] * c[2])
+               + a[2] * (b[0] * c[1] - b[1] * c[0]))
+        s = (a[0] + b[0] + c[0], a[1] + b[1] + c[1], a[2] + b[2] + c[2])
+        volume6 += det
+        for i in range(3):
+            first[i] += det * s[i]
+            for j in range(i, 3):
+                second[i][j] += det * (a[i] * a[j] + b[i] * b[j] + c[i] * c[j] + s[i] * s[j])
+
+    sign = -1.0 if volume6 < 0 else 1.0
+    volume6 *= sign
+    if volume6 == 0:
+        return _NO_MASS
+
+    mass = density * volume6 / 6
+    com = [sign * f / (4 * volume6) for f in first]
+    comOrigin = tuple(com[i] + origin[i] for i in range(3))
+    C = [[0.0] * 3 for _ in range(3)]
+    for i in range(3):
+        for j in range(i, 3):
+            value = (sign * density * second[i][j] / 120
+                     - mass * com[i] * com[j] + mass * comOrigin[i] * comOrigin[j])
+            C[i][j] = C[j][i] = value
+    return mass, comOrigin, _tensorFromMoments(C)
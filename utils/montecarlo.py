@@ -0,0 +1,337 @@
+"""
+Análise de tolerâncias do tensor global por Monte Carlo, sem dependência do adsk.
+
+Cada amostra perturba as contribuições do design dentro das tolerâncias:
+  - massa: fator (1 + δm) independente por corpo;
+  - densidade: fator (1 + δρ) sorteado uma vez por grupo (material) e
+    compartilhado pelos corpos do grupo, que variam juntos;
+  - CoM: deslocamento δc por eixo, independente por corpo (a forma, e portanto
+    o tensor em relação ao próprio CoM, não muda).
+Os fatores de massa e densidade escalam juntos a massa e o tensor do corpo.
+
+As amostras são sorteadas como arrays empilhados (amostras x corpos) e
+agregadas em uma única passada vetorizada por bloco: as somas que só dependem
+dos fatores de massa são produtos de matrizes (S, N) @ (N, k) e só os corpos
+com tolerância de CoM passam pelos termos de deslocamento. Cada bloco tem no
+máximo MONTE_CARLO_CHUNK_ELEMENTS amostras x corpos, então a memória de
+trabalho não depende do número de amostras; do resultado, só as 10 grandezas
+de cada amostra (massa, CoM e as seis componentes do tensor) são guardadas
+para os percentis.
+
+As tolerâncias são limites ±: na distribuição normal o limite corresponde a
+TOLERANCE_SIGMAS desvios-padrão; na uniforme, aos extremos do intervalo.
+
+Entradas nas unidades de gatherAssembly (kg, cm, tensor em relação à origem
+em kg·cm²), tolerâncias de massa e densidade relativas e de CoM em mm.
+Resultado nas unidades do relatório (kg, mm, g·mm²), como getGlobalInertia.
+"""
+
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # O Python embarcado no Fusion nem sempre traz o NumPy.
+    np = None
+
+from .inertia_math import computeGlobalInertia, originToCentroid, LENGTH_CM_TO_MM, INERTIA_KGCM2_TO_GMM2
+
+# Desvios-padrão correspondentes ao limite de tolerância na distribuição normal.
+TOLERANCE_SIGMAS = 3.0
+
+# Percentis reportados: ±3σ, ±2σ (95%) e a mediana.
+DEFAULT_PERCENTILES = (0.135, 2.5, 50.0, 97.5, 99.865)
+
+# Amostras x corpos por bloco: limita os arrays temporários (algumas dezenas
+# de MB) independentemente do número de amostras.
+MONTE_CARLO_CHUNK_ELEMENTS = 1 << 20
+
+# Amostras por tarefa do pool de processos. As tarefas (e as sementes de cada
+# uma) não dependem do número de processos, então o resultado de uma semente
+# é o mesmo com ou sem o pool.
+MONTE_CARLO_TASK_SAMPLES = 1 << 16
+
+DISTRIBUTIONS = ('normal', 'uniform')
+
+# Componentes do tensor em cada amostra, na ordem das colunas do resultado.
+TENSOR_COMPONENTS = ('xx', 'yy', 'zz', 'xy', 'yz', 'xz')
+_PAIRS = ((0, 0), (1, 1), (2, 2), (0, 1), (1, 2), (0, 2))
+_ROWS = np.array([a for a, b in _PAIRS]) if np is not None else None
+_COLS = np.array([b for a, b in _PAIRS]) if np is not None else None
+
+# Resultado da análise, nas unidades do relatório:
+#   samples:     número de amostras
+#   percentiles: percentis calculados, (P,)
+#   mass:        (P,) massa total em kg
+#   com:         (P,3) CoM global em mm
+#   tensor:      (P,6) componentes xx, yy, zz, xy, yz, xz do tensor global em g·mm²
+#   nominal:     (I_total, totalMass, globalCOM_mm) sem perturbação
+ToleranceResult = namedtuple('ToleranceResult', ['samples', 'percentiles', 'mass', 'com', 'tensor', 'nominal'])
+
+# Modelo preparado para o sorteio, com os CoMs relativos ao CoM nominal (cm e
+# kg·cm²). As somas nominais ficam em float64; os coeficientes que multiplicam
+# as perturbações, em float32 (a perturbação é pequena perto do valor nominal):
+#   nominal: (massa, Σ m·c (3,), Σ m·c_a·c_b (6,), Σ I_corpo (6,)), em float64;
+#   masses (N,), firstMoments (N,3) = m·c, secondMoments (N,6) = m·c_a·c_b,
+#   bodyTensors (N,6) em relação ao CoM de cada corpo;
+#   massBodies/massLimits: corpos com tolerância de massa e os limites;
+#   comBodies/comMasses/comCoordinates/comLimits: corpos com tolerância de
+#   CoM, as massas, os CoMs (K,3) e os limites (3,K) em cm;
+#   groups (N,) e groupLimits (G,): grupo de densidade de cada corpo (ou None).
+_Model = namedtuple('_Model', ['nominal', 'masses', 'firstMoments', 'secondMoments', 'bodyTensors',
+                               'massBodies', 'massLimits', 'comBodies', 'comMasses', 'comCoordinates',
+                               'comLimits', 'groups', 'groupLimits', 'distribution'])
+
+
+def _perBody(values, count, name):
+    array = np.asarray(values, dtype=float)
+    if array.ndim == 0:
+        return np.full(count, float(array))
+    if array.shape != (count,):
+        raise ValueError("A tolerância de {} deve ser um número ou ter um valor por corpo.".format(name))
+    return array
+
+
+def prepareToleranceModel(masses, coms, tensors, massTolerance=0.0, comTolerance=0.0,
+                          densityTolerance=0.0, densityGroups=None, distribution='normal'):
+    """
+    Valida as entradas e prepara o modelo para o sorteio. Retorna (model, origin),
+    com origin o CoM nominal em cm.
+      massTolerance:    relativa; um número ou (N,)
+      comTolerance:     em mm; um número, (N,) (a mesma nos três eixos) ou (N,3)
+      densityTolerance: relativa; com densityGroups (N,) de inteiros 0..G-1,
+                        um número ou (G,); sem grupos, cada corpo é o próprio grupo
+    Contribuições de massa nula são descartadas.
+    """
+    if np is None:
+        raise ImportError("A análise de tolerâncias requer o NumPy.")
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError("Distribuição desconhecida: '{}' (use {}).".format(distribution, ', '.join(DISTRIBUTIONS)))
+
+    m = np.asarray(masses, dtype=float).reshape(-1)
+    count = m.size
+    c = np.asarray(coms, dtype=float).reshape(-1, 3)
+    I = np.asarray(tensors, dtype=float).reshape(-1, 3, 3)
+    massLimits = _perBody(massTolerance, count, 'massa')
+    comLimits = np.asarray(comTolerance, dtype=float)
+    if comLimits.ndim == 1:
+        comLimits = comLimits[:, None]
+    comLimits = np.broadcast_to(comLimits, (count, 3)) / LENGTH_CM_TO_MM
+    if densityGroups is None:
+        groups = np.arange(count)
+        groupLimits = _perBody(densityTolerance, count, 'densidade')
+    else:
+        groups = np.asarray(densityGroups, dtype=np.intp).reshape(-1)
+        if groups.shape != (count,):
+            raise ValueError("densityGroups deve ter um grupo por corpo.")
+        groupLimits = _perBody(densityTolerance, int(groups.max()) + 1 if count else 0, 'densidade')
+
+    keep = m != 0
+    m, c, I = m[keep], c[keep], I[keep]
+    massLimits, comLimits, groups = massLimits[keep], comLimits[keep], groups[keep]
+
+    # Tensor de cada corpo em relação ao próprio CoM.
+    bodyTensors = originToCentroid(m, c, I)[:, _ROWS, _COLS]
+
+    # CoMs relativos ao CoM nominal, o que limita o cancelamento numérico.
+    origin = (m @ c) / m.sum() if m.size else np.zeros(3)
+    c = c - origin
+    firstMoments = m[:, None] * c
+    secondMoments = m[:, None] * c[:, _ROWS] * c[:, _COLS]
+    nominal = (m.sum(), firstMoments.sum(axis=0), secondMoments.sum(axis=0), bodyTensors.sum(axis=0))
+
+    single = lambda a: np.ascontiguousarray(a, dtype=np.float32)
+    massBodies = np.flatnonzero(massLimits)
+    comBodies = np.flatnonzero(comLimits.any(axis=1))
+    hasDensity = bool(groupLimits.any())
+    model = _Model(nominal, single(m), single(firstMoments), single(secondMoments), single(bodyTensors),
+                   massBodies, single(massLimits[massBodies]),
+                   comBodies, single(m[comBodies]), single(c[comBodies]), single(comLimits[comBodies].T),
+                   groups if hasDensity else None, single(groupLimits) if hasDensity else None, distribution)
+    return model, origin
+
+
+def _standardNormal(rng, size):
+    # Box-Muller sobre uniformes float32, bem mais rápido que o standard_normal
+    # do NumPy. Com a resolução do float32 as caudas vão até ~5,8σ, muito além
+    # dos percentis reportados.
+    half = (size + 1) // 2
+    radius = rng.random(half, dtype=np.float32)
+    angle = rng.random(half, dtype=np.float32)
+    np.negative(radius, out=radius)
+    np.log1p(radius, out=radius)
+    radius *= -2.0
+    np.sqrt(radius, out=radius)
+    angle *= np.float32(2 * np.pi)
+    values = np.empty(2 * half, dtype=np.float32)
+    np.cos(angle, out=values[:half])
+    values[:half] *= radius
+    np.sin(angle, out=values[half:])
+    values[half:] *= radius
+    return values[:size]
+
+
+def _draw(rng, shape, distribution):
+    # Variáveis de limite unitário, em float32: o limite de tolerância
+    # multiplica o resultado.
+    size = int(np.prod(shape))
+    if distribution == 'normal':
+        values = _standardNormal(rng, size)
+        values *= np.float32(1.0 / TOLERANCE_SIGMAS)
+    else:
+        values = rng.random(size, dtype=np.float32)
+        values *= 2.0
+        values -= 1.0
+    return values.reshape(shape)
+
+
+def sampleChunk(model, rng, count):
+    """
+    Sorteia count amostras do modelo e as agrega em uma única passada.
+    Retorna um array (count, 10): massa, CoM (relativo ao CoM nominal, em cm)
+    e as componentes de TENSOR_COMPONENTS do tensor global em relação ao CoM
+    da amostra, em kg·cm².
+    """
+    nominalMass, nominalFirst, nominalSecond, nominalBodies = model.nominal
+    # delta = F - 1, com F o fator de massa (massa e densidade) de cada corpo.
+    bodyCount = model.masses.size
+    delta = None
+    if model.massBodies.size == bodyCount:
+        delta = _draw(rng, (count, bodyCount), model.distribution)
+        delta *= model.massLimits
+    elif model.massBodies.size:
+        delta = np.zeros((count, bodyCount), dtype=np.float32)
+        delta[:, model.massBodies] = _draw(rng, (count, model.massBodies.size), model.distribution) * model.massLimits
+    if model.groups is not None:
+        G = _draw(rng, (count, model.groupLimits.size), model.distribution)
+        G *= model.groupLimits
+        G = G[:, model.groups]
+        if delta is None:
+            delta = G
+        else:
+            # (1 + d)(1 + g) - 1 = d(1 + g) + g
+            delta *= G + 1.0
+            delta += G
+
+    M = np.full(count, nominalMass)
+    first = np.tile(nominalFirst, (count, 1))
+    second = np.tile(nominalSecond, (count, 1))
+    bodies = np.tile(nominalBodies, (count, 1))
+    if delta is not None:
+        M += delta @ model.masses
+        first += delta @ model.firstMoments
+        second += delta @ model.secondMoments
+        bodies += delta @ model.bodyTensors
+
+    if model.comBodies.size:
+        # Σ m (c + δ)_a (c + δ)_b = Σ m c_a c_b + Σ m (δ_a c_b + c_a δ_b + δ_a δ_b),
+        # com os deslocamentos como (count, eixo, corpo).
+        k = model.comBodies.size
+        D = _draw(rng, (count, 3, k), model.distribution)
+        D *= model.comLimits
+        if delta is None:
+            W = D * model.comMasses
+        else:
+            w = delta + 1.0 if k == bodyCount else delta[:, model.comBodies] + 1.0
+            w *= model.comMasses
+            W = D * w[:, None, :]
+        first += W.sum(axis=2)
+        cross = (W.reshape(-1, k) @ model.comCoordinates).reshape(count, 3, 3)
+        extra = cross + cross.transpose(0, 2, 1) + W @ D.transpose(0, 2, 1)
+        second += extra[:, _ROWS, _COLS]
+
+    com = first / M[:, None]
+    # Segundos momentos em relação ao CoM da amostra e tensor: I = Σ I_corpo + tr(S)·I3 - S.
+    second -= M[:, None] * com[:, _ROWS] * com[:, _COLS]
+    out = np.empty((count, 10))
+    out[:, 0] = M
+    out[:, 1:4] = com
+    trace = second[:, 0] + second[:, 1] + second[:, 2]
+    out[:, 4:7] = bodies[:, :3] + trace[:, None] - second[:, :3]
+    out[:, 7:] = bodies[:, 3:] - second[:, 3:]
+    return out
+
+
+def _chunkSamples(model):
+    return max(1, MONTE_CARLO_CHUNK_ELEMENTS // max(1, model.masses.size))
+
+
+def _runTask(model, seed, count):
+    rng = np.random.default_rng(seed)
+    chunk = _chunkSamples(model)
+    return np.concatenate([sampleChunk(model, rng, min(chunk, count - start))
+                           for start in range(0, count, chunk)])
+
+
+_workerModel = None
+
+
+def _initWorker(model):
+    global _workerModel
+    _workerModel = model
+
+
+def _runWorkerTask(task):
+    return _runTask(_workerModel, *task)
+
+
+def monteCarloInertia(masses, coms, tensors, massTolerance=0.0, comTolerance=0.0, densityTolerance=0.0,
+                      densityGroups=None, samples=100000, percentiles=DEFAULT_PERCENTILES, seed=None,
+                      distribution='normal', workers=1, progress=None):
+    """
+    Propaga as tolerâncias (ver prepareToleranceModel) até o tensor global e
+    retorna um ToleranceResult com os percentis da massa, do CoM e de cada
+    componente do tensor.
+    workers > 1 distribui as tarefas de MONTE_CARLO_TASK_SAMPLES amostras em
+    um pool de processos (None: número de CPUs). progress(done, total), se
+    dado, é chamado depois de cada tarefa e pode interromper a análise
+    lançando uma exceção (ver worker.py).
+    """
+    model, origin = prepareToleranceModel(masses, coms, tensors, massTolerance, comTolerance,
+                                          densityTolerance, densityGroups, distribution)
+    nominal = computeGlobalInertia(masses, coms, tensors)
+
+    counts = [min(MONTE_CARLO_TASK_SAMPLES, samples - start) for start in range(0, samples, MONTE_CARLO_TASK_SAMPLES)]
+    seeds = np.random.SeedSequence(seed).spawn(len(counts))
+    tasks = list(zip(seeds, counts))
+    results = np.empty((samples, 10))
+
+    workers = workers or os.cpu_count() or 1
+    done = 0
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_initWorker,
+                                 initargs=(model,)) as executor:
+            for chunk in executor.map(_runWorkerTask, tasks):
+                results[done:done + len(chunk)] = chunk
+                done += len(chunk)
+                if progress:
+                    progress(done, samples)
+    else:
+        for seedSequence, count in tasks:
+            results[done:done + count] = _runTask(model, seedSequence, count)
+            done += count
+            if progress:
+                progress(done, samples)
+
+    values = np.percentile(results, percentiles, axis=0)
+    return ToleranceResult(
+        samples,
+        tuple(percentiles),
+        values[:, 0],
+        (values[:, 1:4] + origin) * LENGTH_CM_TO_MM,
+        values[:, 4:] * INERTIA_KGCM2_TO_GMM2,
+        nominal
+    )
+
+
+def formatToleranceReport(result):
+    """Texto do relatório de um ToleranceResult: uma linha por grandeza, com os percentis."""
+    header = 'Percentis ({} amostras): {}'.format(
+        result.samples, ', '.join('p{:g}'.format(p) for p in result.percentiles))
+    lines = [header, 'Massa (kg): {}'.format(', '.join('{:.6g}'.format(v) for v in result.mass))]
+    for axis, column in zip('xyz', result.com.T):
+        lines.append('CoM {} (mm): {}'.format(axis, ', '.join('{:.6g}'.format(v) for v in column)))
+    for name, column in zip(TENSOR_COMPONENTS, result.tensor.T):
+        lines.append('I{} (g·mm²): {}'.format(name, ', '.join('{:.6g}'.format(v) for v in column)))
+    return '\n'.join(lines)
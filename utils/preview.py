@@ -0,0 +1,307 @@
+"""
+Prévia ao vivo nas tabelas de CoM e de tensor de inércia.
+
+A cada edição de uma célula (inputChanged) o diálogo relê os valores, resolve
+a caixa substituta (solveBoxCached) e mostra, em uma caixa de texto do
+próprio diálogo, como ficariam a massa, o CoM e o tensor globais do design com
+o novo corpo. O resultado global vem da última leitura completa do design
+(setPreviewBase) e o novo corpo é somado a ele com MassProperties: cada tecla
+custa alguns microssegundos, sem consultar o kernel.
+
+No executePreview a caixa resolvida e os seus eixos principais são desenhados
+como gráficos customizados (sem features nem timeline; o Fusion os descarta
+ao fim da prévia). Enquanto o usuário digita, o desenho é adiado até que as
+células fiquem PREVIEW_DEBOUNCE segundos sem mudar; um evento customizado
+pede então uma nova prévia (Command.doExecutePreview).
+
+A solução fica na memória de solveBoxCached, então o OK cria a caixa sem
+resolvê-la de novo.
+
+Uso:
+  start_preview(ui, handlers)
+  setPreviewBase((I_total, totalMass, globalCOM_mm))
+  ...
+  stop_preview(ui)
+"""
+
+import adsk.core, adsk.fusion, traceback
+import threading, time
+
+from .body_manipulation import createTemporaryBox
+from .mass_properties import MassProperties, REPORT
+from .profiling import traced
+from .solver import parseNumber, solveBoxCached
+
+PREVIEW_EVENT_ID = 'Inertia2FusionPreviewEvent'
+
+# Tempo, em segundos, sem edições nas células antes de desenhar a prévia.
+PREVIEW_DEBOUNCE = 0.15
+
+# Comprimento dos eixos principais desenhados, em relação à maior dimensão da caixa.
+AXIS_SCALE = 0.75
+
+# Meio comprimento, em mm, da cruz que marca o CoM antes de o tensor ser conhecido.
+MARKER_SIZE_MM = 10.0
+
+_base = MassProperties(units=REPORT)  # Design atual, sem o novo corpo
+_customEvent = None
+_eventHandler = None
+_pending = None  # Comando cuja prévia foi adiada
+
+
+def setPreviewBase(result):
+    """
+    Registra o resultado global do design (formato de getGlobalInertia) usado
+    nas prévias. Um resultado com erro (massa None, como o que
+    getGlobalInertiaAdaptive retorna) é ignorado e a base anterior é mantida.
+    """
+    global _base
+    I_total, totalMass, globalCOM_mm = result
+    if totalMass is None:
+        return
+    _base = MassProperties(totalMass, globalCOM_mm, I_total, units=REPORT)
+
+
+def _format(values):
+    return ', '.join('{:.6g}'.format(v) for v in values)
+
+
+class InertiaPreview:
+    """
+    Estado da prévia de um diálogo: os últimos valores lidos das células, o
+    corpo alvo, a solução e o instante da última mudança.
+    """
+
+    def __init__(self):
+        self.key = None
+        self.target = None
+        self.solution = None
+        self.error = None
+        self.changedAt = 0.0
+        self._timer = None
+
+    def update(self, com_values, tensor_values=None):
+        """
+        Lê as células (CoM e massa; tensor, se dado) e resolve a caixa.
+        Retorna False se os números não mudaram desde a última leitura (por
+        exemplo, '1' -> '1.'), caso em que nada é refeito.
+        """
+        try:
+            com = tuple(parseNumber(v) for v in com_values[:3])
+            mass = parseNumber(com_values[3])
+            tensor = None
+            if tensor_values is not None:
+                tensor = tuple(tuple(parseNumber(v) for v in row) for row in tensor_values)
+        except ValueError as e:
+            self.key = self.target = self.solution = None
+            self.error = str(e)
+            self.changedAt = time.perf_counter()
+            return True
+
+        key = (mass, com, tensor)
+        if key == self.key:
+            return False
+        self.key = key
+        self.changedAt = time.perf_counter()
+        self.target = MassProperties(mass, com, tensor, units=REPORT)
+        self.solution = None
+        self.error = None
+        if tensor is not None:
+            # Mesmos argumentos do OK (massa em g), para que ele reaproveite a solução.
+            try:
+                self.solution = solveBoxCached(mass * 1000, com, tensor)
+            except ValueError as e:
+                self.error = str(e)
+        return True
+
+    def summary(self):
+        """Texto da prévia: massa, CoM e variação do tensor globais com o novo corpo."""
+        if self.target is None:
+            return self.error or ''
+        total = _base + self.target
+        tensorDelta = (total.ixx - _base.ixx, total.iyy - _base.iyy, total.izz - _base.izz,
+                       total.ixy - _base.ixy, total.iyz - _base.iyz, total.ixz - _base.ixz)
+        lines = [
+            'Massa global (kg): {:.6g} (+{:.6g})'.format(total.mass, self.target.mass),
+            'CoM global (mm): ({}), Δ ({})'.format(
+                _format(total.com), _format((total.cx - _base.cx, total.cy - _base.cy, total.cz - _base.cz))),
+            'ΔI global (g·mm²) xx, yy, zz, xy, yz, xz: {}'.format(_format(tensorDelta)),
+        ]
+        if self.solution is not None:
+            lines.append('Caixa (mm): {}'.format(' × '.join('{:.4g}'.format(d) for d in self.solution.dimensions)))
+        if self.error:
+            lines.append(self.error)
+        return '\n'.join(lines)
+
+    def isSettling(self):
+        """True enquanto as células mudaram há menos de PREVIEW_DEBOUNCE segundos."""
+        return time.perf_counter() - self.changedAt < PREVIEW_DEBOUNCE
+
+    def schedule(self, command):
+        """Pede uma nova prévia de command quando as células pararem de mudar."""
+        global _pending
+        if self._timer is not None:
+            self._timer.cancel()
+        _pending = command
+        delay = max(0.0, PREVIEW_DEBOUNCE - (time.perf_counter() - self.changedAt))
+        self._timer = threading.Timer(delay, adsk.core.Application.get().fireCustomEvent, (PREVIEW_EVENT_ID,))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def cancel(self):
+        global _pending
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        _pending = None
+
+    def draw(self, component):
+        """
+        Desenha a caixa resolvida e os seus eixos principais (ou, sem tensor,
+        uma cruz no CoM alvo) como gráficos customizados de component.
+        """
+        if self.target is None or self.target.mass <= 0:
+            return None
+        group = component.customGraphicsGroups.add()
+        center = [c / 10 for c in self.target.com]  # mm -> cm
+        if self.solution is None:
+            half = MARKER_SIZE_MM / 10
+            axes = ((1, 0, 0), (0, 1, 0), (0, 0, 1))
+            lengths = (half, half, half)
+        else:
+            width, height, depth = (d / 10 for d in self.solution.dimensions)
+            R = self.solution.rotation
+            group.addBRepBody(createTemporaryBox(width, height, depth, R, center))
+            # Colunas de R: eixos principais, na ordem das dimensões.
+            axes = tuple((R[0][j], R[1][j], R[2][j]) for j in range(3))
+            lengths = (AXIS_SCALE * max(width, height, depth),) * 3
+
+        coordinates = []
+        for axis, length in zip(axes, lengths):
+            for sign in (-1, 1):
+                coordinates.extend(center[k] + sign * length * axis[k] for k in range(3))
+        lines = group.addLines(adsk.fusion.CustomGraphicsCoordinates.create(coordinates), [], False)
+        lines.weight = 2
+        return group
+
+
+def showPreviewError(inputs=None, textInputId=None):
+    """
+    Mostra o traceback da exceção em tratamento sem interromper a digitação
+    (uma caixa de mensagem a cada tecla travaria o diálogo): na caixa de texto
+    da prévia, se o diálogo ainda a tiver, ou na paleta TextCommands.
+    """
+    text = 'Erro na prévia:\n{}'.format(traceback.format_exc())
+    textInput = inputs.itemById(textInputId) if inputs is not None and textInputId else None
+    if textInput:
+        textInput.formattedText = text
+        return
+    textPalette = adsk.core.Application.get().userInterface.palettes.itemById('TextCommands')
+    if textPalette:
+        textPalette.writeText(text)
+
+
+def readPreviewCells(inputs, ids):
+    """Valores das células com os ids dados ('0.0' para as que não existirem)."""
+    values = []
+    for input_id in ids:
+        dataInput = inputs.itemById(input_id)
+        values.append(dataInput.value if dataInput else '0.0')
+    return values
+
+
+class PreviewInputChangedHandler(adsk.core.InputChangedEventHandler):
+    """
+    Atualiza a prévia a cada edição. readCells(inputs) retorna
+    (com_values, tensor_values) no formato dos callbacks das tabelas.
+    """
+
+    def __init__(self, preview, textInputId, readCells):
+        super().__init__()
+        self.preview = preview
+        self.textInputId = textInputId
+        self.readCells = readCells
+
+    @traced()
+    def notify(self, args):
+        inputs = None
+        try:
+            eventArgs = adsk.core.InputChangedEventArgs.cast(args)
+            if eventArgs.input.id == self.textInputId:
+                return
+            inputs = eventArgs.inputs
+            if self.preview.update(*self.readCells(inputs)):
+                textInput = inputs.itemById(self.textInputId)
+                if textInput:
+                    textInput.formattedText = self.preview.summary()
+        except Exception:
+            showPreviewError(inputs, self.textInputId)
+
+
+class PreviewExecuteHandler(adsk.core.CommandEventHandler):
+    """
+    Desenha a prévia, adiando-a enquanto as células ainda estão mudando. Um
+    erro vai para a caixa de texto textInputId do diálogo.
+    """
+
+    def __init__(self, preview, textInputId=None):
+        super().__init__()
+        self.preview = preview
+        self.textInputId = textInputId
+
+    @traced()
+    def notify(self, args):
+        inputs = None
+        try:
+            eventArgs = adsk.core.CommandEventArgs.cast(args)
+            inputs = eventArgs.command.commandInputs
+            if self.preview.isSettling():
+                self.preview.schedule(eventArgs.command)
+                return
+            design = adsk.core.Application.get().activeProduct
+            self.preview.draw(design.rootComponent)
+        except Exception:
+            showPreviewError(inputs, self.textInputId)
+
+
+class PreviewEventHandler(adsk.core.CustomEventHandler):
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        global _pending
+        try:
+            command, _pending = _pending, None
+            # O diálogo pode ter sido fechado antes de a prévia adiada chegar.
+            if command is not None and command.isValid:
+                command.doExecutePreview()
+        except Exception:
+            showPreviewError()
+
+
+def start_preview(ui, handlers):
+    """Registra o evento customizado das prévias adiadas (uma única vez)."""
+    global _customEvent, _eventHandler
+    try:
+        if _customEvent is None:
+            app = adsk.core.Application.get()
+            _customEvent = app.registerCustomEvent(PREVIEW_EVENT_ID)
+            _eventHandler = PreviewEventHandler()
+            _customEvent.add(_eventHandler)
+            handlers.append(_eventHandler)
+    except Exception as e:
+        ui.messageBox('Erro ao iniciar a prévia:\n{}'.format(traceback.format_exc()))
+
+
+def stop_preview(ui):
+    """Remove o evento customizado das prévias."""
+    global _customEvent, _eventHandler, _pending
+    try:
+        _pending = None
+        if _customEvent is not None:
+            _customEvent.remove(_eventHandler)
+            adsk.core.Application.get().unregisterCustomEvent(PREVIEW_EVENT_ID)
+            _customEvent = None
+            _eventHandler = None
+    except Exception as e:
+        ui.messageBox('Erro ao encerrar a prévia:\n{}'.format(traceback.format_exc()))
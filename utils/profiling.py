@@ -0,0 +1,176 @@
+"""
+Instrumentação opcional do caminho crítico: spans aninhados com contagem de
+chamadas e tempo cumulativo/próprio, exportáveis como trace do Chrome
+(chrome://tracing ou Perfetto) e como resumo textual.
+
+Desligada por padrão. Quando desligada, traced() custa um teste de flag por
+chamada e span() devolve um objeto nulo compartilhado.
+
+Uso:
+  enableProfiling()
+  ...
+  exportChromeTrace(path)
+  print(formatProfileSummary())
+"""
+
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Caminho padrão do trace exportado por reportProfile.
+DEFAULT_TRACE_PATH = os.path.join(tempfile.gettempdir(), 'inertia2fusion_trace.json')
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()
+
+# Eventos concluídos: (name, start, duration, threadId), tempos em segundos.
+_events = []
+# Estatísticas por nome: [calls, cumulative, self], em segundos.
+_stats = {}
+_origin = time.perf_counter()
+
+
+def enableProfiling():
+    global _enabled
+    _enabled = True
+
+
+def disableProfiling():
+    global _enabled
+    _enabled = False
+
+
+def isProfilingEnabled():
+    return _enabled
+
+
+def resetProfile():
+    """Descarta os spans e estatísticas coletados."""
+    global _origin
+    with _lock:
+        _events.clear()
+        _stats.clear()
+        _origin = time.perf_counter()
+
+
+class _Span:
+    __slots__ = ('name', 'start', 'childTime')
+
+    def __init__(self, name):
+        self.name = name
+        self.childTime = 0.0
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+        duration = time.perf_counter() - self.start
+        stack = _local.stack
+        stack.pop()
+        if stack:
+            stack[-1].childTime += duration
+        with _lock:
+            _events.append((self.name, self.start, duration, threading.get_ident()))
+            stats = _stats.get(self.name)
+            if stats is None:
+                stats = _stats[self.name] = [0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] += duration - self.childTime
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Context manager que registra um span com o nome dado, se a instrumentação estiver ligada."""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def traced(name=None):
+    """
+    Decorador que envolve a função (ou método) em um span. Sem name, usa o
+    __qualname__ da função.
+    """
+    def decorator(function):
+        label = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with _Span(label):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def getProfileStats():
+    """Retorna {name: (calls, cumulativeSeconds, selfSeconds)}."""
+    with _lock:
+        return {name: tuple(stats) for name, stats in _stats.items()}
+
+
+def formatProfileSummary(top=20):
+    """Resumo textual dos top spans por tempo próprio."""
+    stats = sorted(getProfileStats().items(), key=lambda item: item[1][2], reverse=True)[:top]
+    lines = ['{:<45} {:>8} {:>12} {:>12}'.format('span', 'chamadas', 'cumul. (ms)', 'próprio (ms)')]
+    for name, (calls, cumulative, selfTime) in stats:
+        lines.append('{:<45} {:>8} {:>12.2f} {:>12.2f}'.format(
+            name[:45], calls, 1000 * cumulative, 1000 * selfTime))
+    return '\n'.join(lines)
+
+
+def exportChromeTrace(path):
+    """Grava os spans no formato JSON de trace do Chrome (eventos completos, 'ph': 'X')."""
+    pid = os.getpid()
+    with _lock:
+        events = [{
+            'name': name,
+            'cat': 'inertia2fusion',
+            'ph': 'X',
+            'ts': (start - _origin) * 1e6,
+            'dur': duration * 1e6,
+            'pid': pid,
+            'tid': tid,
+        } for name, start, duration, tid in _events]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    return path
+
+
+def reportProfile(ui, path=DEFAULT_TRACE_PATH, top=20):
+    """
+    Exporta o trace para path e escreve o resumo dos top spans na paleta
+    TextCommands (ou em uma messageBox, se a paleta não existir).
+    """
+    if not _enabled:
+        return None
+    exportChromeTrace(path)
+    text = '{}\nTrace: {}'.format(formatProfileSummary(top), path)
+    textPalette = ui.palettes.itemById('TextCommands')
+    if textPalette:
+        textPalette.writeText(text)
+    else:
+        ui.messageBox(text)
+    return path
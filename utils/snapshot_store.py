@@ -0,0 +1,125 @@
+"""
+Cache em disco (SQLite) dos snapshots de propriedades físicas dos corpos, sem
+dependência do adsk.
+
+Cada entrada é identificada por (scope, token), com scope o documento (id do
+dataFile) e token o entityToken do corpo, e guarda o fingerprint do corpo no
+momento da leitura, o nível de precisão e o snapshot (massa em kg, CoM em cm e
+tensor em relação à origem em kg·cm²). Uma entrada só é válida se o fingerprint
+atual do corpo for igual ao guardado; quem decide isso é getters.py.
+
+O arquivo é limitado a maxEntries entradas: ao ultrapassar, as usadas há mais
+tempo são descartadas (LRU).
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser('~'), '.inertia2fusion', 'mass_properties.sqlite')
+DEFAULT_MAX_ENTRIES = 200000
+
+# Limite de parâmetros por consulta do SQLite (999 nas versões antigas).
+_QUERY_CHUNK = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    scope TEXT NOT NULL,
+    token TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    mass REAL, cx REAL, cy REAL, cz REAL,
+    ixx REAL, iyy REAL, izz REAL, ixy REAL, iyz REAL, ixz REAL,
+    lastUsed REAL NOT NULL,
+    PRIMARY KEY (scope, token)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS snapshots_lastUsed ON snapshots (lastUsed);
+"""
+
+
+def encodeFingerprint(fingerprint):
+    return json.dumps(list(fingerprint))
+
+
+class SnapshotStore:
+    """
+    Uso:
+      store = SnapshotStore(path)
+      entries = store.load(scope, tokens)   # token -> (fingerprint, level, snapshot)
+      store.save(scope, [(token, fingerprint, level, snapshot), ...])
+      store.close()
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, maxEntries=DEFAULT_MAX_ENTRIES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.maxEntries = maxEntries
+        self.connection = sqlite3.connect(path)
+        # O cache pode ser reconstruído: durabilidade total não compensa o custo.
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(_SCHEMA)
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM snapshots').fetchone()[0]
+
+    def load(self, scope, tokens):
+        """
+        Lê em lote as entradas dos tokens dados. Retorna um dicionário
+        token -> (fingerprint, level, snapshot), com fingerprint já no formato
+        de getBodyFingerprint (tupla) e snapshot (mass, com, tensor).
+        """
+        tokens = list(tokens)
+        entries = {}
+        for i in range(0, len(tokens), _QUERY_CHUNK):
+            chunk = tokens[i:i + _QUERY_CHUNK]
+            rows = self.connection.execute(
+                'SELECT token, fingerprint, level, mass, cx, cy, cz, ixx, iyy, izz, ixy, iyz, ixz '
+                'FROM snapshots WHERE scope = ? AND token IN ({})'.format(','.join('?' * len(chunk))),
+                [scope] + chunk)
+            for token, fingerprint, level, m, cx, cy, cz, ixx, iyy, izz, ixy, iyz, ixz in rows:
+                snapshot = (m, (cx, cy, cz), ((ixx, ixy, ixz), (ixy, iyy, iyz), (ixz, iyz, izz)))
+                entries[token] = (tuple(json.loads(fingerprint)), level, snapshot)
+        if entries:
+            now = time.time()
+            with self.connection:
+                self.connection.executemany(
+                    'UPDATE snapshots SET lastUsed = ? WHERE scope = ? AND token = ?',
+                    [(now, scope, token) for token in entries])
+        return entries
+
+    def save(self, scope, entries):
+        """Grava (ou substitui) as entradas (token, fingerprint, level, snapshot) e aplica o limite de tamanho."""
+        now = time.time()
+        rows = []
+        for token, fingerprint, level, (m, com, tensor) in entries:
+            rows.append((scope, token, encodeFingerprint(fingerprint), level, m, com[0], com[1], com[2],
+                         tensor[0][0], tensor[1][1], tensor[2][2], tensor[0][1], tensor[1][2], tensor[0][2], now))
+        if not rows:
+            return 0
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        self.evict()
+        return len(rows)
+
+    def evict(self):
+        """Descarta as entradas usadas há mais tempo além de maxEntries. Retorna quantas foram descartadas."""
+        excess = len(self) - self.maxEntries
+        if excess <= 0:
+            return 0
+        with self.connection:
+            self.connection.execute(
+                'DELETE FROM snapshots WHERE (scope, token) IN '
+                '(SELECT scope, token FROM snapshots ORDER BY lastUsed LIMIT ?)', (excess,))
+        return excess
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute('DELETE FROM snapshots')
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,247 @@
+"""
+Solver inverso: encontra a caixa (dimensões, orientação e posição) cujas
+propriedades de massa reproduzem a massa, o CoM e o tensor de inércia alvo.
+
+Para uma caixa de massa m e dimensões (a1, a2, a3) ao longo dos eixos
+principais, os momentos principais em relação ao CoM são:
+  I1 = m/12 * (a2² + a3²),  I2 = m/12 * (a1² + a3²),  I3 = m/12 * (a1² + a2²)
+e, invertendo:
+  a1² = 6 * (I2 + I3 - I1) / m   (e permutações)
+
+As funções não dependem de unidades: dimensões saem na unidade de comprimento
+em que massa e tensor forem consistentes (ex.: g e g·mm² -> mm).
+"""
+
+import functools
+import math
+from collections import namedtuple
+
+from .transforms import eulerFromRotation
+
+try:
+    import numpy as np
+except ImportError:  # O Python embarcado no Fusion nem sempre traz o NumPy.
+    np = None
+
+# Solução para um alvo:
+#   dimensions:  (a1, a2, a3) dimensões da caixa ao longo de X, Y e Z do corpo
+#   rotation:    matriz 3x3 cujas colunas são os eixos principais (det = +1)
+#   eulerXYZ:    (alpha, beta, gamma) em radianos, com rotation = Rz·Ry·Rx,
+#                a ordem usada por rotateBodyAroundCG_xyz
+#   translation: posição do CoM
+BoxSolution = namedtuple('BoxSolution', ['dimensions', 'rotation', 'eulerXYZ', 'translation'])
+
+# Quantidade máxima de varreduras do método de Jacobi (3x3 converge em poucas).
+_JACOBI_MAX_SWEEPS = 16
+
+# Quantidade de soluções mantidas em memória por solveBoxCached.
+SOLUTION_CACHE_SIZE = 256
+
+
+def parseNumber(text):
+    """
+    Converte o texto digitado em uma das tabelas em float, aceitando vírgula
+    como separador decimal. Levanta ValueError com uma mensagem legível.
+    """
+    try:
+        return float(str(text).strip().replace(',', '.'))
+    except ValueError:
+        raise ValueError("Valor inválido: '{}'".format(text))
+
+
+def symmetricEigen3(A):
+    """
+    Autovalores e autovetores de uma matriz simétrica 3x3 pelo método de Jacobi
+    cíclico, em Python puro.
+    Retorna (eigenvalues, eigenvectors), com os autovalores em ordem crescente e
+    os autovetores nas colunas correspondentes da matriz 3x3.
+    """
+    a = [[float(A[i][j]) for j in range(3)] for i in range(3)]
+    v = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+
+    for _ in range(_JACOBI_MAX_SWEEPS):
+        offDiagonal = a[0][1]**2 + a[0][2]**2 + a[1][2]**2
+        scale = a[0][0]**2 + a[1][1]**2 + a[2][2]**2
+        if offDiagonal <= 1e-30 * max(scale, 1e-300):
+            break
+        for p, q in ((0, 1), (0, 2), (1, 2)):
+            if a[p][q] == 0.0:
+                continue
+            # Rotação de Givens que anula a[p][q].
+            theta = (a[q][q] - a[p][p]) / (2.0 * a[p][q])
+            t = math.copysign(1.0, theta) / (abs(theta) + math.sqrt(theta * theta + 1.0))
+            c = 1.0 / math.sqrt(t * t + 1.0)
+            s = t * c
+            for k in range(3):
+                akp, akq = a[k][p], a[k][q]
+                a[k][p] = c * akp - s * akq
+                a[k][q] = s * akp + c * akq
+            for k in range(3):
+                apk, aqk = a[p][k], a[q][k]
+                a[p][k] = c * apk - s * aqk
+                a[q][k] = s * apk + c * aqk
+            for k in range(3):
+                vkp, vkq = v[k][p], v[k][q]
+                v[k][p] = c * vkp - s * vkq
+                v[k][q] = s * vkp + c * vkq
+
+    order = sorted(range(3), key=lambda i: a[i][i])
+    eigenvalues = tuple(a[i][i] for i in order)
+    eigenvectors = tuple(tuple(v[k][i] for i in order) for k in range(3))
+    return eigenvalues, eigenvectors
+
+
+def boxDimensionsFromPrincipalMoments(mass, principalMoments):
+    """
+    Dimensões (a1, a2, a3) da caixa de massa mass cujos momentos principais
+    são principalMoments. Levanta ValueError se os momentos violarem a
+    desigualdade triangular (nenhuma caixa os reproduz).
+    """
+    if mass <= 0:
+        raise ValueError("A massa alvo deve ser positiva (recebido {}).".format(mass))
+    I1, I2, I3 = principalMoments
+    squares = (6.0 * (I2 + I3 - I1) / mass,
+               6.0 * (I1 + I3 - I2) / mass,
+               6.0 * (I1 + I2 - I3) / mass)
+    if min(squares) <= 0:
+        raise ValueError(
+            "Os momentos principais {} violam a desigualdade triangular; "
+            "não existe caixa com esse tensor.".format(principalMoments))
+    return tuple(math.sqrt(s) for s in squares)
+
+
+def eulerXYZFromRotation(R):
+    """
+    Ângulos (alpha, beta, gamma) tais que R = Rz(gamma)·Ry(beta)·Rx(alpha).
+    """
+    return eulerFromRotation(R, 'xyz')
+
+
+def _properRotation(vectors):
+    # Garante det = +1 invertendo o terceiro eixo, se necessário.
+    det = (vectors[0][0] * (vectors[1][1] * vectors[2][2] - vectors[1][2] * vectors[2][1])
+           - vectors[0][1] * (vectors[1][0] * vectors[2][2] - vectors[1][2] * vectors[2][0])
+           + vectors[0][2] * (vectors[1][0] * vectors[2][1] - vectors[1][1] * vectors[2][0]))
+    if det < 0:
+        return tuple((row[0], row[1], -row[2]) for row in vectors)
+    return tuple(tuple(row) for row in vectors)
+
+
+def solveBox(mass, com, tensor):
+    """
+    Resolve um alvo: massa, CoM (x, y, z) e tensor 3x3 em relação ao CoM.
+    Retorna um BoxSolution.
+    """
+    symmetric = [[0.5 * (tensor[i][j] + tensor[j][i]) for j in range(3)] for i in range(3)]
+    principalMoments, axes = symmetricEigen3(symmetric)
+    dimensions = boxDimensionsFromPrincipalMoments(mass, principalMoments)
+    rotation = _properRotation(axes)
+    return BoxSolution(dimensions, rotation, eulerXYZFromRotation(rotation), tuple(com))
+
+
+@functools.lru_cache(maxsize=SOLUTION_CACHE_SIZE)
+def _solveBoxKey(mass, com, tensor):
+    return solveBox(mass, com, tensor)
+
+
+def solveBoxCached(mass, com, tensor):
+    """
+    solveBox com memória das últimas soluções: um alvo já resolvido (por
+    exemplo, reenviado pelas tabelas em uma nova execução do add-in) não é
+    resolvido de novo. Alvos inválidos não são memorizados.
+    """
+    return _solveBoxKey(float(mass), tuple(float(c) for c in com),
+                        tuple(tuple(float(x) for x in row) for row in tensor))
+
+
+def clearSolutionCache():
+    """Descarta as soluções memorizadas por solveBoxCached."""
+    _solveBoxKey.cache_clear()
+
+
+def solveBoxes(masses, coms, tensors):
+    """
+    Versão em lote de solveBox, vetorizada com NumPy:
+      masses (N,), coms (N,3), tensors (N,3,3).
+    Retorna (solution, valid), onde solution é um BoxSolution de arrays
+    (dimensions (N,3), rotation (N,3,3), eulerXYZ (N,3), translation (N,3))
+    e valid (N,) indica os alvos que admitem uma caixa; os demais ficam com NaN.
+    """
+    if np is None:
+        raise ImportError("solveBoxes requer o NumPy.")
+
+    m = np.asarray(masses, dtype=float).reshape(-1)
+    p = np.asarray(coms, dtype=float).reshape(-1, 3)
+    T = np.asarray(tensors, dtype=float).reshape(-1, 3, 3)
+    T = 0.5 * (T + np.swapaxes(T, 1, 2))
+
+    principalMoments, axes = np.linalg.eigh(T)
+
+    squares = 6.0 * (principalMoments.sum(axis=1, keepdims=True) - 2.0 * principalMoments)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        squares = squares / m[:, None]
+    valid = (m > 0) & np.all(squares > 0, axis=1)
+    dimensions = np.where(valid[:, None], np.sqrt(np.where(valid[:, None], squares, 1.0)), np.nan)
+
+    flip = np.linalg.det(axes) < 0
+    axes[flip, :, 2] *= -1.0
+
+    sy = np.clip(-axes[:, 2, 0], -1.0, 1.0)
+    beta = np.arcsin(sy)
+    locked = np.abs(sy) >= 1.0 - 1e-12
+    alpha = np.where(locked, np.arctan2(-axes[:, 1, 2], axes[:, 1, 1]),
+                     np.arctan2(axes[:, 2, 1], axes[:, 2, 2]))
+    gamma = np.where(locked, 0.0, np.arctan2(axes[:, 1, 0], axes[:, 0, 0]))
+    eulerXYZ = np.stack([alpha, beta, gamma], axis=1)
+
+    return BoxSolution(dimensions, axes, eulerXYZ, p.copy()), valid
+
+
+def validateInertiaTensors(masses, tensors, rtol=1e-9):
+    """
+    Valida um lote de alvos (massa e tensor em relação ao CoM), vetorizado com
+    NumPy quando disponível. Verifica, nessa ordem: massa positiva, simetria,
+    tensor positivo-definido e desigualdade triangular dos momentos principais
+    (cada um no máximo a soma dos outros dois).
+    Retorna uma lista com None para os alvos válidos e a mensagem de erro dos demais.
+    """
+    if not masses:
+        return []
+    if np is None:
+        return [_validateInertiaTensor(m, T, rtol) for m, T in zip(masses, tensors)]
+
+    m = np.asarray(masses, dtype=float).reshape(-1)
+    T = np.asarray(tensors, dtype=float).reshape(-1, 3, 3)
+    scale = np.maximum(np.abs(T).max(axis=(1, 2)), 1e-300)
+    asymmetry = np.abs(T - np.swapaxes(T, 1, 2)).max(axis=(1, 2))
+    moments = np.linalg.eigvalsh(0.5 * (T + np.swapaxes(T, 1, 2)))
+    triangle = moments[:, 2] - moments[:, 0] - moments[:, 1]
+
+    errors = []
+    for i in range(len(m)):
+        errors.append(_validationError(m[i], asymmetry[i] > rtol * scale[i], tuple(moments[i]),
+                                       triangle[i] > rtol * scale[i], rtol * scale[i]))
+    return errors
+
+
+def _validateInertiaTensor(mass, tensor, rtol):
+    scale = max(max(abs(x) for x in row) for row in tensor) or 1e-300
+    asymmetric = max(abs(tensor[i][j] - tensor[j][i]) for i in range(3) for j in range(3)) > rtol * scale
+    symmetric = [[0.5 * (tensor[i][j] + tensor[j][i]) for j in range(3)] for i in range(3)]
+    moments, _ = symmetricEigen3(symmetric)
+    return _validationError(mass, asymmetric, moments, moments[2] - moments[0] - moments[1] > rtol * scale,
+                            rtol * scale)
+
+
+def _validationError(mass, asymmetric, moments, violatesTriangle, tolerance):
+    if not mass > 0:
+        return "A massa deve ser positiva (recebido {}).".format(mass)
+    if asymmetric:
+        return "O tensor de inércia não é simétrico."
+    if moments[0] <= tolerance:
+        return "O tensor de inércia não é positivo-definido (momentos principais {}).".format(
+            tuple(float(x) for x in moments))
+    if violatesTriangle:
+        return "Os momentos principais {} violam a desigualdade triangular.".format(
+            tuple(float(x) for x in moments))
+    return None
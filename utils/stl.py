@@ -0,0 +1,96 @@
+"""
+Leitura de STL binário por mapeamento em memória, sem dependência do adsk.
+
+Formato: cabeçalho de 80 bytes, uint32 com a quantidade de triângulos e, para
+cada triângulo, 50 bytes (normal e três nós em float32 e um uint16 de
+atributos), tudo little-endian. Os registros são mapeados com numpy.memmap: só
+as páginas lidas vão para a memória, e cada bloco é convertido para float64 em
+mesh_math.triangleSoupMoments. STL ASCII não é suportado.
+"""
+
+import os
+
+from .mesh_math import triangleSoupMoments, massPropertiesFromMoments
+
+try:
+    import numpy as np
+except ImportError:  # O Python embarcado no Fusion nem sempre traz o NumPy.
+    np = None
+
+STL_HEADER_SIZE = 80
+STL_RECORD_SIZE = 50
+
+# Triângulos usados para estimar o centroide da peça (ver stlOrigin).
+ORIGIN_SAMPLE_SIZE = 1 << 16
+
+_STL_RECORD = None
+
+
+def _recordType():
+    global _STL_RECORD
+    if _STL_RECORD is None:
+        _STL_RECORD = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+    return _STL_RECORD
+
+
+def stlTriangleCount(path):
+    """Quantidade de triângulos do STL binário, validada pelo tamanho do arquivo."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.seek(STL_HEADER_SIZE)
+        header = f.read(4)
+    if len(header) < 4:
+        raise ValueError("'{}' não é um STL binário: arquivo muito pequeno.".format(path))
+    count = int.from_bytes(header, 'little')
+    if size != STL_HEADER_SIZE + 4 + count * STL_RECORD_SIZE:
+        raise ValueError("'{}' não é um STL binário válido ({} triângulos no cabeçalho, {} bytes; "
+                         "STL ASCII não é suportado).".format(path, count, size))
+    return count
+
+
+def openStlVertices(path):
+    """
+    Mapeia o STL binário em memória e retorna os nós dos triângulos como um
+    array (N, 3, 3) float32 somente leitura, sem ler o arquivo.
+    """
+    if np is None:
+        raise RuntimeError('A leitura de STL requer o NumPy.')
+    count = stlTriangleCount(path)
+    if count == 0:
+        return np.zeros((0, 3, 3), dtype=np.float32)
+    records = np.memmap(path, dtype=_recordType(), mode='r', offset=STL_HEADER_SIZE + 4, shape=(count,))
+    return records['vertices']
+
+
+def stlOrigin(vertices, scale=1.0):
+    """
+    Ponto de referência da integração: a média dos nós de uma amostra de até
+    ORIGIN_SAMPLE_SIZE triângulos, na escala final. Basta que fique perto da
+    peça, para limitar o cancelamento numérico.
+    """
+    if len(vertices) == 0:
+        return (0.0, 0.0, 0.0)
+    step = max(1, len(vertices) // ORIGIN_SAMPLE_SIZE)
+    sample = vertices[::step]
+    return tuple(float(x) * scale for x in sample.reshape(-1, 3).mean(axis=0, dtype=np.float64))
+
+
+def stlRangeMoments(path, start, stop, origin, scale=1.0):
+    """
+    Somas de mesh_math.triangleMoments dos triângulos [start, stop) do STL.
+    Cada chamada mapeia o arquivo de novo, então pode rodar em outro processo.
+    """
+    return triangleSoupMoments(openStlVertices(path)[start:stop], origin, scale)
+
+
+def stlMassProperties(path, density, scale=1.0):
+    """
+    Propriedades de massa do sólido fechado do STL: (mass, com, tensor), com
+    o tensor em relação à origem, nas unidades de density e das coordenadas
+    multiplicadas por scale (por exemplo, kg/cm³ e scale = 0.1 para um STL em
+    mm, resultando em kg, cm e kg·cm²).
+    """
+    vertices = openStlVertices(path)
+    origin = stlOrigin(vertices, scale)
+    return massPropertiesFromMoments(triangleSoupMoments(vertices, origin, scale), origin, density)
+
@@ -0,0 +1,134 @@
+"""
+Análise de tolerâncias do design no Fusion: reúne os corpos (um por instância,
+com o material de cada um) e propaga as tolerâncias de massa, CoM e densidade
+até o tensor global com monteCarloInertia (ver montecarlo.py).
+
+As tolerâncias de cada corpo são as atribuídas por setBodyTolerance, ou
+DEFAULT_MASS_TOLERANCE e DEFAULT_COM_TOLERANCE_MM; as de densidade são por
+material (setDensityTolerance, ou DEFAULT_DENSITY_TOLERANCE), e os corpos de
+um mesmo material variam juntos.
+"""
+
+import adsk.core, adsk.fusion, traceback
+import time
+
+from .getters import getBodySnapshot, getMeshSnapshot, iterOccurrences
+from .mass_properties import MassProperties
+from .montecarlo import monteCarloInertia, formatToleranceReport
+from .profiling import traced
+from .worker import submitJob
+
+# Tolerâncias padrão, como limites ±: massa e densidade relativas, CoM em mm.
+DEFAULT_MASS_TOLERANCE = 0.0
+DEFAULT_COM_TOLERANCE_MM = 0.1
+DEFAULT_DENSITY_TOLERANCE = 0.02
+
+# Amostras da análise no Fusion.
+TOLERANCE_SAMPLES = 100000
+
+# Material dos corpos de malha sem material no componente.
+MESH_MATERIAL_KEY = 'Malha'
+
+_bodyTolerances = {}     # entityToken -> (massTolerance, comTolerance_mm)
+_densityTolerances = {}  # nome do material -> tolerância relativa
+
+
+def setBodyTolerance(body, massTolerance=None, comTolerance=None):
+    """Atribui ao corpo as tolerâncias de massa (relativa) e de CoM (mm); None mantém o padrão."""
+    _bodyTolerances[body.entityToken] = (massTolerance, comTolerance)
+
+
+def setDensityTolerance(materialName, tolerance):
+    """Atribui a tolerância relativa de densidade de um material."""
+    _densityTolerances[materialName] = tolerance
+
+
+def getBodyTolerance(body):
+    """(massTolerance, comTolerance_mm) do corpo."""
+    massTolerance, comTolerance = _bodyTolerances.get(body.entityToken, (None, None))
+    return (DEFAULT_MASS_TOLERANCE if massTolerance is None else massTolerance,
+            DEFAULT_COM_TOLERANCE_MM if comTolerance is None else comTolerance)
+
+
+def _componentBodies(component):
+    # (propriedades, material, tolerâncias) de cada corpo do próprio componente.
+    bodies = []
+    for body in component.bRepBodies:
+        material = body.material
+        bodies.append((MassProperties.fromOrigin(*getBodySnapshot(body)),
+                       material.name if material else None, getBodyTolerance(body)))
+    for body in component.meshBodies:
+        material = component.material
+        bodies.append((MassProperties.fromOrigin(*getMeshSnapshot(body)),
+                       material.name if material else MESH_MATERIAL_KEY, getBodyTolerance(body)))
+    return bodies
+
+
+@traced()
+def gatherToleranceModel(rootComp):
+    """
+    Reúne cada corpo de cada instância no referencial do rootComp, com as
+    tolerâncias. Retorna os argumentos de monteCarloInertia:
+      (masses, coms, tensors, massTolerance, comTolerance, densityTolerance, densityGroups)
+    com um grupo de densidade por material.
+    """
+    masses, coms, tensors = [], [], []
+    massTolerance, comTolerance, groups = [], [], []
+    materials = {}
+
+    def add(props, materialName, tolerances):
+        if props.mass == 0:
+            return
+        masses.append(props.mass)
+        coms.append(props.com)
+        tensors.append(props.originTensor())
+        massTolerance.append(tolerances[0])
+        comTolerance.append(tolerances[1])
+        groups.append(materials.setdefault(materialName, len(materials)))
+
+    for props, materialName, tolerances in _componentBodies(rootComp):
+        add(props, materialName, tolerances)
+    memo = {}
+    for occ, transform, path in iterOccurrences(rootComp):
+        component = occ.component
+        if component.entityToken not in memo:
+            memo[component.entityToken] = _componentBodies(component)
+        for props, materialName, tolerances in memo[component.entityToken]:
+            add(props.transformed(transform), materialName, tolerances)
+
+    densityTolerance = [DEFAULT_DENSITY_TOLERANCE] * len(materials)
+    for name, index in materials.items():
+        densityTolerance[index] = _densityTolerances.get(name, DEFAULT_DENSITY_TOLERANCE)
+    return masses, coms, tensors, massTolerance, comTolerance, densityTolerance, groups
+
+
+def run_tolerance_analysis(ui, rootComp, background=False, samples=TOLERANCE_SAMPLES):
+    """
+    Executa a análise de tolerâncias do design e mostra os percentis da massa,
+    do CoM e do tensor globais. Com background, o sorteio roda em segundo
+    plano (o pool de worker.py deve estar iniciado).
+    Dentro do Fusion o sorteio usa um único processo: sys.executable é o
+    próprio Fusion, então o pool de processos de monteCarloInertia só é usado
+    fora dele.
+    """
+    try:
+        start = time.perf_counter()
+        model = gatherToleranceModel(rootComp)
+        if not model[0]:
+            ui.messageBox("Nenhum corpo com massa encontrado no design.")
+            return None
+
+        def report(result):
+            ui.messageBox('{}\nCorpos: {}\nTempo: {:.2f} s'.format(
+                formatToleranceReport(result), len(model[0]), time.perf_counter() - start))
+
+        if background:
+            submitJob(ui, 'Análise de tolerâncias', monteCarloInertia, *model, samples=samples,
+                      onDone=report, key='tolerance', progress=True)
+            return None
+        result = monteCarloInertia(*model, samples=samples)
+        report(result)
+        return result
+    except Exception as e:
+        ui.messageBox('Erro na análise de tolerâncias:\n{}'.format(traceback.format_exc()))
+        return None
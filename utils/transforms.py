@@ -0,0 +1,230 @@
+"""
+Transformações rígidas em Python puro, sem dependência do adsk.
+
+Uma transformação rígida é o par (R, t): R é a matriz de rotação 3x3 (tupla de
+linhas) e t é a translação (x, y, z). Aplicada a um ponto p: p' = R·p + t.
+As translações são sempre guardadas em cm, a unidade interna do Fusion; as
+funções que recebem comprimentos aceitam o parâmetro unit ('mm', 'cm' ou 'm')
+e convertem na entrada.
+
+Quatérnios são tuplas (w, x, y, z) unitárias.
+"""
+
+import math
+
+# Fatores de conversão para cm.
+LENGTH_UNITS = {'mm': 0.1, 'cm': 1.0, 'm': 100.0}
+
+IDENTITY_ROTATION = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0))
+IDENTITY_TRANSFORM = (IDENTITY_ROTATION, (0.0, 0.0, 0.0))
+
+_AXES = {'x': 0, 'y': 1, 'z': 2}
+
+
+def toCentimeters(vector, unit='cm'):
+    """Converte um vetor (x, y, z) da unidade unit para cm."""
+    try:
+        factor = LENGTH_UNITS[unit]
+    except KeyError:
+        raise ValueError("Unidade de comprimento desconhecida: '{}'".format(unit))
+    return tuple(factor * v for v in vector)
+
+
+# --- Rotações ---------------------------------------------------------------
+
+def matrixMultiply(A, B):
+    # Escrito termo a termo: é chamado uma vez por ocorrência na composição das transformações.
+    (a00, a01, a02), (a10, a11, a12), (a20, a21, a22) = A
+    (b00, b01, b02), (b10, b11, b12), (b20, b21, b22) = B
+    return ((a00 * b00 + a01 * b10 + a02 * b20, a00 * b01 + a01 * b11 + a02 * b21, a00 * b02 + a01 * b12 + a02 * b22),
+            (a10 * b00 + a11 * b10 + a12 * b20, a10 * b01 + a11 * b11 + a12 * b21, a10 * b02 + a11 * b12 + a12 * b22),
+            (a20 * b00 + a21 * b10 + a22 * b20, a20 * b01 + a21 * b11 + a22 * b21, a20 * b02 + a21 * b12 + a22 * b22))
+
+
+def transpose(A):
+    return tuple(tuple(A[j][i] for j in range(3)) for i in range(3))
+
+
+def rotateVector(R, v):
+    (r00, r01, r02), (r10, r11, r12), (r20, r21, r22) = R
+    x, y, z = v
+    return (r00 * x + r01 * y + r02 * z, r10 * x + r11 * y + r12 * z, r20 * x + r21 * y + r22 * z)
+
+
+def axisRotation(axis, angle):
+    """Rotação de angle radianos em torno do eixo 'x', 'y' ou 'z'."""
+    c, s = math.cos(angle), math.sin(angle)
+    if axis == 'x':
+        return ((1.0, 0.0, 0.0), (0.0, c, -s), (0.0, s, c))
+    if axis == 'y':
+        return ((c, 0.0, s), (0.0, 1.0, 0.0), (-s, 0.0, c))
+    if axis == 'z':
+        return ((c, -s, 0.0), (s, c, 0.0), (0.0, 0.0, 1.0))
+    raise ValueError("Eixo desconhecido: '{}'".format(axis))
+
+
+def _checkOrder(order):
+    order = order.lower()
+    if len(order) != 3 or set(order) != set('xyz'):
+        raise ValueError("Sequência de Euler inválida: '{}' (use uma permutação de 'xyz')".format(order))
+    return order
+
+
+def rotationFromEuler(angles, order='xyz', intrinsic=False):
+    """
+    Matriz de rotação a partir de três ângulos de Euler (Tait-Bryan), em radianos.
+      - extrínseco (padrão): as rotações são aplicadas na ordem de order em
+        torno dos eixos fixos; 'xyz' dá R = Rz·Ry·Rx, a convenção de
+        rotateBodyAroundCG_xyz e do rpy do URDF;
+      - intrínseco: em torno dos eixos já rotacionados; 'xyz' dá R = Rx·Ry·Rz.
+    angles[i] é o ângulo do eixo order[i].
+    """
+    order = _checkOrder(order)
+    R = IDENTITY_ROTATION
+    for axis, angle in zip(order, angles):
+        step = axisRotation(axis, angle)
+        R = matrixMultiply(R, step) if intrinsic else matrixMultiply(step, R)
+    return R
+
+
+def eulerFromRotation(R, order='xyz', intrinsic=False):
+    """
+    Inversa de rotationFromEuler: retorna os três ângulos, em radianos, na
+    ordem de order. Em gimbal lock, o ângulo do último eixo é fixado em zero.
+    """
+    order = _checkOrder(order)
+    if intrinsic:
+        # Intrínseco em order é o extrínseco na ordem inversa.
+        return tuple(reversed(eulerFromRotation(R, order[::-1])))
+
+    # Permuta os eixos para reduzir ao caso 'xyz'; em permutações ímpares as
+    # rotações trocam de sentido.
+    i, j, k = (_AXES[a] for a in order)
+    parity = 1.0 if (i, j, k) in ((0, 1, 2), (1, 2, 0), (2, 0, 1)) else -1.0
+    P = [i, j, k]
+    Rp = [[R[P[r]][P[c]] for c in range(3)] for r in range(3)]
+
+    sy = -Rp[2][0]
+    beta = math.asin(max(-1.0, min(1.0, sy)))
+    if abs(sy) < 1.0 - 1e-12:
+        alpha = math.atan2(Rp[2][1], Rp[2][2])
+        gamma = math.atan2(Rp[1][0], Rp[0][0])
+    else:
+        alpha = math.atan2(-Rp[1][2], Rp[1][1])
+        gamma = 0.0
+    return parity * alpha, parity * beta, parity * gamma
+
+
+def quaternionFromAxisAngle(axis, angle):
+    """Quatérnio da rotação de angle radianos em torno do vetor axis (não precisa ser unitário)."""
+    norm = math.sqrt(sum(a * a for a in axis))
+    if norm == 0:
+        raise ValueError("O eixo de rotação não pode ser nulo.")
+    s = math.sin(angle / 2) / norm
+    return (math.cos(angle / 2), axis[0] * s, axis[1] * s, axis[2] * s)
+
+
+def quaternionMultiply(q1, q2):
+    """Produto de Hamilton q1·q2 (aplica q2 e depois q1)."""
+    w1, x1, y1, z1 = q1
+    w2, x2, y2, z2 = q2
+    return (w1*w2 - x1*x2 - y1*y2 - z1*z2,
+            w1*x2 + x1*w2 + y1*z2 - z1*y2,
+            w1*y2 - x1*z2 + y1*w2 + z1*x2,
+            w1*z2 + x1*y2 - y1*x2 + z1*w2)
+
+
+def quaternionConjugate(q):
+    return (q[0], -q[1], -q[2], -q[3])
+
+
+def rotationFromQuaternion(q):
+    """Matriz de rotação do quatérnio q (normalizado aqui)."""
+    norm = math.sqrt(sum(c * c for c in q))
+    w, x, y, z = (c / norm for c in q)
+    return ((1 - 2*(y*y + z*z), 2*(x*y - w*z), 2*(x*z + w*y)),
+            (2*(x*y + w*z), 1 - 2*(x*x + z*z), 2*(y*z - w*x)),
+            (2*(x*z - w*y), 2*(y*z + w*x), 1 - 2*(x*x + y*y)))
+
+
+def quaternionFromRotation(R):
+    """Quatérnio (w >= 0) da matriz de rotação R, pelo método de Shepperd."""
+    trace = R[0][0] + R[1][1] + R[2][2]
+    if trace > 0:
+        s = 2.0 * math.sqrt(trace + 1.0)
+        q = (0.25 * s, (R[2][1] - R[1][2]) / s, (R[0][2] - R[2][0]) / s, (R[1][0] - R[0][1]) / s)
+    elif R[0][0] > R[1][1] and R[0][0] > R[2][2]:
+        s = 2.0 * math.sqrt(1.0 + R[0][0] - R[1][1] - R[2][2])
+        q = ((R[2][1] - R[1][2]) / s, 0.25 * s, (R[0][1] + R[1][0]) / s, (R[0][2] + R[2][0]) / s)
+    elif R[1][1] > R[2][2]:
+        s = 2.0 * math.sqrt(1.0 + R[1][1] - R[0][0] - R[2][2])
+        q = ((R[0][2] - R[2][0]) / s, (R[0][1] + R[1][0]) / s, 0.25 * s, (R[1][2] + R[2][1]) / s)
+    else:
+        s = 2.0 * math.sqrt(1.0 + R[2][2] - R[0][0] - R[1][1])
+        q = ((R[1][0] - R[0][1]) / s, (R[0][2] + R[2][0]) / s, (R[1][2] + R[2][1]) / s, 0.25 * s)
+    return q if q[0] >= 0 else tuple(-c for c in q)
+
+
+# --- Transformações rígidas -------------------------------------------------
+
+def rotationTransform(R, pivot=(0.0, 0.0, 0.0), unit='cm'):
+    """Rotação R em torno do ponto pivot (na unidade unit)."""
+    c = toCentimeters(pivot, unit)
+    Rc = rotateVector(R, c)
+    return tuple(tuple(row) for row in R), tuple(c[i] - Rc[i] for i in range(3))
+
+
+def translationTransform(t, unit='cm'):
+    """Translação pura por t (na unidade unit)."""
+    return IDENTITY_ROTATION, toCentimeters(t, unit)
+
+
+def composeTransforms(outer, inner):
+    """
+    Compõe duas transformações rígidas: aplica primeiro inner e depois outer.
+    Retorna (R_outer·R_inner, R_outer·t_inner + t_outer).
+    """
+    Ro, to = outer
+    Ri, ti = inner
+    Rt = rotateVector(Ro, ti)
+    return matrixMultiply(Ro, Ri), (Rt[0] + to[0], Rt[1] + to[1], Rt[2] + to[2])
+
+
+def composeSequence(transforms):
+    """
+    Reduz uma sequência de transformações, aplicadas na ordem dada, a uma só.
+    """
+    result = IDENTITY_TRANSFORM
+    for transform in transforms:
+        result = composeTransforms(transform, result)
+    return result
+
+
+def invertTransform(transform):
+    """Inversa de (R, t): (R^T, -R^T·t)."""
+    R, t = transform
+    Rt = transpose(R)
+    return Rt, tuple(-c for c in rotateVector(Rt, t))
+
+
+def transformPoint(transform, p):
+    R, t = transform
+    Rp = rotateVector(R, p)
+    return tuple(Rp[i] + t[i] for i in range(3))
+
+
+def transformToArray(transform):
+    """Matriz 4x4 homogênea, linha a linha, no formato de Matrix3D.setWithArray (translação em cm)."""
+    R, t = transform
+    return [R[0][0], R[0][1], R[0][2], t[0],
+            R[1][0], R[1][1], R[1][2], t[1],
+            R[2][0], R[2][1], R[2][2], t[2],
+            0.0, 0.0, 0.0, 1.0]
+
+
+def transformFromArray(a):
+    """Inversa de transformToArray, a partir do resultado de Matrix3D.asArray()."""
+    R = ((a[0], a[1], a[2]),
+         (a[4], a[5], a[6]),
+         (a[8], a[9], a[10]))
+    return R, (a[3], a[7], a[11])
@@ -0,0 +1,248 @@
+"""
+Importação e exportação dos blocos <inertial> de descrições de robôs (URDF e SDF).
+
+Os arquivos são lidos de forma incremental (xml.etree.ElementTree.iterparse):
+cada <link> é descartado da árvore assim que processado, então a memória não
+cresce com o número de links.
+
+Unidades: URDF e SDF usam o SI (kg, m, kg·m²); os alvos produzidos usam as
+unidades das tabelas (kg, mm e g·mm²). O tensor é lido no referencial do
+<inertial> (origin/pose, com rpy) e rotacionado para o referencial do link;
+o CoM é a posição desse referencial no link. A cadeia cinemática (joints) não
+é resolvida: cada alvo fica no referencial do próprio link.
+
+Na exportação, os escritores recebem InertiaTarget (nas unidades das tabelas) e
+gravam cada link assim que ele é recebido, sem acumular o documento em memória.
+"""
+
+import json
+import re
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from xml.sax.saxutils import quoteattr
+
+from .batch import InertiaTarget, TARGET_FIELDS
+from .solver import validateInertiaTensors
+from .transforms import rotationFromEuler, matrixMultiply, transpose
+
+# Conversões do SI para as unidades das tabelas.
+LENGTH_M_TO_MM = 1000.0
+INERTIA_KGM2_TO_GMM2 = 1e9
+
+# Quantidade de links validados de uma vez.
+VALIDATION_CHUNK_SIZE = 1024
+
+# Resumo de uma importação: quantidade de links aceitos e rejeitados e as
+# mensagens de erro dos rejeitados (com o nome do link).
+ImportReport = namedtuple('ImportReport', ['accepted', 'rejected', 'errors'])
+
+_TENSOR_KEYS = ('ixx', 'ixy', 'ixz', 'iyy', 'iyz', 'izz')
+
+# Elementos cujos filhos (links, joints, ...) são descartados depois de lidos.
+_CONTAINER_TAGS = ('robot', 'sdf', 'world', 'model')
+
+
+def _localName(tag):
+    # Remove o namespace ({uri}tag), presente em alguns SDFs.
+    return tag.rsplit('}', 1)[-1]
+
+
+def _child(element, name):
+    for child in element:
+        if _localName(child.tag) == name:
+            return child
+    return None
+
+
+def _numbers(text, count, what):
+    values = (text or '').split()
+    if len(values) != count:
+        raise ValueError("'{}' deve ter {} valores (recebido '{}').".format(what, count, text))
+    return [float(v) for v in values]
+
+
+def _readUrdfInertial(inertial):
+    mass = _child(inertial, 'mass')
+    inertia = _child(inertial, 'inertia')
+    if mass is None or inertia is None:
+        raise ValueError("<inertial> sem <mass> ou <inertia>.")
+    origin = _child(inertial, 'origin')
+    xyz = _numbers(origin.get('xyz', '0 0 0'), 3, 'xyz') if origin is not None else [0.0] * 3
+    rpy = _numbers(origin.get('rpy', '0 0 0'), 3, 'rpy') if origin is not None else [0.0] * 3
+    if mass.get('value') is None:
+        raise ValueError("<mass> sem o atributo value.")
+    values = {key: float(inertia.get(key, 0.0)) for key in _TENSOR_KEYS}
+    return float(mass.get('value')), xyz, rpy, values
+
+
+def _readSdfInertial(inertial):
+    mass = _child(inertial, 'mass')
+    inertia = _child(inertial, 'inertia')
+    if mass is None or inertia is None:
+        raise ValueError("<inertial> sem <mass> ou <inertia>.")
+    pose = _child(inertial, 'pose')
+    poseValues = _numbers(pose.text, 6, 'pose') if pose is not None else [0.0] * 6
+    values = {}
+    for key in _TENSOR_KEYS:
+        element = _child(inertia, key)
+        values[key] = float(element.text) if element is not None else 0.0
+    return float(mass.text), poseValues[:3], poseValues[3:], values
+
+
+def inertialToTarget(name, mass, xyz, rpy, values):
+    """
+    Converte um <inertial> (SI, tensor no referencial do inertial) em um
+    InertiaTarget nas unidades das tabelas, com o tensor no referencial do link.
+    """
+    I = ((values['ixx'], values['ixy'], values['ixz']),
+         (values['ixy'], values['iyy'], values['iyz']),
+         (values['ixz'], values['iyz'], values['izz']))
+    # rpy do URDF/SDF: rotações em torno dos eixos fixos X, Y e Z, R = Rz·Ry·Rx.
+    R = rotationFromEuler(rpy, 'xyz')
+    I_link = matrixMultiply(matrixMultiply(R, I), transpose(R))
+    return InertiaTarget(
+        name,
+        mass,
+        tuple(LENGTH_M_TO_MM * x for x in xyz),
+        tuple(tuple(INERTIA_KGM2_TO_GMM2 * x for x in row) for row in I_link)
+    )
+
+
+def iterLinkInertials(path):
+    """
+    Gerador que percorre o arquivo URDF ou SDF e produz, para cada link com
+    <inertial>, um InertiaTarget (ainda não validado) ou um ValueError com o
+    motivo da falha de leitura.
+    """
+    stack = []
+    sdf = None
+    linkName = None
+    inertial = None
+    linkIndex = 0
+    for event, element in ET.iterparse(path, events=('start', 'end')):
+        tag = _localName(element.tag)
+        if event == 'start':
+            if sdf is None:
+                sdf = tag == 'sdf'
+            stack.append(element)
+            if tag == 'link':
+                linkName = element.get('name') or 'Link_{}'.format(linkIndex + 1)
+                inertial = None
+            continue
+
+        stack.pop()
+        if tag == 'inertial' and linkName is not None and stack and _localName(stack[-1].tag) == 'link':
+            inertial = element
+        elif tag == 'link':
+            if inertial is not None:
+                try:
+                    mass, xyz, rpy, values = (_readSdfInertial if sdf else _readUrdfInertial)(inertial)
+                    yield inertialToTarget(linkName, mass, xyz, rpy, values)
+                except (ValueError, TypeError) as e:
+                    yield ValueError("Link '{}': {}".format(linkName, e))
+            linkIndex += 1
+            linkName = None
+            inertial = None
+        if stack and _localName(stack[-1].tag) in _CONTAINER_TAGS:
+            # Descarta links, joints etc. já processados para manter a memória constante.
+            element.clear()
+            stack[-1].remove(element)
+
+
+def iterInertiaTargets(path, report=None, chunkSize=VALIDATION_CHUNK_SIZE):
+    """
+    Lê os links do arquivo (ver iterLinkInertials) e valida os tensores em
+    lotes de chunkSize (ver validateInertiaTensors), produzindo um
+    InertiaTarget por link aceito e um ValueError por link rejeitado, no
+    formato de batch.iterTargets.
+    Se report for um dicionário, acumula nele as chaves 'accepted',
+    'rejected' e 'errors' (lista de mensagens).
+    """
+    if report is not None:
+        report.setdefault('accepted', 0)
+        report.setdefault('rejected', 0)
+        report.setdefault('errors', [])
+
+    def flush(pending):
+        candidates = [t for t in pending if not isinstance(t, Exception)]
+        errors = iter(validateInertiaTensors([t.mass for t in candidates], [t.tensor for t in candidates]))
+        for item in pending:
+            if not isinstance(item, Exception):
+                error = next(errors)
+                if error:
+                    item = ValueError("Link '{}': {}".format(item.name, error))
+            if report is not None:
+                if isinstance(item, Exception):
+                    report['rejected'] += 1
+                    report['errors'].append(str(item))
+                else:
+                    report['accepted'] += 1
+            yield item
+
+    pending = []
+    for item in iterLinkInertials(path):
+        pending.append(item)
+        if len(pending) >= chunkSize:
+            yield from flush(pending)
+            pending = []
+    yield from flush(pending)
+
+
+def importInertials(path):
+    """
+    Importa todos os links do arquivo. Retorna (targets, report), com targets
+    a lista dos InertiaTarget aceitos e report um ImportReport.
+    """
+    report = {}
+    targets = [t for t in iterInertiaTargets(path, report) if not isinstance(t, Exception)]
+    return targets, ImportReport(report['accepted'], report['rejected'], report['errors'])
+
+
+def linkName(name):
+    """Nome válido para um link: letras, dígitos e '_' (ex.: 'Braço:1' -> 'Bra_o_1')."""
+    return re.sub(r'[^A-Za-z0-9_]', '_', name) or 'link'
+
+
+class UrdfInertialWriter:
+    """
+    Escreve um URDF com um <link> e seu <inertial> por alvo, em SI, no arquivo
+    já aberto f. O cabeçalho é escrito na criação e o fechamento em close().
+    """
+
+    def __init__(self, f, robotName='robot'):
+        self.f = f
+        self.f.write('<?xml version="1.0"?>\n<robot name={}>\n'.format(quoteattr(robotName)))
+
+    def write(self, target):
+        com = [x / LENGTH_M_TO_MM for x in target.com]
+        I = [[x / INERTIA_KGM2_TO_GMM2 for x in row] for row in target.tensor]
+        self.f.write(
+            '  <link name={}>\n'
+            '    <inertial>\n'
+            '      <origin xyz="{!r} {!r} {!r}" rpy="0 0 0"/>\n'
+            '      <mass value="{!r}"/>\n'
+            '      <inertia ixx="{!r}" ixy="{!r}" ixz="{!r}" iyy="{!r}" iyz="{!r}" izz="{!r}"/>\n'
+            '    </inertial>\n'
+            '  </link>\n'.format(quoteattr(target.name), com[0], com[1], com[2], target.mass,
+                                  I[0][0], I[0][1], I[0][2], I[1][1], I[1][2], I[2][2]))
+
+    def close(self):
+        self.f.write('</robot>\n')
+
+
+class JsonlInertialWriter:
+    """
+    Escreve um objeto JSON por alvo, com as chaves de TARGET_FIELDS nas unidades
+    das tabelas: o arquivo pode ser lido de volta por batch.iterTargets.
+    """
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, target):
+        (ixx, ixy, ixz), (_, iyy, iyz), (_, _, izz) = target.tensor
+        values = [target.name, target.mass, *target.com, ixx, iyy, izz, ixy, iyz, ixz]
+        self.f.write(json.dumps(dict(zip(TARGET_FIELDS, values)), ensure_ascii=False) + '\n')
+
+    def close(self):
+        pass
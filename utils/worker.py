@@ -0,0 +1,223 @@
+"""
+Execução em segundo plano das partes de cálculo puro (agregação, solver,
+formatação da exportação), para que o Fusion continue respondendo.
+
+A API do Fusion só pode ser usada na thread da interface. Por isso quem
+submete um job lê antes, na thread da interface, tudo o que ele precisa (os
+snapshots dos corpos, os alvos etc.) e entrega ao job apenas dados Python. O
+job roda em um pool de threads; o NumPy libera o GIL nas contas pesadas.
+
+O progresso e o resultado voltam para a thread da interface por um evento
+customizado (app.fireCustomEvent), e os callbacks do job (onDone, onError)
+são sempre chamados nessa thread, onde podem usar a API normalmente.
+
+Uso:
+  start_worker(ui, handlers)
+  job = submitJob(ui, 'Agregando corpos', aggregateInChunks, masses, coms, tensors,
+                  onDone=mostrarResultado, progress=True)
+  ...
+  stop_worker(ui)
+
+A função do job recebe um argumento nomeado progress quando progress=True:
+progress(done, total) atualiza a barra e lança JobCancelled se o usuário
+cancelou (ou se o job foi substituído por outro com a mesma chave).
+Jobs sem progress (como solveBoxCached, que leva microssegundos) não podem
+ser interrompidos: um cancelamento só descarta o resultado quando eles
+terminam, e até lá o job ocupa uma das threads do pool.
+"""
+
+import adsk.core, traceback
+import itertools, json, threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+WORKER_EVENT_ID = 'Inertia2FusionWorkerEvent'
+
+# Jobs simultâneos (rodando ou aguardando): além disso, submitJob recusa o job.
+MAX_CONCURRENT_JOBS = 2
+
+# Intervalo mínimo, em segundos, entre dois eventos de progresso de um mesmo job.
+PROGRESS_INTERVAL = 0.1
+
+_executor = None
+_customEvent = None
+_eventHandler = None
+_jobs = {}  # id -> Job, ainda não entregues à thread da interface
+_jobIds = itertools.count(1)
+
+
+class JobCancelled(Exception):
+    """Lançada por progress() dentro do job quando ele foi cancelado."""
+
+
+class Job:
+    """
+    Um cálculo submetido ao pool. Os campos state, result e error são
+    escritos pela thread do job e lidos pela thread da interface depois do
+    evento correspondente.
+    """
+
+    def __init__(self, title, key, onDone, onError):
+        self.id = next(_jobIds)
+        self.title = title
+        self.key = key
+        self.onDone = onDone
+        self.onError = onError
+        self.state = 'pending'  # pending, running, done, error, cancelled
+        self.result = None
+        self.error = None
+        self.done = 0
+        self.total = 0
+        self.progressDialog = None
+        self._cancelled = threading.Event()
+        self._lastEvent = 0.0
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def progress(self, done, total):
+        """Chamado pela função do job: registra o avanço e interrompe o job se ele foi cancelado."""
+        if self._cancelled.is_set():
+            raise JobCancelled()
+        self.done, self.total = done, total
+        now = time.perf_counter()
+        if now - self._lastEvent >= PROGRESS_INTERVAL:
+            self._lastEvent = now
+            _notify(self)
+
+    def _run(self, function, args, kwargs):
+        self.state = 'running'
+        try:
+            if self._cancelled.is_set():
+                raise JobCancelled()
+            self.result = function(*args, **kwargs)
+            # Um job cancelado que terminou mesmo assim (sem passar por
+            # progress depois do cancelamento) não entrega o resultado.
+            self.state = 'cancelled' if self._cancelled.is_set() else 'done'
+        except JobCancelled:
+            self.state = 'cancelled'
+        except Exception as e:
+            self.error = e
+            self.traceback = traceback.format_exc()
+            self.state = 'error'
+        _notify(self)
+
+
+def _notify(job):
+    # Pode ser chamado de qualquer thread: o Fusion entrega o evento na thread da interface.
+    adsk.core.Application.get().fireCustomEvent(WORKER_EVENT_ID, json.dumps({'job': job.id}))
+
+
+class WorkerEventHandler(adsk.core.CustomEventHandler):
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            job = _jobs.get(json.loads(args.additionalInfo)['job'])
+            if job is None:
+                return
+            dialog = job.progressDialog
+            if dialog:
+                if dialog.wasCancelled:
+                    job.cancel()
+                if job.total:
+                    dialog.maximumValue = job.total
+                    dialog.progressValue = job.done
+            if job.state in ('pending', 'running'):
+                return
+
+            del _jobs[job.id]
+            if dialog:
+                dialog.hide()
+            if job.cancelled:
+                # Substituído por outro job com a mesma chave ou cancelado pelo usuário.
+                return
+            if job.state == 'done':
+                if job.onDone:
+                    job.onDone(job.result)
+            elif job.state == 'error':
+                if job.onError:
+                    job.onError(job.error)
+                else:
+                    adsk.core.Application.get().userInterface.messageBox(
+                        'Erro em "{}":\n{}'.format(job.title, job.traceback))
+        except Exception as e:
+            adsk.core.Application.get().userInterface.messageBox('Erro:\n{}'.format(traceback.format_exc()))
+
+
+def start_worker(ui, handlers):
+    """Registra o evento customizado e cria o pool (uma única vez; em modo add-in, reaproveitados)."""
+    global _executor, _customEvent, _eventHandler
+    try:
+        if _customEvent is None:
+            app = adsk.core.Application.get()
+            _customEvent = app.registerCustomEvent(WORKER_EVENT_ID)
+            _eventHandler = WorkerEventHandler()
+            _customEvent.add(_eventHandler)
+            handlers.append(_eventHandler)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS, thread_name_prefix='Inertia2Fusion')
+    except Exception as e:
+        ui.messageBox('Erro ao iniciar o processamento em segundo plano:\n{}'.format(traceback.format_exc()))
+
+
+def stop_worker(ui):
+    """Cancela os jobs em andamento, encerra o pool e remove o evento customizado."""
+    global _executor, _customEvent, _eventHandler
+    try:
+        for job in list(_jobs.values()):
+            job.cancel()
+            if job.progressDialog:
+                job.progressDialog.hide()
+        _jobs.clear()
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+        if _customEvent is not None:
+            _customEvent.remove(_eventHandler)
+            adsk.core.Application.get().unregisterCustomEvent(WORKER_EVENT_ID)
+            _customEvent = None
+            _eventHandler = None
+    except Exception as e:
+        ui.messageBox('Erro ao encerrar o processamento em segundo plano:\n{}'.format(traceback.format_exc()))
+
+
+def activeJobs():
+    """Jobs submetidos cujo resultado ainda não foi entregue."""
+    return list(_jobs.values())
+
+
+def submitJob(ui, title, function, *args, onDone=None, onError=None, key=None, progress=False,
+              showProgress=True, **kwargs):
+    """
+    Executa function(*args, **kwargs) no pool e chama onDone(result) (ou
+    onError(exception)) na thread da interface. Um job com a mesma key de um
+    job em andamento cancela o anterior. Com showProgress, mostra um diálogo de
+    progresso com botão de cancelar.
+    Retorna o Job, ou None se já houver MAX_CONCURRENT_JOBS jobs em andamento.
+    """
+    if _executor is None:
+        raise RuntimeError('start_worker deve ser chamado antes de submitJob.')
+    if key is not None:
+        for job in _jobs.values():
+            if job.key == key:
+                job.cancel()
+    running = [job for job in _jobs.values() if not job.cancelled]
+    if len(running) >= MAX_CONCURRENT_JOBS:
+        ui.messageBox('Há {} cálculos em andamento; aguarde um deles terminar.'.format(len(running)))
+        return None
+
+    job = Job(title, key, onDone, onError)
+    if progress:
+        kwargs['progress'] = job.progress
+    if showProgress:
+        job.progressDialog = ui.createProgressDialog()
+        job.progressDialog.isCancelButtonShown = True
+        job.progressDialog.show(title, '%p%', 0, 100)
+    _jobs[job.id] = job
+    _executor.submit(job._run, function, args, kwargs)
+    return job